@@ -0,0 +1,164 @@
+import os
+import numpy as np
+from typing import Dict, Optional, Tuple
+from embedding_index import normalize_rows
+
+def _assign(data: np.ndarray, centroids: np.ndarray, batch_size: int = 65536) -> np.ndarray:
+    """Index of the most similar centroid for every row, computed in batches."""
+    assignments = np.empty(len(data), dtype=np.int32)
+    for start in range(0, len(data), batch_size):
+        block = np.asarray(data[start:start + batch_size], dtype=np.float32)
+        assignments[start:start + batch_size] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+def _kmeans(data: np.ndarray, k: int, n_iter: int, rng: np.random.Generator) -> np.ndarray:
+    """Spherical k-means: centroids are re-normalized means of their members."""
+    centroids = np.array(data[rng.choice(len(data), k, replace=False)], dtype=np.float32)
+    for _ in range(n_iter):
+        assignments = _assign(data, centroids)
+        order = np.argsort(assignments, kind='stable')
+        counts = np.bincount(assignments, minlength=k)
+        filled = np.flatnonzero(counts)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[filled]
+        sums = np.add.reduceat(np.asarray(data[order], dtype=np.float32), starts, axis=0)
+        centroids[filled] = normalize_rows(sums)
+
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            centroids[empty] = data[rng.choice(len(data), len(empty), replace=False)]
+    return centroids
+
+class IVFIndex:
+    """
+    Inverted-file index over row-normalized vectors.
+
+    Vectors are partitioned by a k-means coarse quantizer; a query scores the
+    nprobe closest partitions exactly instead of the whole matrix. n_lists and
+    nprobe trade recall against latency: probing more lists is slower but finds
+    more of the true nearest neighbours.
+    """
+
+    def __init__(self, centroids: np.ndarray, order: np.ndarray, offsets: np.ndarray):
+        self.centroids = centroids
+        self.order = order
+        self.offsets = offsets
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, matrix: np.ndarray, n_lists: Optional[int] = None, n_iter: int = 10,
+              train_size: int = 256, seed: int = 0) -> 'IVFIndex':
+        """
+        Train the quantizer and bucket every row.
+
+        Args:
+            matrix: Row-normalized float32 vectors (may be memory-mapped)
+            n_lists: Number of partitions; defaults to about 4 * sqrt(rows)
+            n_iter: k-means iterations
+            train_size: Training rows sampled per partition
+            seed: Random seed for reproducible partitions
+        """
+        rows = len(matrix)
+        n_lists = max(1, min(rows, n_lists or int(4 * np.sqrt(rows))))
+        rng = np.random.default_rng(seed)
+
+        sample = min(rows, n_lists * train_size)
+        train_rows = np.sort(rng.choice(rows, sample, replace=False)) if sample < rows else np.arange(rows)
+        centroids = _kmeans(np.asarray(matrix[train_rows], dtype=np.float32), n_lists, n_iter, rng)
+
+        return cls.from_assignments(centroids, _assign(matrix, centroids))
+
+    @classmethod
+    def from_assignments(cls, centroids: np.ndarray, assignments: np.ndarray) -> 'IVFIndex':
+        """Bucket rows by their partition."""
+        order = np.argsort(assignments, kind='stable').astype(np.int64)
+        offsets = np.concatenate(([0], np.cumsum(np.bincount(assignments, minlength=len(centroids))))).astype(np.int64)
+        return cls(centroids, order, offsets)
+
+    def assignments(self) -> np.ndarray:
+        """Partition of every indexed row."""
+        assignments = np.empty(len(self.order), dtype=np.int32)
+        assignments[self.order] = np.repeat(np.arange(self.n_lists, dtype=np.int32), np.diff(self.offsets))
+        return assignments
+
+    def reassign(self, matrix: np.ndarray, previous_rows: np.ndarray) -> 'IVFIndex':
+        """
+        Index an updated matrix with this index's trained centroids instead of re-running k-means.
+
+        Args:
+            matrix: The new row-normalized vectors
+            previous_rows: For each new row, the row holding the same vector in the matrix
+                this index was built on, or -1 for new and edited rows
+
+        Returns:
+            A new index; only the -1 rows are compared against the centroids
+        """
+        assignments = np.empty(len(matrix), dtype=np.int32)
+        kept = previous_rows >= 0
+        assignments[kept] = self.assignments()[previous_rows[kept]]
+        changed = np.flatnonzero(~kept)
+        if len(changed):
+            assignments[changed] = _assign(np.asarray(matrix[changed], dtype=np.float32), self.centroids)
+        return IVFIndex.from_assignments(self.centroids, assignments)
+
+    @classmethod
+    def load(cls, path: str) -> Optional['IVFIndex']:
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                return cls(data['centroids'], data['order'], data['offsets'])
+        except Exception as e:
+            print(f"Ignoring unreadable ANN index {path}: {e}")
+            return None
+
+    def save(self, path: str):
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, centroids=self.centroids, order=self.order, offsets=self.offsets)
+        os.replace(tmp_path, path)
+
+    def candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        """Rows in the nprobe partitions closest to the query."""
+        nprobe = max(1, min(nprobe, self.n_lists))
+        centroid_scores = self.centroids @ query
+        probe = np.argpartition(centroid_scores, -nprobe)[-nprobe:]
+        return np.concatenate([self.order[self.offsets[i]:self.offsets[i + 1]] for i in probe])
+
+    def search(self, matrix: np.ndarray, query: np.ndarray, top_k: int, nprobe: int = 8,
+               allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Approximate top-k rows by cosine similarity.
+
+        Args:
+            matrix: The indexed row-normalized vectors
+            query: Query vector (normalized here)
+            top_k: Number of results
+            nprobe: Partitions to scan
+            allowed: Optional boolean mask over rows; others are never returned
+
+        Returns:
+            (rows, scores), best first
+        """
+        query = normalize_rows(query)
+        rows = self.candidates(query, nprobe)
+        if allowed is not None:
+            rows = rows[allowed[rows]]
+        if not len(rows):
+            return rows, np.zeros(0, dtype=np.float32)
+
+        # Sorted rows read a memory-mapped matrix sequentially
+        rows = np.sort(rows)
+        scores = np.asarray(matrix[rows], dtype=np.float32) @ query
+        if top_k < len(scores):
+            best = np.argpartition(scores, -top_k)[-top_k:]
+        else:
+            best = np.arange(len(scores))
+        best = best[np.argsort(scores[best])[::-1]]
+        return rows[best], scores[best]
+
+    def stats(self) -> Dict:
+        sizes = np.diff(self.offsets)
+        return {'lists': self.n_lists, 'rows': int(self.offsets[-1]),
+                'largest_list': int(sizes.max()) if len(sizes) else 0}
@@ -1,8 +1,11 @@
+import time
+_process_start = time.perf_counter()
 
 import os
 import sys
 import logging
-from flask import Flask, request, jsonify
+import threading
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
 from pathlib import Path
@@ -12,17 +15,23 @@ from flasgger import Swagger
 backend_dir = Path(__file__).parent
 sys.path.insert(0, str(backend_dir))
 
+# Only light modules are imported here so the server can answer /api/health quickly;
+# scikit-learn, openai and CrewAI load in the background phases of initialize_cv_system
 from loader import CVLoader
+from cache import AnswerCache
+from semantic_cache import SemanticAnswerCache
+from singleflight import SingleFlight
 from retriever import CVRetriever
-from crew.agents import create_agents
-from crew.tasks import create_tasks
-
-# Check if CrewAI is available
-try:
-    from crewai import Crew
-    CREWAI_AVAILABLE = True
-except ImportError:
-    CREWAI_AVAILABLE = False
+from corpus import CorpusLoader
+from watcher import CVWatcher
+from llm import ChatClient
+from openai_clients import pool_stats
+from payloads import PrecomputedResponse
+from prewarm import AnswerPrewarmer
+from router import AnswerRouter
+from pipeline import answer_batch, answer_question, batch_items, format_sse, stream_answer
+from startup import StartupProfile
+import metrics
 
 # Load environment variables
 load_dotenv()
@@ -31,6 +40,9 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+startup = StartupProfile(_process_start)
+startup.record('import app modules', time.perf_counter() - _process_start)
+
 # Initialize Flask app
 app = Flask(__name__)
 
@@ -82,46 +94,277 @@ swagger = Swagger(app, config=swagger_config, template=swagger_template)
 cv_loader = None
 retriever = None
 agents = None
+crew_pool = None
+router = None
+cv_watcher = None
+chat_client = None
+answer_cache = None
+semantic_cache = None
+single_flight = None
+sections_response = None
+questions_responses = {}
+prewarmer = None
+
+def build_static_responses():
+    """Render /api/sections and /api/questions once for the current CV version."""
+    global sections_response, questions_responses
+    responses = {None: PrecomputedResponse([
+        {"question": q, "section": sec} for sec, questions in SECTION_QUESTIONS.items() for q in questions
+    ])}
+    for sec, questions in SECTION_QUESTIONS.items():
+        responses[sec] = PrecomputedResponse([{"question": q, "section": sec} for q in questions])
+    # Shared answer for sections without suggested questions
+    responses[''] = PrecomputedResponse([])
+    questions_responses = responses
+    sections_response = PrecomputedResponse(cv_loader.get_structured_sections()) if cv_loader else None
+
+def questions_response_for(section):
+    if not section:
+        return questions_responses[None]
+    return questions_responses.get(section, questions_responses[''])
+
+def _send_precomputed(payload):
+    status, body, headers = payload.select(request.headers.get('If-None-Match'), request.headers.get('Accept-Encoding'))
+    return Response(body, status=status, headers=headers, mimetype='application/json')
+
+def _on_cv_reload(doc_id, loader):
+    """Serve section listings from the re-parsed CV after a hot reload."""
+    global cv_loader
+    if loader is not None and cv_loader is not None and loader.file_path == cv_loader.file_path:
+        cv_loader = loader
+        build_static_responses()
+    # Any re-index changes the content hash, so suggested answers must be warmed again
+    if prewarmer is not None:
+        prewarmer.refresh()
+
+def start_cv_watcher(corpus=None):
+    """Re-index edited CV files in the background (CV_WATCH_INTERVAL seconds, 0 disables)."""
+    global cv_watcher
+    interval = float(os.getenv('CV_WATCH_INTERVAL', '2'))
+    if interval <= 0:
+        return None
+    
+    if corpus is not None:
+        sources = corpus.documents
+    else:
+        sources = lambda: {cv_loader.doc_id: cv_loader.file_path}
+    
+    cv_watcher = CVWatcher(
+        retriever,
+        sources,
+        interval=interval,
+        single_document=corpus is None,
+        on_reload=_on_cv_reload
+    ).start()
+    logger.info(f"Watching CV files for changes every {interval}s")
+    return cv_watcher
 
 def initialize_cv_system():
-    """Initialize the CV loading and retrieval system."""
-    global cv_loader, retriever, agents
+    """
+    Initialize the CV loading and retrieval system in phases.
+    
+    Each phase publishes its component as soon as it is ready, so /api/sections
+    works once the CV is parsed while the retriever and agents are still loading.
+    Step timings and component states are recorded in `startup`.
+    """
+    global cv_loader, retriever, agents, crew_pool, router, chat_client, answer_cache, semantic_cache, single_flight
     
+    startup.expect('cv', 'retriever', 'agents', 'watcher')
+    component = 'cv'
     try:
-        # Load CV data
-        cv_path = os.path.join(backend_dir, 'data', 'cv.md')
+        # Phase 1: parse the CV so section listings can be served
+        cv_path = os.getenv('CV_PATH', os.path.join(backend_dir, 'data', 'cv.md'))
         logger.info(f"Loading CV from: {cv_path}")
         
         if not os.path.exists(cv_path):
             logger.error(f"CV file not found: {cv_path}")
+            startup.mark('cv', 'failed', f"CV file not found: {cv_path}")
             return False
         
-        cv_loader = CVLoader(cv_path)
-        cv_loader.load_content()
+        with startup.step('parse CV'):
+            loader = CVLoader(cv_path)
+            loader.load_content()
+            cv_loader = loader
+            build_static_responses()
+        startup.mark('cv', 'ready')
         
-        # Parse sections and create chunks
-        chunks = cv_loader.get_chunks_for_embedding()
-        logger.info(f"Created {len(chunks)} chunks from CV")
+        # Phase 2: search index (scikit-learn, plus openai for dense embeddings)
+        component = 'retriever'
+        with startup.step('import scikit-learn'):
+            import sklearn.feature_extraction.text  # noqa: F401
+        if os.getenv('AZURE_OPENAI_API_KEY') and os.getenv('AZURE_OPENAI_ENDPOINT'):
+            with startup.step('import openai'):
+                import openai  # noqa: F401
         
-        if not chunks:
-            logger.error("No chunks created from CV")
-            return False
+        index_dir = os.getenv('CV_INDEX_DIR', os.path.join(backend_dir, 'data', 'index'))
+        corpus_source = os.getenv('CV_CORPUS')
+        
+        corpus = None
+        if corpus_source:
+            # Index a whole talent pool; chunks stream from the worker pool into the retriever
+            workers = os.getenv('CORPUS_WORKERS')
+            corpus = CorpusLoader(corpus_source, max_workers=int(workers) if workers else None)
+            with startup.step('build retriever (corpus)'):
+                new_retriever = CVRetriever(corpus.iter_chunks(), index_dir=index_dir)
+            stats = corpus.stats
+            logger.info(
+                f"Indexed {stats.get('files', 0)} CVs ({stats.get('chunks', 0)} chunks, {stats.get('failed', 0)} failed) "
+                f"from {corpus_source} at {stats.get('files_per_second', 0):.1f} files/s, "
+                f"peak memory {stats.get('peak_memory_mb')} MB (largest parser worker {stats.get('peak_worker_memory_mb')} MB)"
+            )
+        else:
+            # Parse sections and create chunks
+            chunks = cv_loader.get_chunks_for_embedding()
+            logger.info(f"Created {len(chunks)} chunks from CV")
+            
+            if not chunks:
+                logger.error("No chunks created from CV")
+                startup.mark('retriever', 'failed', "No chunks created from CV")
+                return False
+            
+            # Initialize retriever, reusing the on-disk embedding index when the CV is unchanged
+            with startup.step('build retriever'):
+                new_retriever = CVRetriever(chunks, content_hash=cv_loader.content_hash(), index_dir=index_dir)
+        
+        # Direct chat client for token streaming (the crew cannot stream)
+        chat_client = ChatClient.from_env()
         
-        # Initialize retriever
-        retriever = CVRetriever(chunks)
+        # Answers keyed on the indexed content hash, so CV edits invalidate them
+        answer_cache = AnswerCache(
+            maxsize=int(os.getenv('ANSWER_CACHE_SIZE', '512')),
+            db_path=os.getenv('ANSWER_CACHE_DB') or None
+        )
+        # Identical questions asked at the same time share one answer run
+        if os.getenv('COALESCE_REQUESTS', 'true').lower() in ('1', 'true', 'yes'):
+            single_flight = SingleFlight(timeout=float(os.getenv('COALESCE_TIMEOUT', '150')) or None)
+        # Rephrased questions reuse answers by question embedding (needs the dense index)
+        semantic_size = int(os.getenv('SEMANTIC_CACHE_SIZE', '256'))
+        if semantic_size > 0 and new_retriever.chunk_embeddings is not None:
+            semantic_cache = SemanticAnswerCache(
+                new_retriever,
+                maxsize=semantic_size,
+                threshold=float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.92')),
+                guard=os.getenv('SEMANTIC_CACHE_GUARD', 'true').lower() in ('1', 'true', 'yes')
+            )
+        retriever = new_retriever
+        startup.mark('retriever', 'ready')
         logger.info("CV retriever initialized")
         
-        # Create agents
-        agents = create_agents(retriever)
+        # Phase 3: agents (importing CrewAI is the slowest single step)
+        component = 'agents'
+        with startup.step('import CrewAI agents'):
+            from crew.agents import create_agents
+        with startup.step('create agents'):
+            agents = create_agents(retriever)
+        startup.mark('agents', 'ready')
         logger.info("CV agents created")
         
+        # Reusable crews, so a question only binds its inputs instead of building a Crew
+        pool_size = int(os.getenv('CREW_POOL_SIZE', '4'))
+        if pool_size > 0 and hasattr(agents['researcher'], 'tools'):
+            from crew.pool import CrewPool
+            timeout = float(os.getenv('CREW_POOL_TIMEOUT', '0')) or None
+            with startup.step('build crew pool'):
+                crew_pool = CrewPool(agents, size=pool_size, timeout=timeout)
+        
+        # Confident, single-section questions skip the crew
+        if os.getenv('ROUTER_ENABLED', 'true').lower() in ('1', 'true', 'yes'):
+            router = AnswerRouter(
+                min_coverage=float(os.getenv('ROUTE_MIN_COVERAGE', '0.5')),
+                min_dense=float(os.getenv('ROUTE_MIN_DENSE', '0.45')),
+                min_section_share=float(os.getenv('ROUTE_MIN_SECTION_SHARE', '0.6')),
+                extract_max_chars=int(os.getenv('ROUTE_EXTRACT_MAX_CHARS', '800'))
+            )
+        
+        # Phase 4: hot re-indexing, then optionally answering the suggested questions ahead of users
+        component = 'watcher'
+        startup.mark('watcher', 'ready' if start_cv_watcher(corpus) else 'disabled')
+        start_prewarm()
+        
         return True
         
     except Exception as e:
         logger.error(f"Failed to initialize CV system: {e}")
         import traceback
         logger.error(f"Full traceback: {traceback.format_exc()}")
+        startup.mark(component, 'failed', str(e))
         return False
+    
+    finally:
+        startup.finish()
+        logger.info(startup.format_report())
+
+def start_prewarm():
+    """Warm the answer cache with SECTION_QUESTIONS in the background (PREWARM_ANSWERS=1)."""
+    global prewarmer
+    if os.getenv('PREWARM_ANSWERS', '0').lower() not in ('1', 'true', 'yes'):
+        return None
+    
+    questions = [(q, sec) for sec, section_questions in SECTION_QUESTIONS.items() for q in section_questions]
+    prewarmer = AnswerPrewarmer(
+        retriever,
+        answer_cache,
+        prewarm_answer,
+        questions,
+        max_workers=int(os.getenv('PREWARM_CONCURRENCY', '2'))
+    ).start()
+    logger.info(f"Prewarming {len(questions)} suggested answers in the background")
+    return prewarmer
+
+def prewarm_answer(question, section):
+    """Answer a suggested question for the prewarmer, sharing the run with users asking it meanwhile."""
+    return answer_and_cache(question, section, retriever.content_hash)
+
+def answer_and_cache(question, section, version):
+    """
+    Answer a question after an answer cache miss and store the answer in both caches.
+
+    Concurrent calls for the same question, section and CV version wait on
+    one run (raising TimeoutError after COALESCE_TIMEOUT seconds) instead of
+    each starting their own. An answer is not stored if the CV was reloaded
+    while it was being produced.
+    """
+    def run():
+        cached = semantic_cache.get(question, section, version) if semantic_cache else None
+        if cached is not None:
+            if answer_cache:
+                answer_cache.set(question, section, version, cached)
+            return cached
+        
+        logger.info(f"Processing question: {question} (section: {section})")
+        response = answer_question(retriever, agents, question, section, crew_pool, router, chat_client)
+        if retriever.content_hash != version:
+            return response
+        if answer_cache:
+            answer_cache.set(question, section, version, response)
+        if semantic_cache:
+            semantic_cache.set(question, section, version, response)
+        return response
+    
+    if single_flight is None:
+        return run()
+    return single_flight.do(AnswerCache.key(question, section, version), run)
+
+def start_background_initialization(exit_on_failure: bool = False) -> threading.Thread:
+    """Run initialize_cv_system on a daemon thread so the server can start serving at once."""
+    def run():
+        if initialize_cv_system():
+            logger.info("CV system initialized successfully")
+        elif exit_on_failure:
+            logger.error("Failed to initialize CV system. Exiting.")
+            os._exit(1)
+    
+    thread = threading.Thread(target=run, name='cv-init', daemon=True)
+    thread.start()
+    return thread
+
+def _unavailable():
+    """Error response for endpoints that need the retriever and agents, or None when ready."""
+    if retriever is not None and agents is not None:
+        return None
+    if startup.failed:
+        return jsonify({"error": "CV system not initialized", "components": startup.report()['components']}), 500
+    return jsonify({"error": "CV system is starting", "components": startup.report()['components']}), 503
 
 # Suggested questions for each section
 SECTION_QUESTIONS = {
@@ -179,9 +422,116 @@ def health_check():
             status:
               type: string
               example: healthy
+            components:
+              type: object
+              description: >
+                Readiness of each component (cv, retriever, agents, watcher):
+                loading, ready, disabled or failed
+            startup:
+              type: object
+              description: Startup duration and per-step timings
+            embedding_cache:
+              type: object
+              description: Query embedding cache size and hit/miss counters
+            answer_cache:
+              type: object
+              description: Answer cache hit ratio and memory/disk tier counters
+            semantic_cache:
+              type: object
+              description: >
+                Near-duplicate question cache size, threshold, hits, misses,
+                false hits (near-duplicates rejected by the retrieval check) and evictions
+            prewarm:
+              type: object
+              description: Progress of suggested-answer prewarming (state, total, warm, warm_ratio)
+            coalescing:
+              type: object
+              description: >
+                Identical concurrent questions: answer runs, requests that waited on
+                a run (coalesced), waits that timed out, failed runs and runs in flight
+            http_pool:
+              type: object
+              description: >
+                Shared Azure OpenAI connection pools: requests, new connections,
+                TLS handshakes and connection reuse ratio (sync and async)
+            crew_pool:
+              type: object
+              description: Reusable crew pool size, idle crews, kickoffs and waits for a free crew
+            router:
+              type: object
+              description: >
+                Answers and mean latency per route (extract, direct, crew, and
+                not_found for crew runs that found nothing)
+      503:
+        description: Startup failed
+    """
+    response, code = health_status()
+    return jsonify(response), code
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
     """
-    status = "healthy" if retriever is not None else "initializing"
-    return jsonify({"status": status})
+    Prometheus metrics
+    ---
+    tags:
+      - System
+    produces:
+      - text/plain
+    responses:
+      200:
+        description: >
+          Stage latency histograms (cv_stage_seconds), fallback counters
+          (cv_fallbacks_total), request latency (cv_http_request_seconds) and
+          answer latency per router decision (cv_route_seconds)
+          in the Prometheus text exposition format
+    """
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+@app.before_request
+def _start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def _record_request_latency(response):
+    start = g.get('request_start')
+    if start is not None:
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint, request.method, str(response.status_code))
+    return response
+
+def health_status():
+    """The /api/health body and status code, shared with the ASGI app."""
+    report = startup.report()
+    if retriever is not None and agents is not None:
+        status = "healthy"
+    elif startup.failed:
+        status = "failed"
+    else:
+        status = "initializing"
+    
+    response = {
+        "status": status,
+        "components": report['components'],
+        "startup": {"complete": report['complete'], "total_ms": report['total_ms'], "steps": report['steps']}
+    }
+    if retriever is not None:
+        response["embedding_cache"] = retriever.query_embeddings.stats()
+    if answer_cache is not None:
+        response["answer_cache"] = answer_cache.stats()
+    if semantic_cache is not None:
+        response["semantic_cache"] = semantic_cache.stats()
+    if prewarmer is not None:
+        response["prewarm"] = prewarmer.stats()
+    if single_flight is not None:
+        response["coalescing"] = single_flight.stats()
+    http_pool = pool_stats()
+    if http_pool is not None:
+        response["http_pool"] = http_pool
+    if crew_pool is not None:
+        response["crew_pool"] = crew_pool.stats()
+    if router is not None:
+        response["router"] = router.stats()
+    return response, 503 if status == "failed" else 200
 
 @app.route('/api/sections', methods=['GET'])
 def get_sections():
@@ -207,6 +557,8 @@ def get_sections():
               icon:
                 type: string
                 example: briefcase
+      304:
+        description: Not modified (If-None-Match matches the current ETag)
       500:
         description: Server error
         schema:
@@ -216,11 +568,10 @@ def get_sections():
               type: string
     """
     try:
-        if not cv_loader:
+        if not sections_response:
             return jsonify({"error": "CV system not initialized"}), 500
         
-        sections = cv_loader.get_structured_sections()
-        return jsonify(sections)
+        return _send_precomputed(sections_response)
         
     except Exception as e:
         logger.error(f"Error getting sections: {e}")
@@ -254,6 +605,8 @@ def get_questions():
               section:
                 type: string
                 example: Experience
+      304:
+        description: Not modified (If-None-Match matches the current ETag)
       500:
         description: Server error
         schema:
@@ -263,18 +616,11 @@ def get_questions():
               type: string
     """
     try:
-        section = request.args.get('section')
+        if not questions_responses:
+            build_static_responses()
+        
+        return _send_precomputed(questions_response_for(request.args.get('section')))
         
-        if section:
-            questions = SECTION_QUESTIONS.get(section, [])
-            return jsonify([{"question": q, "section": section} for q in questions])
-        else:
-            # Return all questions
-            all_questions = []
-            for sec, questions in SECTION_QUESTIONS.items():
-                all_questions.extend([{"question": q, "section": sec} for q in questions])
-            return jsonify(all_questions)
-            
     except Exception as e:
         logger.error(f"Error getting questions: {e}")
         return jsonify({"error": str(e)}), 500
@@ -323,6 +669,12 @@ def ask_question():
               items:
                 type: string
                 example: Skills
+            usage:
+              type: object
+              description: >
+                Token counts of the grounded chat prompt (prompt_tokens, and the
+                packed context's context_tokens, chunks and dropped); null when
+                the answer was not a single chat completion
       400:
         description: Invalid request
         schema:
@@ -339,10 +691,15 @@ def ask_question():
               type: string
             message:
               type: string
+      504:
+        description: >
+          Timed out waiting for an identical question already being answered
+          (concurrent identical questions share one answer run)
     """
     try:
-        if not retriever or not agents:
-            return jsonify({"error": "CV system not initialized"}), 500
+        unavailable = _unavailable()
+        if unavailable:
+            return unavailable
         
         data = request.get_json()
         if not data or 'question' not in data:
@@ -354,66 +711,180 @@ def ask_question():
         if not question:
             return jsonify({"error": "Question cannot be empty"}), 400
         
-        logger.info(f"Processing question: {question} (section: {section})")
+        # Read the version before answering so an answer is never stored under a newer CV
+        version = retriever.content_hash
+        cached = answer_cache.get(question, section, version) if answer_cache else None
+        if cached is not None:
+            logger.info(f"Answer cache hit: {question} (section: {section})")
+            return jsonify(cached)
         
-        # Try to use CrewAI if available
-        if CREWAI_AVAILABLE and hasattr(agents['researcher'], 'tools'):
-            try:
-                # Create tasks
-                tasks = create_tasks(agents, question, section)
-                
-                # Create crew
-                crew = Crew(
-                    agents=[agents['researcher'], agents['analyst']],
-                    tasks=[tasks['research'], tasks['analysis']],
-                    verbose=True
-                )
-                
-                # Execute crew
-                result = crew.kickoff()
-                answer = str(result)
-                
-            except Exception as e:
-                logger.error(f"CrewAI execution failed: {e}")
-                # Fallback to simple agent processing
-                researcher = agents['researcher']
-                answer = researcher.process_query(question, section)
-        else:
-            # Use simple agent processing
-            researcher = agents['researcher']
-            answer = researcher.process_query(question, section)
+        response = answer_and_cache(question, section, version)
         
-        if not answer or "couldn't find specific information" in answer:
-            answer = f"I couldn't find specific information about '{question}' in the CV. Please try a different question or check the available sections."
-        else:
-            answer = f"Based on the CV information:\n\n{answer}"
+        logger.info(f"Response generated with {len(response['citations'])} citations")
+        return jsonify(response)
         
-        # Generate citations
-        citations = []
-        relevant_chunks = retriever.search(question, section, top_k=3)
-        seen_sections = set()
+    except TimeoutError as e:
+        logger.error(f"Error processing question: {e}")
+        return jsonify({
+            "error": "Timed out waiting for the answer",
+            "message": str(e)
+        }), 504
+    except Exception as e:
+        logger.error(f"Error processing question: {e}")
+        return jsonify({
+            "error": "Failed to process question",
+            "message": str(e)
+        }), 500
+
+@app.route('/api/ask/batch', methods=['POST'])
+def ask_batch():
+    """
+    Answer a list of questions in one request
+    ---
+    tags:
+      - Chat
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          required:
+            - questions
+          properties:
+            questions:
+              type: array
+              description: Questions as strings or {question, section} objects
+              items:
+                type: object
+                properties:
+                  question:
+                    type: string
+                    example: What certifications do you have?
+                  section:
+                    type: string
+                    example: Certificates
+            section:
+              type: string
+              description: Default section for questions that do not set one
+    responses:
+      200:
+        description: >
+          One result per question, in order. Each has the /api/ask fields
+          (answer, citations, sources, usage) or, if that question failed, error and message.
+        schema:
+          type: object
+          properties:
+            results:
+              type: array
+              items:
+                type: object
+      400:
+        description: Invalid request
+      500:
+        description: Server error
+    """
+    try:
+        unavailable = _unavailable()
+        if unavailable:
+            return unavailable
         
-        for chunk in relevant_chunks:
-            if chunk['section'] not in seen_sections:
-                citations.append({"section": chunk['section']})
-                seen_sections.add(chunk['section'])
+        data = request.get_json(silent=True)
+        questions = data.get('questions') if isinstance(data, dict) else None
+        if not isinstance(questions, list) or not questions:
+            return jsonify({"error": "A non-empty list of questions is required"}), 400
         
-        response = {
-            "answer": answer,
-            "citations": citations,
-            "sources": [cite["section"] for cite in citations]
-        }
+        max_questions = int(os.getenv('BATCH_MAX_QUESTIONS', '50'))
+        if len(questions) > max_questions:
+            return jsonify({"error": f"At most {max_questions} questions per batch"}), 400
         
-        logger.info(f"Response generated with {len(citations)} citations")
-        return jsonify(response)
+        items = batch_items(questions, data.get('section'))
+        logger.info(f"Processing batch of {len(items)} questions")
+        results = answer_batch(
+            retriever, agents, items, chat_client,
+            max_workers=int(os.getenv('BATCH_MAX_WORKERS', '8')),
+            answer_cache=answer_cache
+        )
+        failed = sum(1 for result in results if 'error' in result)
+        logger.info(f"Batch answered: {len(results) - failed} ok, {failed} failed")
+        return jsonify({"results": results})
         
     except Exception as e:
-        logger.error(f"Error processing question: {e}")
+        logger.error(f"Error processing batch: {e}")
         return jsonify({
-            "error": "Failed to process question",
+            "error": "Failed to process batch",
             "message": str(e)
         }), 500
 
+@app.route('/api/ask/stream', methods=['GET', 'POST'])
+def ask_question_stream():
+    """
+    Stream an answer as server-sent events
+    ---
+    tags:
+      - Chat
+    produces:
+      - text/event-stream
+    parameters:
+      - name: body
+        in: body
+        required: false
+        description: JSON body for POST requests
+        schema:
+          type: object
+          properties:
+            question:
+              type: string
+              example: What are your main technical skills?
+            section:
+              type: string
+              example: Skills
+      - name: question
+        in: query
+        type: string
+        required: false
+        description: Question for GET requests (EventSource)
+      - name: section
+        in: query
+        type: string
+        required: false
+    responses:
+      200:
+        description: >
+          Event stream: one `citations` event as soon as retrieval finishes,
+          `token` events with answer text deltas, then a `done` event with the
+          full answer, citations, prompt token usage and timings (or an `error` event)
+      400:
+        description: Invalid request
+      500:
+        description: CV system not initialized
+    """
+    unavailable = _unavailable()
+    if unavailable:
+        return unavailable
+    
+    data = (request.get_json(silent=True) or {}) if request.method == 'POST' else request.args
+    question = (data.get('question') or '').strip()
+    section = data.get('section') or None
+    
+    if not question:
+        return jsonify({"error": "Question is required"}), 400
+    
+    logger.info(f"Streaming question: {question} (section: {section})")
+    
+    def generate():
+        for event, payload in stream_answer(retriever, agents, question, section, chat_client):
+            yield format_sse(event, payload)
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({"error": "Endpoint not found"}), 404
@@ -423,14 +894,9 @@ def internal_error(error):
     return jsonify({"error": "Internal server error"}), 500
 
 if __name__ == '__main__':
-    # Initialize the CV system
+    # Initialize the CV system in the background; /api/health reports progress meanwhile
     logger.info("Starting CV Chatbot backend...")
-    
-    if not initialize_cv_system():
-        logger.error("Failed to initialize CV system. Exiting.")
-        sys.exit(1)
-    
-    logger.info("CV system initialized successfully")
+    start_background_initialization(exit_on_failure=True)
     
     # Start the Flask app on port 8000 to avoid conflicts
     port = int(os.environ.get('PORT', 8000))
@@ -0,0 +1,270 @@
+"""
+Async serving mode: the same /api endpoints as app.py on an ASGI event loop.
+
+/api/ask answers through the same router, crew pool and caches as the Flask
+app, so both modes give the same answer to the same request. Query
+embeddings and direct chat completions are awaited instead of holding a worker
+thread each; the synchronous crew and the answer cache's SQLite disk tier run
+on worker threads. LLM_MAX_CONCURRENCY bounds how much LLM work is in flight
+at once (further requests wait for a slot). Run from backend/ with:
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8000
+"""
+import asyncio
+import contextlib
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+import app as cv_app
+from cache import AnswerCache
+import metrics
+from pipeline import answer_batch, answer_question_async, batch_items, format_sse, stream_answer_async
+
+logger = logging.getLogger(__name__)
+
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '16'))
+llm_slots = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+
+def _unavailable() -> Optional[JSONResponse]:
+    """Error response while the retriever or agents are not ready, else None."""
+    if cv_app.retriever is not None and cv_app.agents is not None:
+        return None
+    components = cv_app.startup.report()['components']
+    if cv_app.startup.failed:
+        return JSONResponse({"error": "CV system not initialized", "components": components}, status_code=500)
+    return JSONResponse({"error": "CV system is starting", "components": components}, status_code=503)
+
+async def health_check(request: Request):
+    # The answer cache stats count rows in its SQLite disk tier
+    response, code = await asyncio.to_thread(cv_app.health_status)
+    return JSONResponse(response, status_code=code)
+
+async def get_metrics(request: Request):
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+def _send_precomputed(request: Request, payload):
+    status, body, headers = payload.select(request.headers.get('if-none-match'), request.headers.get('accept-encoding'))
+    return Response(body, status_code=status, headers=headers, media_type='application/json')
+
+async def get_sections(request: Request):
+    if not cv_app.sections_response:
+        return JSONResponse({"error": "CV system not initialized"}, status_code=500)
+    return _send_precomputed(request, cv_app.sections_response)
+
+async def get_questions(request: Request):
+    if not cv_app.questions_responses:
+        cv_app.build_static_responses()
+    return _send_precomputed(request, cv_app.questions_response_for(request.query_params.get('section')))
+
+async def _read_question(request: Request):
+    """(question, section, error response) from a JSON body or, for GET, query parameters."""
+    if request.method == 'GET':
+        data = request.query_params
+    else:
+        try:
+            data = await request.json()
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            data = None
+    if not data or not isinstance(data.get('question'), str):
+        return None, None, JSONResponse({"error": "Question is required"}, status_code=400)
+
+    question = data['question'].strip()
+    if not question:
+        return None, None, JSONResponse({"error": "Question cannot be empty"}, status_code=400)
+    return question, data.get('section') or None, None
+
+async def answer_and_cache(question: str, section: Optional[str], version: str) -> Dict:
+    """Async counterpart of app.answer_and_cache: identical concurrent questions share one run."""
+    cache = cv_app.answer_cache
+    semantic = cv_app.semantic_cache
+
+    async def run() -> Dict:
+        cached = await semantic.aget(question, section, version) if semantic else None
+        if cached is not None:
+            if cache:
+                await asyncio.to_thread(cache.set, question, section, version, cached)
+            return cached
+
+        logger.info(f"Processing question: {question} (section: {section})")
+        response = await answer_question_async(
+            cv_app.retriever, cv_app.agents, question, section, cv_app.chat_client, llm_slots,
+            cv_app.router, cv_app.crew_pool
+        )
+        # Not stored if the CV was reloaded while answering
+        if cv_app.retriever.content_hash != version:
+            return response
+        if cache:
+            await asyncio.to_thread(cache.set, question, section, version, response)
+        if semantic:
+            await semantic.aset(question, section, version, response)
+        return response
+
+    if cv_app.single_flight is None:
+        return await run()
+    return await cv_app.single_flight.ado(AnswerCache.key(question, section, version), run)
+
+async def ask_question(request: Request):
+    unavailable = _unavailable()
+    if unavailable:
+        return unavailable
+
+    question, section, error = await _read_question(request)
+    if error is not None:
+        return error
+
+    cache = cv_app.answer_cache
+    version = cv_app.retriever.content_hash
+    # A miss in the memory tier reads the SQLite disk tier
+    cached = await asyncio.to_thread(cache.get, question, section, version) if cache else None
+    if cached is not None:
+        return JSONResponse(cached)
+
+    try:
+        response = await answer_and_cache(question, section, version)
+    except TimeoutError as e:
+        logger.error(f"Error processing question: {e}")
+        return JSONResponse({"error": "Timed out waiting for the answer", "message": str(e)}, status_code=504)
+    except Exception as e:
+        logger.error(f"Error processing question: {e}")
+        return JSONResponse({"error": "Failed to process question", "message": str(e)}, status_code=500)
+
+    logger.info(f"Response generated with {len(response['citations'])} citations")
+    return JSONResponse(response)
+
+async def ask_batch(request: Request):
+    unavailable = _unavailable()
+    if unavailable:
+        return unavailable
+
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    questions = data.get('questions') if isinstance(data, dict) else None
+    if not isinstance(questions, list) or not questions:
+        return JSONResponse({"error": "A non-empty list of questions is required"}, status_code=400)
+
+    max_questions = int(os.getenv('BATCH_MAX_QUESTIONS', '50'))
+    if len(questions) > max_questions:
+        return JSONResponse({"error": f"At most {max_questions} questions per batch"}, status_code=400)
+
+    # The batch pipeline bounds its own LLM fan-out; run it off the event loop
+    try:
+        results = await asyncio.to_thread(
+            answer_batch, cv_app.retriever, cv_app.agents, batch_items(questions, data.get('section')),
+            cv_app.chat_client, int(os.getenv('BATCH_MAX_WORKERS', '8')), cv_app.answer_cache
+        )
+    except Exception as e:
+        logger.error(f"Error processing batch: {e}")
+        return JSONResponse({"error": "Failed to process batch", "message": str(e)}, status_code=500)
+    return JSONResponse({"results": results})
+
+async def ask_question_stream(request: Request):
+    unavailable = _unavailable()
+    if unavailable:
+        return unavailable
+
+    question, section, error = await _read_question(request)
+    if error is not None:
+        return error
+
+    logger.info(f"Streaming question: {question} (section: {section})")
+
+    async def generate():
+        async for event, payload in stream_answer_async(
+            cv_app.retriever, cv_app.agents, question, section, cv_app.chat_client, llm_slots
+        ):
+            yield format_sse(event, payload)
+
+    return StreamingResponse(
+        generate(),
+        media_type='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def not_found(request: Request, exc):
+    return JSONResponse({"error": "Endpoint not found"}, status_code=404)
+
+async def internal_error(request: Request, exc):
+    return JSONResponse({"error": "Internal server error"}, status_code=500)
+
+class RequestTimingMiddleware:
+    """Record each HTTP request's time to response start in cv_http_request_seconds."""
+
+    def __init__(self, app, paths):
+        self.app = app
+        self.paths = set(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        endpoint = scope['path'] if scope['path'] in self.paths else 'unmatched'
+
+        async def timed_send(message):
+            if message['type'] == 'http.response.start':
+                metrics.REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint, scope['method'],
+                                                str(message['status']))
+            await send(message)
+
+        await self.app(scope, receive, timed_send)
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    logger.info("Starting CV Chatbot backend (async)...")
+    # Crew runs hold a worker thread each, so every LLM slot needs one, plus a few for cache and health calls
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY + 8, thread_name_prefix='asgi-worker'))
+    # Serve /api/health and /api/sections right away; the index and agents load on a thread
+    cv_app.start_background_initialization(exit_on_failure=True)
+    yield
+    if cv_app.cv_watcher is not None:
+        cv_app.cv_watcher.stop()
+
+routes = [
+    Route('/api/health', health_check, methods=['GET']),
+    Route('/api/metrics', get_metrics, methods=['GET']),
+    Route('/api/sections', get_sections, methods=['GET']),
+    Route('/api/questions', get_questions, methods=['GET']),
+    Route('/api/ask', ask_question, methods=['POST']),
+    Route('/api/ask/batch', ask_batch, methods=['POST']),
+    Route('/api/ask/stream', ask_question_stream, methods=['GET', 'POST']),
+]
+
+app = Starlette(
+    routes=routes,
+    middleware=[
+        Middleware(RequestTimingMiddleware, paths=[route.path for route in routes]),
+        Middleware(
+            CORSMiddleware,
+            allow_origins=["http://localhost:5173", "http://localhost:5000"],
+            allow_origin_regex=r"https://.*\.(replit\.dev|repl\.co)",
+            allow_methods=["*"],
+            allow_headers=["*"]
+        )
+    ],
+    exception_handlers={404: not_found, 500: internal_error},
+    lifespan=lifespan
+)
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host='0.0.0.0', port=int(os.environ.get('PORT', 8000)))
@@ -0,0 +1,76 @@
+"""
+Recall@k and latency of the IVF index against exact brute-force search.
+
+Uses clustered synthetic vectors (real embeddings are clustered, uniform random
+vectors are not) so the numbers resemble a CV corpus.
+
+Usage (from backend/):
+    python bench/ann_recall.py --rows 200000 --dim 256 --k 10 --nprobe 1 4 8 16 32
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+import numpy as np
+from ann import IVFIndex
+from embedding_index import normalize_rows
+
+def clustered_vectors(rows: int, dim: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    members = rng.integers(0, clusters, size=rows)
+    noise = rng.normal(scale=0.6, size=(rows, dim)).astype(np.float32)
+    return normalize_rows(centers[members] + noise)
+
+def exact_top_k(matrix: np.ndarray, query: np.ndarray, k: int, allowed=None) -> np.ndarray:
+    scores = matrix @ query
+    if allowed is not None:
+        scores = np.where(allowed, scores, -np.inf)
+    best = np.argpartition(scores, -k)[-k:]
+    return best[np.argsort(scores[best])[::-1]]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--dim', type=int, default=256)
+    parser.add_argument('--clusters', type=int, default=500)
+    parser.add_argument('--lists', type=int, default=0, help='IVF lists (default 4*sqrt(rows))')
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument('--filter-fraction', type=float, default=0.1,
+                        help='fraction of rows allowed in the filtered (e.g. one section) run')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    matrix = clustered_vectors(args.rows, args.dim, args.clusters, rng)
+    queries = normalize_rows(matrix[rng.choice(args.rows, args.queries, replace=False)]
+                             + rng.normal(scale=0.3, size=(args.queries, args.dim)).astype(np.float32))
+    allowed = rng.random(args.rows) < args.filter_fraction
+
+    start = time.perf_counter()
+    ivf = IVFIndex.build(matrix, n_lists=args.lists or None)
+    report = {'rows': args.rows, 'dim': args.dim, 'k': args.k, 'build_seconds': time.perf_counter() - start,
+              'index': ivf.stats(), 'runs': []}
+
+    for mask_name, mask in (('unfiltered', None), ('filtered', allowed)):
+        start = time.perf_counter()
+        truth = [set(exact_top_k(matrix, query, args.k, mask)) for query in queries]
+        exact_ms = (time.perf_counter() - start) * 1000 / args.queries
+
+        for nprobe in args.nprobe:
+            start = time.perf_counter()
+            found = [ivf.search(matrix, query, args.k, nprobe, mask)[0] for query in queries]
+            ann_ms = (time.perf_counter() - start) * 1000 / args.queries
+            recall = np.mean([len(truth[i] & set(found[i].tolist())) / args.k for i in range(args.queries)])
+            report['runs'].append({'filter': mask_name, 'nprobe': nprobe, f'recall@{args.k}': float(recall),
+                                   'ann_ms': ann_ms, 'exact_ms': exact_ms, 'speedup': exact_ms / ann_ms})
+
+    print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
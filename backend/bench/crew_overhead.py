@@ -0,0 +1,117 @@
+"""
+Measure the per-question cost of building CrewAI tasks and a Crew versus the reusable crew pool.
+
+Times, for each question: create_tasks + Crew(...) as run_agents did before
+the pool (verbose on and off), and CrewPool's per-question work (taking a free
+crew and interpolating the question into its tasks and agents). With --kickoff
+it also runs full crew.kickoff() calls both ways against bench/stub_azure.py.
+It always checks the saturated-pool path: with every crew busy, run_agents
+must fall back to the simple agent after CREW_POOL_TIMEOUT instead of failing.
+Requires crewai.
+
+Usage (from backend/):
+    python bench/crew_overhead.py --questions 200 --kickoff 20
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+import numpy as np
+from stub_azure import StubAzureServer
+
+QUESTIONS = [("Tell me about your Azure DevOps experience", None), ("What Python skills do you have?", "Skills"),
+             ("Which certificates do you hold?", "Certificates"), ("What languages do you speak?", "Languages")]
+
+def summarize(samples: list) -> dict:
+    values = np.array(samples) * 1000
+    return {'runs': len(samples), 'mean_ms': float(values.mean()), 'p50_ms': float(np.percentile(values, 50)),
+            'p99_ms': float(np.percentile(values, 99))}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--questions', type=int, default=200, help='timed constructions per variant')
+    parser.add_argument('--kickoff', type=int, default=0, help='also time this many full kickoffs per variant')
+    parser.add_argument('--pool-size', type=int, default=4)
+    parser.add_argument('--pool-timeout', type=float, default=0.2, help='CREW_POOL_TIMEOUT for the saturated-pool check')
+    args = parser.parse_args()
+
+    try:
+        from crewai import Crew
+    except ImportError:
+        sys.exit("crewai is not installed")
+
+    with contextlib.redirect_stdout(sys.stderr), StubAzureServer() as stub:
+        os.environ.update({'AZURE_OPENAI_API_KEY': 'stub', 'AZURE_OPENAI_ENDPOINT': stub.endpoint})
+        os.environ.pop('CV_INDEX_DIR', None)
+        from crew.agents import create_agents
+        from crew.pool import CrewPool
+        from crew.tasks import create_tasks, task_inputs
+        from pipeline import run_agents
+        from loader import CVLoader
+        from retriever import CVRetriever
+
+        loader = CVLoader(str(backend_dir / 'data' / 'cv.md'))
+        retriever = CVRetriever(loader.get_chunks_for_embedding(), content_hash=loader.content_hash())
+        agents = create_agents(retriever)
+        if not hasattr(agents['researcher'], 'tools'):
+            sys.exit("CrewAI agents could not be created")
+
+        def build(idx: int, verbose: bool):
+            question, section = QUESTIONS[idx % len(QUESTIONS)]
+            tasks = create_tasks(agents, question, section)
+            return Crew(agents=[agents['researcher'], agents['analyst']],
+                        tasks=[tasks['research'], tasks['analysis']], verbose=verbose)
+
+        report = {'questions': args.questions, 'pool_size': args.pool_size}
+        for verbose in (True, False):
+            samples = []
+            for idx in range(args.questions):
+                start = time.perf_counter()
+                build(idx, verbose)
+                samples.append(time.perf_counter() - start)
+            report[f'per_question_build_verbose_{str(verbose).lower()}'] = summarize(samples)
+
+        pool = CrewPool(agents, size=args.pool_size)
+        report['pool_build_seconds'] = pool.build_seconds
+        samples = []
+        for idx in range(args.questions):
+            question, section = QUESTIONS[idx % len(QUESTIONS)]
+            start = time.perf_counter()
+            crew = pool._idle.get_nowait()
+            # What kickoff(inputs=...) does before running the tasks
+            crew._interpolate_inputs(task_inputs(question, section))
+            pool._idle.put(crew)
+            samples.append(time.perf_counter() - start)
+        report['pooled_bind'] = summarize(samples)
+
+        # Every crew busy: the question waits pool_timeout, then the simple agent answers
+        saturated = CrewPool(agents, size=1, timeout=args.pool_timeout)
+        busy = saturated._idle.get_nowait()
+        start = time.perf_counter()
+        answer = run_agents(agents, *QUESTIONS[0], crew_pool=saturated)
+        report['saturated_pool'] = {'timeout_s': args.pool_timeout, 'answered_s': time.perf_counter() - start,
+                                    'simple_agent_answer': answer == agents['simple'].process_query(*QUESTIONS[0])}
+        saturated._idle.put(busy)
+
+        if args.kickoff:
+            for name, run in (('kickoff_per_question_build', lambda idx: build(idx, False).kickoff()),
+                              ('kickoff_pooled', lambda idx: pool.kickoff(*QUESTIONS[idx % len(QUESTIONS)]))):
+                samples = []
+                for idx in range(args.kickoff):
+                    start = time.perf_counter()
+                    run(idx)
+                    samples.append(time.perf_counter() - start)
+                report[name] = summarize(samples)
+            report['stub'] = dict(stub.stats)
+
+    print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Measure bulk chunk embedding throughput against the local Azure stub.
+
+Usage (from backend/):
+    python bench/embed_throughput.py --chunks 5000 --latency 0.05 --rate-limit 0.05
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+import openai
+from embedder import BatchEmbedder
+from stub_azure import StubAzureServer
+
+def synthetic_chunks(count: int):
+    words = ['azure', 'devops', 'python', 'pipelines', 'data', 'agents', 'cloud', 'react', 'leadership', 'unrwa']
+    return [' '.join(words[(idx + offset) % len(words)] for offset in range(60)) + f' #{idx}' for idx in range(count)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--chunks', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--batch-tokens', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0.02, help='stub seconds per request')
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='fraction of stub requests answered with 429')
+    parser.add_argument('--serial', action='store_true', help='also time one request per chunk for comparison')
+    args = parser.parse_args()
+
+    texts = synthetic_chunks(args.chunks)
+    report = {'chunks': args.chunks, 'workers': args.workers, 'latency': args.latency, 'rate_limit': args.rate_limit}
+
+    with StubAzureServer(latency=args.latency, rate_limit_rate=args.rate_limit) as stub:
+        client = openai.AzureOpenAI(api_key='stub', azure_endpoint=stub.endpoint, api_version='2024-08-01-preview')
+
+        embedder = BatchEmbedder(client, 'stub-embed', max_batch_tokens=args.batch_tokens, max_workers=args.workers)
+        vectors = embedder.embed(texts)
+        assert vectors.shape[0] == len(texts)
+        report['batched'] = embedder.throughput()
+        report['stub'] = dict(stub.stats)
+
+        if args.serial:
+            stub.rate_limit_rate = 0.0
+            start = time.perf_counter()
+            for text in texts:
+                client.embeddings.create(model='stub-embed', input=text)
+            elapsed = time.perf_counter() - start
+            report['serial'] = {'seconds': elapsed, 'texts_per_second': len(texts) / elapsed}
+
+    print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
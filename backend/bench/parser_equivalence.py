@@ -0,0 +1,106 @@
+"""
+Check CVLoader.parse_sections against the previous markdown -> HTML -> BeautifulSoup
+parser and compare their throughput.
+
+The reference keeps the old element walk but visits each list item once (the old
+parser emitted a <ul>'s text and then every <li> again) and ignores the old
+level bookkeeping, which recorded the level of the *next* heading.
+
+Usage (from backend/):
+    python bench/parser_equivalence.py [--corpus DIR_OR_GLOB] [--repeat 200]
+
+Exits non-zero if any document parses differently.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+import markdown
+from bs4 import BeautifulSoup
+from loader import CVLoader
+
+EDGE_CASES = [
+    "# Name\n\n## Summary\n\nText with **bold**, *em*, _under_ and snake_case_words.\nSecond line  \nThird line\n",
+    "## Skills\n\n- Python\n- `Rust`\n    - nested item\n- [Link](http://example.com) and ![logo](logo.png)\n\n### Tools\n\n1. Docker\n2. Kubernetes\n",
+    "## Experience\n\n- **Lead** at **ACME** — 2020\n  Did things.\n\n- **Dev** at **Init** — 2018\n\n    Indented paragraph.\n\nClosing paragraph &amp; more.\n",
+    "Title\n=====\n\nIntro\n\nSub\n---\n\n> quoted\n> text\n\n    code block\n\n***\n\n#### Ignored heading\n\nAfter rule\n",
+    "## Empty\n\n## Contact\n\n<b>raw</b> html, \\*escaped\\* and <https://example.com>\n",
+]
+
+def reference_sections(content: str) -> dict:
+    """The old BeautifulSoup walk, visiting each list item's text once."""
+    soup = BeautifulSoup(markdown.markdown(content), 'html.parser')
+    sections = {}
+    current_section = None
+    current_content = []
+
+    for element in soup.find_all(['h1', 'h2', 'h3', 'p', 'li']):
+        if element.find_parent('li') is not None:
+            continue
+        if element.name in ['h1', 'h2']:
+            if current_section and current_content:
+                sections[current_section] = '\n'.join(current_content)
+            current_section = element.get_text().strip()
+            current_content = []
+        elif current_section:
+            text = element.get_text().strip()
+            if text:
+                current_content.append(text)
+
+    if current_section and current_content:
+        sections[current_section] = '\n'.join(current_content)
+    return sections
+
+def parse(content: str) -> dict:
+    loader = CVLoader('<memory>')
+    loader.content = content
+    return {title: data['content'] for title, data in loader.parse_sections().items()}
+
+def load_documents(corpus: str):
+    documents = [('edge-case-%d' % idx, text) for idx, text in enumerate(EDGE_CASES)]
+    documents.append(('cv.md', (backend_dir / 'data' / 'cv.md').read_text(encoding='utf-8')))
+    if corpus:
+        pattern = os.path.join(corpus, '**', '*.md') if os.path.isdir(corpus) else corpus
+        for path in sorted(glob.glob(pattern, recursive=True)):
+            with open(path, 'r', encoding='utf-8') as file:
+                documents.append((path, file.read()))
+    return documents
+
+def throughput(func, documents, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for _, content in documents:
+            func(content)
+    return repeat * len(documents) / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', help='directory or glob of extra markdown CVs to compare')
+    parser.add_argument('--repeat', type=int, default=200, help='passes over the documents when timing')
+    args = parser.parse_args()
+
+    documents = load_documents(args.corpus)
+    mismatches = 0
+    for name, content in documents:
+        expected = reference_sections(content)
+        actual = parse(content)
+        if expected != actual:
+            mismatches += 1
+            print(f"MISMATCH {name}")
+            for title in sorted(set(expected) | set(actual)):
+                if expected.get(title) != actual.get(title):
+                    print(f"  [{title}]\n    expected: {expected.get(title)!r}\n    actual:   {actual.get(title)!r}")
+
+    print(f"{len(documents) - mismatches}/{len(documents)} documents equivalent")
+    print(f"reference: {throughput(reference_sections, documents, args.repeat):,.0f} docs/s")
+    print(f"streaming: {throughput(parse, documents, args.repeat):,.0f} docs/s")
+    sys.exit(1 if mismatches else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Measure hot re-index latency and search tail latency while a reload is running.
+
+Builds a synthetic corpus, serves searches from a background thread, edits one
+section of one CV and reports how long the watcher took to swap in the new index
+plus search latency percentiles before, during and after the reload.
+
+Usage (from backend/):
+    python bench/reload_latency.py --cvs 500
+"""
+import argparse
+import json
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+import numpy as np
+from corpus import CorpusLoader
+from retriever import CVRetriever
+from watcher import CVWatcher
+from synthetic import write_corpus
+
+QUERIES = ['python data pipelines', 'azure devops', 'languages spoken', 'kubernetes certification', 'led teams']
+
+def percentiles(samples):
+    if not samples:
+        return None
+    values = np.array(samples) * 1000
+    return {'count': len(samples), 'p50_ms': float(np.percentile(values, 50)),
+            'p99_ms': float(np.percentile(values, 99)), 'max_ms': float(values.max())}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cvs', type=int, default=200)
+    parser.add_argument('--settle', type=float, default=1.0, help='seconds of traffic before and after the edit')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_corpus(directory, args.cvs)
+        corpus = CorpusLoader(directory)
+        retriever = CVRetriever(corpus.iter_chunks())
+        watcher = CVWatcher(retriever, corpus.documents, interval=0.05).start()
+
+        samples = []
+        stop = threading.Event()
+
+        def traffic():
+            idx = 0
+            while not stop.is_set():
+                start = time.perf_counter()
+                retriever.search(QUERIES[idx % len(QUERIES)], top_k=5)
+                samples.append((start, time.perf_counter() - start))
+                idx += 1
+
+        thread = threading.Thread(target=traffic, daemon=True)
+        thread.start()
+        time.sleep(args.settle)
+
+        edit_at = time.perf_counter()
+        target = Path(paths[len(paths) // 2])
+        target.write_text(target.read_text(encoding='utf-8').replace('## Skills\n\n', '## Skills\n\nRust, Go, '),
+                          encoding='utf-8')
+        while watcher.reloads == 0:
+            time.sleep(0.01)
+        reloaded_at = time.perf_counter()
+
+        time.sleep(args.settle)
+        stop.set()
+        thread.join()
+        watcher.stop()
+
+    report = {
+        'cvs': args.cvs,
+        'chunks': len(retriever.chunks),
+        'reload': watcher.last_reload,
+        'edit_to_swap_ms': (reloaded_at - edit_at) * 1000,
+        'search_before': percentiles([d for t, d in samples if t < edit_at]),
+        'search_during': percentiles([d for t, d in samples if edit_at <= t < reloaded_at]),
+        'search_after': percentiles([d for t, d in samples if t >= reloaded_at]),
+    }
+    print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,287 @@
+"""
+Load-test /api/ask on the Flask server and on the async (ASGI) app.
+
+Starts bench/stub_azure.py as the LLM and embeddings backend (--llm-latency
+seconds per call, optionally drawn from a latency distribution and with
+injected 429s and server errors), then for each server mode launches the
+backend in its own process and drives /api/ask at each concurrency level.
+Each level reports requests per second, latency percentiles, errors by status
+and by reason, and the stub's own counters (LLM calls, injected failures).
+With --stream the load goes to /api/ask/stream and time to first token is
+reported as well.
+
+In both runs the crew step is replaced by one blocking chat completion
+against the stub (the async app runs it on a worker thread, as it does the
+real crew), so both servers make the same LLM call per question and the
+comparison isolates the serving model.
+
+Usage (from backend/):
+    python bench/serve_load.py --llm-latency 0.5 --concurrency 1 8 32 64 --requests 200
+    python bench/serve_load.py --servers flask --llm-latency 1.0 --latency-distribution lognormal \
+        --latency-spread 0.5 --error-rate 0.02 --stream
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+import numpy as np
+from pipeline import ANSWER_PREFIX
+
+# Questions that retrieve CV chunks, so every request reaches the LLM on both servers
+QUESTIONS = [
+    "Tell me about your Azure DevOps experience",
+    "What Python and AWS skills do you have?",
+    "Tell me about your AWS certification",
+    "What is your level in Spanish?",
+    "Tell me about your UNRWA experience",
+]
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def _error_reason(body: bytes) -> str:
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return 'non-JSON error body'
+    return str(data.get('message') or data.get('error') or 'unknown')[:120]
+
+def request(port: int, method: str, path: str, body: dict = None, timeout: float = 120) -> dict:
+    """
+    One request on a fresh connection.
+
+    Returns a dict with 'status' (0 on connection errors), 'seconds', an error
+    'reason' for failures and, for server-sent event responses, 'first_token'
+    seconds; an 'error' event in a 200 stream counts as a failure.
+    """
+    start = time.perf_counter()
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+    try:
+        payload = json.dumps(body).encode('utf-8') if body is not None else None
+        headers = {'Content-Type': 'application/json'} if payload else {}
+        conn.request(method, path, body=payload, headers=headers)
+        response = conn.getresponse()
+        if response.status == 200 and response.getheader('Content-Type', '').startswith('text/event-stream'):
+            return _read_stream(response, start)
+        data = response.read()
+        result = {'status': response.status, 'seconds': time.perf_counter() - start}
+        if response.status != 200:
+            result['reason'] = _error_reason(data)
+        return result
+    except (OSError, http.client.HTTPException) as e:
+        return {'status': 0, 'seconds': time.perf_counter() - start, 'reason': type(e).__name__}
+    finally:
+        conn.close()
+
+def _read_stream(response, start: float) -> dict:
+    result = {'status': 200, 'first_token': None}
+    event = None
+    for line in response:
+        line = line.decode('utf-8').rstrip('\n')
+        if line.startswith('event: '):
+            event = line[len('event: '):]
+        elif line.startswith('data: ') and event == 'token' and result['first_token'] is None:
+            # The answer prefix is sent before the LLM is called; time the first model token
+            if json.loads(line[len('data: '):]).get('text') != ANSWER_PREFIX:
+                result['first_token'] = time.perf_counter() - start
+        elif line.startswith('data: ') and event == 'error':
+            result['status'] = 'stream-error'
+            result['reason'] = _error_reason(line[len('data: '):].encode('utf-8'))
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+def stub_stats(port: int) -> dict:
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    try:
+        conn.request('GET', '/stats')
+        return json.loads(conn.getresponse().read())
+    finally:
+        conn.close()
+
+def wait_for_stub(port: int, process: subprocess.Popen, timeout: float = 30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Stub exited with code {process.returncode}")
+        try:
+            return stub_stats(port)
+        except (OSError, ValueError, http.client.HTTPException):
+            time.sleep(0.1)
+    raise RuntimeError("Stub did not start")
+
+def percentiles(seconds: list, prefix: str = '') -> dict:
+    if not seconds:
+        return {}
+    values = np.array(seconds) * 1000
+    return {f'{prefix}p50_ms': float(np.percentile(values, 50)), f'{prefix}p95_ms': float(np.percentile(values, 95)),
+            f'{prefix}p99_ms': float(np.percentile(values, 99))}
+
+def wait_healthy(port: int, process: subprocess.Popen, timeout: float = 120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/api/health')
+            if json.loads(conn.getresponse().read()).get('status') == 'healthy':
+                return
+        except (OSError, ValueError, http.client.HTTPException):
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("Server did not become healthy")
+
+def run_level(port: int, concurrency: int, total: int, path: str = '/api/ask', stub_port: int = None) -> dict:
+    """Send total requests to path from `concurrency` closed-loop clients."""
+    results = []
+    stub_before = stub_stats(stub_port) if stub_port else None
+    lock = threading.Lock()
+    counter = iter(range(total))
+
+    def client():
+        while True:
+            with lock:
+                idx = next(counter, None)
+            if idx is None:
+                return
+            question = QUESTIONS[idx % len(QUESTIONS)]
+            outcome = request(port, 'POST', path, {'question': question})
+            with lock:
+                results.append(outcome)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(client)
+    wall = time.perf_counter() - start
+
+    ok = [result for result in results if result['status'] == 200]
+    errors = {}
+    reasons = {}
+    for result in results:
+        if result['status'] != 200:
+            errors[str(result['status'])] = errors.get(str(result['status']), 0) + 1
+            reasons[result['reason']] = reasons.get(result['reason'], 0) + 1
+    report = {'concurrency': concurrency, 'requests': len(results), 'ok': len(ok),
+              'error_rate': 1 - len(ok) / len(results) if results else 0.0,
+              'errors': errors, 'error_reasons': reasons, 'rps': len(ok) / wall if wall else 0.0}
+    report.update(percentiles([result['seconds'] for result in ok]))
+    report.update(percentiles([result['first_token'] for result in ok if result.get('first_token') is not None],
+                              'first_token_'))
+    if stub_port:
+        stub_after = stub_stats(stub_port)
+        report['stub'] = {name: stub_after[name] - stub_before[name]
+                          for name in ('requests', 'completions', 'rate_limited', 'errors')}
+    return report
+
+def serve(mode: str, port: int):
+    """Run one backend in this process (used via --serve by the benchmark itself)."""
+    import logging
+    import app as cv_app
+    import pipeline
+    from llm import build_messages
+    logging.getLogger().setLevel(logging.WARNING)
+
+    def stub_crew(agents, question, section=None, crew_pool=None):
+        context = cv_app.retriever.get_context_for_query(question, section)
+        return cv_app.chat_client.complete(build_messages(question, context, section))
+
+    pipeline.run_agents = stub_crew
+    if mode == 'flask':
+        if not cv_app.initialize_cv_system():
+            sys.exit(1)
+        # Same server app.py starts (threaded Werkzeug)
+        cv_app.app.run(host='127.0.0.1', port=port, debug=False)
+    else:
+        import uvicorn
+        import asgi
+        uvicorn.run(asgi.app, host='127.0.0.1', port=port, log_level='warning')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--servers', nargs='+', default=['flask', 'asgi'], choices=['flask', 'asgi'])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32, 64])
+    parser.add_argument('--requests', type=int, default=200, help='requests per concurrency level')
+    parser.add_argument('--llm-latency', type=float, default=0.5, help='stub seconds per LLM/embedding call')
+    parser.add_argument('--chat-latency', type=float, help='stub seconds per chat completion (default: --llm-latency)')
+    parser.add_argument('--latency-distribution', default='fixed',
+                        choices=['fixed', 'uniform', 'normal', 'lognormal', 'exponential'])
+    parser.add_argument('--latency-spread', type=float, default=0.0, help='see stub_azure.py')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of stub calls answered with 500')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='fraction of stub calls answered with 429')
+    parser.add_argument('--token-delay', type=float, default=0.0, help='stub seconds between streamed tokens')
+    parser.add_argument('--stream', action='store_true', help='load /api/ask/stream instead of /api/ask')
+    parser.add_argument('--llm-max-concurrency', type=int, default=64, help='LLM_MAX_CONCURRENCY for the async app')
+    parser.add_argument('--serve', choices=['flask', 'asgi'], help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port)
+        return
+
+    stub_port = free_port()
+    stub_command = [sys.executable, str(backend_dir / 'bench' / 'stub_azure.py'), '--port', str(stub_port),
+                    '--latency', str(args.llm_latency), '--latency-distribution', args.latency_distribution,
+                    '--latency-spread', str(args.latency_spread), '--error-rate', str(args.error_rate),
+                    '--rate-limit-rate', str(args.rate_limit_rate), '--token-delay', str(args.token_delay)]
+    if args.chat_latency is not None:
+        stub_command += ['--chat-latency', str(args.chat_latency)]
+    stub = subprocess.Popen(stub_command, stdout=subprocess.DEVNULL)
+    path = '/api/ask/stream' if args.stream else '/api/ask'
+    report = {'path': path, 'requests_per_level': args.requests,
+              'stub': {name: getattr(args, name) for name in ('llm_latency', 'chat_latency', 'latency_distribution',
+                                                               'latency_spread', 'error_rate', 'rate_limit_rate',
+                                                               'token_delay')},
+              'servers': {}}
+    try:
+        wait_for_stub(stub_port, stub)
+        with tempfile.TemporaryDirectory() as index_dir:
+            env = {**os.environ,
+                   'AZURE_OPENAI_API_KEY': 'stub',
+                   'AZURE_OPENAI_ENDPOINT': f'http://127.0.0.1:{stub_port}/',
+                   'CV_INDEX_DIR': index_dir,
+                   'CV_WATCH_INTERVAL': '0',
+                   # Every request should reach the LLM: no answer caches, prewarming, routing or coalescing
+                   'ANSWER_CACHE_SIZE': '0',
+                   'ANSWER_CACHE_DB': '',
+                   'SEMANTIC_CACHE_SIZE': '0',
+                   'PREWARM_ANSWERS': '0',
+                   'ROUTER_ENABLED': '0',
+                   'COALESCE_REQUESTS': '0',
+                   'LLM_MAX_CONCURRENCY': str(args.llm_max_concurrency)}
+            for mode in args.servers:
+                port = free_port()
+                server = subprocess.Popen([sys.executable, __file__, '--serve', mode, '--port', str(port)],
+                                          cwd=backend_dir, env=env,
+                                          stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                try:
+                    wait_healthy(port, server)
+                    run_level(port, 2, 10, path)  # warm up connections and caches
+                    report['servers'][mode] = [run_level(port, level, args.requests, path, stub_port)
+                                               for level in args.concurrency]
+                finally:
+                    server.terminate()
+                    server.wait()
+    finally:
+        stub.terminate()
+        stub.wait()
+
+    print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+"""
+Local stand-in for the Azure OpenAI REST endpoint, for offline benchmarks.
+
+Speaks the embeddings and chat completions (plain and streamed) API shapes with
+configurable latency distributions and injected 429s and server errors. Request
+counters are served at GET /stats.
+
+Run standalone (from backend/) so load tests do not share a process with it:
+    python bench/stub_azure.py --port 9100 --latency 0.05 --chat-latency 1.5 \
+        --latency-distribution lognormal --latency-spread 0.5 --error-rate 0.01
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+import numpy as np
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+STUB_ANSWER = ("The CV describes several years leading information management and data engineering "
+               "work, with hands-on Python, cloud and DevOps experience across humanitarian organisations.")
+
+def stub_embedding(text: str, dim: int) -> list:
+    """Deterministic pseudo-embedding derived from the text."""
+    seed = int.from_bytes(hashlib.sha256(text.encode('utf-8')).digest()[:4], 'little')
+    return np.random.default_rng(seed).normal(size=dim).astype(np.float32).tolist()
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The socketserver default backlog of 5 drops connections under load-test concurrency
+    request_queue_size = 1024
+
+LATENCY_DISTRIBUTIONS = ('fixed', 'uniform', 'normal', 'lognormal', 'exponential')
+
+class StubAzureServer:
+    """
+    Serve the Azure OpenAI embeddings and chat completions API shapes on localhost.
+
+    Each request waits for a latency drawn from latency_distribution around
+    its endpoint's latency: 'fixed' uses it as is, 'uniform' draws from
+    latency +/- spread, 'normal' uses spread as the standard deviation,
+    'lognormal' uses latency as the median and spread as sigma (the long tail
+    real LLM APIs show) and 'exponential' uses latency as the mean.
+
+    Args:
+        dim: Embedding dimension to return
+        latency: Seconds added to every request
+        rate_limit_rate: Fraction of requests answered with 429
+        retry_after: Value of the Retry-After header sent with 429s
+        token_delay: Seconds between streamed chat completion chunks
+        chat_latency: Seconds added to chat completions instead of latency (None uses latency)
+        latency_distribution: One of LATENCY_DISTRIBUTIONS
+        latency_spread: Spread parameter of the distribution (see above)
+        error_rate: Fraction of requests answered with error_status
+        error_status: HTTP status of injected errors
+    """
+
+    def __init__(self, dim: int = 256, latency: float = 0.0, rate_limit_rate: float = 0.0, retry_after: float = 0.05,
+                 seed: int = 0, token_delay: float = 0.0, chat_latency: Optional[float] = None,
+                 latency_distribution: str = 'fixed', latency_spread: float = 0.0,
+                 error_rate: float = 0.0, error_status: int = 500):
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {latency_distribution}")
+        self.dim = dim
+        self.latency = latency
+        self.chat_latency = chat_latency
+        self.latency_distribution = latency_distribution
+        self.latency_spread = latency_spread
+        self.token_delay = token_delay
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'rate_limited': 0, 'errors': 0, 'inputs': 0, 'completions': 0,
+                      'streamed_completions': 0, 'latency_seconds': 0.0}
+        self._server = None
+        self._thread = None
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.stats[name] += amount
+
+    def _should_rate_limit(self) -> bool:
+        with self._lock:
+            return self._random.random() < self.rate_limit_rate
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def sample_latency(self, chat: bool = False) -> float:
+        """Seconds to wait before answering one request."""
+        mean = self.chat_latency if chat and self.chat_latency is not None else self.latency
+        spread = self.latency_spread
+        if mean <= 0:
+            return 0.0
+        with self._lock:
+            if self.latency_distribution == 'uniform':
+                value = self._random.uniform(mean - spread, mean + spread)
+            elif self.latency_distribution == 'normal':
+                value = self._random.gauss(mean, spread)
+            elif self.latency_distribution == 'lognormal':
+                value = mean * math.exp(self._random.gauss(0.0, spread))
+            elif self.latency_distribution == 'exponential':
+                value = self._random.expovariate(1.0 / mean)
+            else:
+                value = mean
+        return max(0.0, value)
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, payload: dict, headers: dict = None):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _completion(self, payload: dict):
+                stub._count('completions')
+                if payload.get('stream'):
+                    stub._count('streamed_completions')
+                model = payload.get('model', 'stub')
+                words = [word + ' ' for word in STUB_ANSWER.split(' ')]
+                words[-1] = words[-1].rstrip()
+
+                if not payload.get('stream'):
+                    self._send_json(200, {
+                        'id': 'chatcmpl-stub', 'object': 'chat.completion', 'created': int(time.time()), 'model': model,
+                        'choices': [{'index': 0, 'finish_reason': 'stop',
+                                     'message': {'role': 'assistant', 'content': STUB_ANSWER}}],
+                        'usage': {'prompt_tokens': 0, 'completion_tokens': len(words), 'total_tokens': len(words)}
+                    })
+                    return
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Cache-Control', 'no-cache')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+                self.close_connection = True
+
+                def send(choices):
+                    chunk = {'id': 'chatcmpl-stub', 'object': 'chat.completion.chunk', 'created': int(time.time()),
+                             'model': model, 'choices': choices}
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+                    self.wfile.flush()
+
+                # Azure leads with a content-filter chunk that has no choices
+                send([])
+                send([{'index': 0, 'delta': {'role': 'assistant', 'content': ''}, 'finish_reason': None}])
+                for word in words:
+                    if stub.token_delay:
+                        time.sleep(stub.token_delay)
+                    send([{'index': 0, 'delta': {'content': word}, 'finish_reason': None}])
+                send([{'index': 0, 'delta': {}, 'finish_reason': 'stop'}])
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+
+            def do_GET(self):
+                if self.path.split('?')[0] == '/stats':
+                    with stub._lock:
+                        stats = dict(stub.stats)
+                    self._send_json(200, stats)
+                    return
+                self._send_json(404, {'error': {'code': '404', 'message': f'Unknown path {self.path}'}})
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(length) or b'{}')
+                stub._count('requests')
+
+                delay = stub.sample_latency(chat=self.path.split('?')[0].endswith('/chat/completions'))
+                if delay:
+                    stub._count('latency_seconds', delay)
+                    time.sleep(delay)
+
+                if stub._should_rate_limit():
+                    stub._count('rate_limited')
+                    self._send_json(429, {'error': {'code': '429', 'message': 'Rate limit exceeded'}},
+                                    {'Retry-After': str(stub.retry_after)})
+                    return
+
+                if stub._should_fail():
+                    stub._count('errors')
+                    self._send_json(stub.error_status, {'error': {'code': str(stub.error_status),
+                                                                  'message': 'Injected stub error'}})
+                    return
+
+                if self.path.split('?')[0].endswith('/embeddings'):
+                    inputs = payload.get('input', [])
+                    if isinstance(inputs, str):
+                        inputs = [inputs]
+                    stub._count('inputs', len(inputs))
+                    self._send_json(200, {
+                        'object': 'list',
+                        'model': payload.get('model', 'stub'),
+                        'data': [
+                            {'object': 'embedding', 'index': idx, 'embedding': stub_embedding(text, stub.dim)}
+                            for idx, text in enumerate(inputs)
+                        ],
+                        'usage': {'prompt_tokens': 0, 'total_tokens': 0}
+                    })
+                    return
+
+                if self.path.split('?')[0].endswith('/chat/completions'):
+                    self._completion(payload)
+                    return
+
+                self._send_json(404, {'error': {'code': '404', 'message': f'Unknown path {self.path}'}})
+
+        return Handler
+
+    def start(self, host: str = '127.0.0.1', port: int = 0) -> 'StubAzureServer':
+        self._server = _HTTPServer((host, port), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9100)
+    parser.add_argument('--dim', type=int, default=256)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every request')
+    parser.add_argument('--chat-latency', type=float, help='seconds added to chat completions (default: --latency)')
+    parser.add_argument('--latency-distribution', choices=LATENCY_DISTRIBUTIONS, default='fixed')
+    parser.add_argument('--latency-spread', type=float, default=0.0,
+                        help='uniform half-width, normal standard deviation or lognormal sigma')
+    parser.add_argument('--token-delay', type=float, default=0.0, help='seconds between streamed chat chunks')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='fraction of requests answered with 429')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with --error-status')
+    parser.add_argument('--error-status', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    stub = StubAzureServer(dim=args.dim, latency=args.latency, rate_limit_rate=args.rate_limit_rate,
+                           token_delay=args.token_delay, chat_latency=args.chat_latency,
+                           latency_distribution=args.latency_distribution, latency_spread=args.latency_spread,
+                           error_rate=args.error_rate, error_status=args.error_status,
+                           seed=args.seed).start(args.host, args.port)
+    print(f"Stub Azure OpenAI listening on {stub.endpoint}", flush=True)
+    try:
+        stub._thread.join()
+    except KeyboardInterrupt:
+        stub.stop()
+
+if __name__ == '__main__':
+    main()
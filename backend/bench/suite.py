@@ -0,0 +1,246 @@
+"""
+Reproducible benchmark suite for the loader, retriever and /api/ask pipeline.
+
+For each corpus size it writes synthetic CVs (bench/synthetic.py, fixed seed),
+then times loading, parsing and chunking every CV, building the search index,
+single, batch and section-filtered search latency, and the memory the index
+takes. Finally it answers /api/ask end-to-end through the Flask app against
+bench/stub_azure.py, whose fixed answer makes the LLM step deterministic.
+
+Results are written as JSON; --compare prints each timing and size next to an
+earlier result file.
+
+Usage (from backend/):
+    python bench/suite.py --cvs 1 1000 --output bench-baseline.json
+    python bench/suite.py --cvs 1 1000 100000 --dense --compare bench-baseline.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+import numpy as np
+from corpus import CorpusLoader
+from loader import CVLoader
+from retriever import CVRetriever
+from stub_azure import STUB_ANSWER, StubAzureServer
+from synthetic import write_corpus
+
+QUERIES = ['python data pipelines', 'azure devops', 'languages spoken', 'kubernetes certification',
+           'led teams', 'machine learning projects', 'terraform cloud infrastructure', 'power bi dashboards']
+SECTION = 'Skills'
+ASK_QUESTIONS = [
+    "Tell me about your Azure DevOps experience",
+    "What Python and AWS skills do you have?",
+    "Tell me about your AWS certification",
+    "What is your level in Spanish?",
+    "Tell me about your UNRWA experience",
+]
+
+def latency(fn, runs: int) -> dict:
+    """Call fn `runs` times and summarize the per-call latency."""
+    samples = []
+    for idx in range(runs):
+        start = time.perf_counter()
+        fn(idx)
+        samples.append(time.perf_counter() - start)
+    values = np.array(samples) * 1000
+    return {'runs': runs, 'mean_ms': float(values.mean()), 'p50_ms': float(np.percentile(values, 50)),
+            'p95_ms': float(np.percentile(values, 95)), 'p99_ms': float(np.percentile(values, 99))}
+
+def rss_bytes() -> int:
+    """Current resident set size (peak RSS where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def index_bytes(index) -> dict:
+    """In-memory size of the BM25 matrix, the dense matrix and the IVF lists."""
+    bm25 = index.chunk_vectors
+    sizes = {'bm25': int(bm25.data.nbytes + bm25.indices.nbytes + bm25.indptr.nbytes), 'dense': 0, 'ann': 0}
+    if index.chunk_embeddings is not None:
+        sizes['dense'] = int(index.chunk_embeddings.matrix.nbytes)
+    if index.ann is not None:
+        sizes['ann'] = int(index.ann.centroids.nbytes + index.ann.order.nbytes + index.ann.offsets.nbytes)
+    return sizes
+
+def bench_corpus(count: int, args, index_dir: str) -> dict:
+    report = {'cvs': count}
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        paths = write_corpus(directory, count, seed=args.seed)
+        report['generate_seconds'] = time.perf_counter() - start
+
+        loaders = [CVLoader(path) for path in paths]
+        stages = {}
+        for name, step in (('load', CVLoader.load_content), ('parse', CVLoader.parse_sections),
+                           ('chunk', CVLoader.get_chunks_for_embedding)):
+            start = time.perf_counter()
+            results = [step(loader) for loader in loaders]
+            seconds = time.perf_counter() - start
+            stages[name] = {'seconds': seconds, 'per_cv_ms': seconds * 1000 / count}
+        chunks = [chunk for doc_chunks in results for chunk in doc_chunks]
+        for chunk_id, chunk in enumerate(chunks):
+            chunk['id'] = chunk_id
+        report.update(stages)
+        report['chunks'] = len(chunks)
+        del loaders, results
+
+        # The same work through the multi-process loader the app uses for CV directories
+        corpus = CorpusLoader(directory)
+        start = time.perf_counter()
+        for _ in corpus.iter_chunks():
+            pass
+        report['corpus_loader'] = {'seconds': time.perf_counter() - start, 'workers': corpus.max_workers}
+
+    rss_before = rss_bytes()
+    start = time.perf_counter()
+    retriever = CVRetriever(chunks, index_dir=index_dir)
+    report['index_build'] = {'seconds': time.perf_counter() - start, 'dense': retriever.chunk_embeddings is not None,
+                             'ann': retriever.snapshot().ann is not None}
+    report['memory'] = {'rss_delta_bytes': rss_bytes() - rss_before, 'index_bytes': index_bytes(retriever.snapshot())}
+    del chunks
+
+    # Warm the query embedding cache so dense runs time ranking, not the stub round trip
+    retriever.get_query_embeddings(QUERIES)
+    report['search'] = latency(lambda idx: retriever.search(QUERIES[idx % len(QUERIES)], top_k=5), args.queries)
+    report['section_search'] = latency(
+        lambda idx: retriever.search(QUERIES[idx % len(QUERIES)], section=SECTION, top_k=5), args.queries)
+
+    batch = [QUERIES[idx % len(QUERIES)] + f' {idx}' for idx in range(args.batch_size)]
+    retriever.get_query_embeddings(batch)
+    batch_runs = max(1, args.queries // args.batch_size)
+    report['batch_search'] = latency(lambda idx: retriever.search_many(batch, top_k=5), batch_runs)
+    report['batch_search']['batch_size'] = args.batch_size
+    report['batch_search']['per_query_ms'] = report['batch_search']['mean_ms'] / args.batch_size
+    return report
+
+def bench_ask(args, stub: StubAzureServer, index_dir: str) -> dict:
+    """/api/ask through the Flask app, with the crew step replaced by one chat completion against the stub."""
+    os.environ.update({'AZURE_OPENAI_API_KEY': 'stub', 'AZURE_OPENAI_ENDPOINT': stub.endpoint,
+                       'CV_INDEX_DIR': index_dir, 'CV_WATCH_INTERVAL': '0', 'PREWARM_ANSWERS': '0',
+                       'ANSWER_CACHE_SIZE': '0', 'ROUTER_ENABLED': '0'})
+    os.environ.pop('ANSWER_CACHE_DB', None)
+
+    import logging
+    import app as cv_app
+    import pipeline
+    from llm import build_messages
+    logging.getLogger().setLevel(logging.WARNING)
+
+    def stub_crew(agents, question, section=None, crew_pool=None):
+        context = cv_app.retriever.get_context_for_query(question, section)
+        return cv_app.chat_client.complete(build_messages(question, context, section))
+
+    pipeline.run_agents = stub_crew
+    start = time.perf_counter()
+    if not cv_app.initialize_cv_system():
+        raise RuntimeError("CV system failed to initialize")
+    report = {'startup_seconds': time.perf_counter() - start}
+
+    client = cv_app.app.test_client()
+    answers = set()
+
+    def ask(idx):
+        response = client.post('/api/ask', json={'question': ASK_QUESTIONS[idx % len(ASK_QUESTIONS)]})
+        if response.status_code != 200:
+            raise RuntimeError(f"/api/ask returned {response.status_code}")
+        answers.add(response.get_json()['answer'])
+
+    completions = stub.stats['completions']
+    report['ask'] = latency(ask, args.asks)
+    report['ask']['llm_calls'] = stub.stats['completions'] - completions
+    report['ask']['deterministic'] = answers == {pipeline.ANSWER_PREFIX + STUB_ANSWER}
+    return report
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=backend_dir,
+                                capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {'commit': commit, 'python': platform.python_version(), 'numpy': np.__version__,
+            'platform': platform.platform(), 'cpus': os.cpu_count(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())}
+
+def flatten(data, prefix: str = '') -> dict:
+    values = {}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            values.update(flatten(value, f'{prefix}.{key}' if prefix else str(key)))
+    elif isinstance(data, list):
+        for item in data:
+            key = f"cvs={item['cvs']}" if isinstance(item, dict) and 'cvs' in item else str(len(values))
+            values.update(flatten(item, f'{prefix}[{key}]'))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        values[prefix] = data
+    return values
+
+def compare(report: dict, baseline: dict):
+    """Print every timing and size metric present in both reports with its ratio."""
+    new, old = flatten(report['results']), flatten(baseline['results'])
+    print(f"{'metric':<58} {'baseline':>12} {'current':>12} {'ratio':>7}", file=sys.stderr)
+    for key in sorted(new.keys() & old.keys()):
+        if not key.endswith(('_ms', 'seconds', 'bytes')):
+            continue
+        ratio = new[key] / old[key] if old[key] else float('nan')
+        print(f"{key:<58} {old[key]:>12.3f} {new[key]:>12.3f} {ratio:>7.2f}", file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cvs', type=int, nargs='+', default=[1, 1000], help='corpus sizes (e.g. 1 1000 100000)')
+    parser.add_argument('--queries', type=int, default=200, help='timed searches per corpus')
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--asks', type=int, default=50, help='timed /api/ask requests')
+    parser.add_argument('--dense', action='store_true', help='embed chunks with the stub so dense search and ANN are timed too')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the JSON report here as well as to stdout')
+    parser.add_argument('--compare', help='earlier report to compare against')
+    args = parser.parse_args()
+
+    for name in ('AZURE_OPENAI_API_KEY', 'AZURE_OPENAI_ENDPOINT', 'CV_INDEX_DIR'):
+        os.environ.pop(name, None)
+
+    # Pay the one-off scikit-learn and openai imports (and the tokenizer load) here rather
+    # than in the first index build and chunking run
+    import openai  # noqa: F401
+    import sklearn.feature_extraction.text  # noqa: F401
+    from tokens import get_encoder, tokenizer_name
+
+    report = {'environment': environment(), 'args': vars(args), 'results': {}}
+    # Progress and the retriever's own prints go to stderr so stdout is only the report
+    with contextlib.redirect_stdout(sys.stderr), StubAzureServer() as stub, tempfile.TemporaryDirectory() as index_dir:
+        get_encoder()
+        report['environment']['tokenizer'] = tokenizer_name()
+        if args.dense:
+            os.environ.update({'AZURE_OPENAI_API_KEY': 'stub', 'AZURE_OPENAI_ENDPOINT': stub.endpoint})
+        corpora = []
+        for count in args.cvs:
+            print(f"Benchmarking {count} CVs...", file=sys.stderr)
+            corpora.append(bench_corpus(count, args, os.path.join(index_dir, f'corpus{count}')))
+        report['results']['corpus'] = corpora
+
+        print("Benchmarking /api/ask...", file=sys.stderr)
+        report['results']['ask'] = bench_ask(args, stub, os.path.join(index_dir, 'ask'))
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + '\n', encoding='utf-8')
+    if args.compare:
+        compare(report, json.loads(Path(args.compare).read_text(encoding='utf-8')))
+
+if __name__ == '__main__':
+    main()
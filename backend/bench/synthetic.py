@@ -0,0 +1,59 @@
+"""Deterministic synthetic markdown CVs for benchmarks."""
+import os
+import random
+from typing import List
+
+FIRST_NAMES = ['Amal', 'Bruno', 'Chen', 'Dana', 'Elif', 'Farid', 'Grace', 'Hugo', 'Ines', 'Jonas', 'Kiran', 'Lena']
+LAST_NAMES = ['Haddad', 'Silva', 'Wang', 'Novak', 'Yilmaz', 'Rahman', 'Okafor', 'Moreau', 'Garcia', 'Berg']
+ROLES = ['Software Engineer', 'Data Scientist', 'DevOps Engineer', 'Product Manager', 'ML Engineer',
+         'Information Management Officer', 'Solutions Architect', 'QA Lead']
+ORGS = ['IOM', 'UNRWA', 'UNICEF', 'Acme Corp', 'Globex', 'Initech', 'WFP', 'Contoso']
+SKILLS = ['Python', 'TypeScript', 'React', 'Azure', 'AWS', 'Docker', 'Kubernetes', 'PostgreSQL', 'Terraform',
+          'Power BI', 'Machine Learning', 'CI/CD', 'GraphQL', 'Spark', 'SharePoint', 'Agile/Scrum']
+VERBS = ['Built', 'Led', 'Designed', 'Automated', 'Migrated', 'Maintained', 'Improved', 'Delivered']
+OBJECTS = ['data pipelines', 'deployment pipelines', 'reporting dashboards', 'registration systems',
+           'AI agents for HR', 'cloud infrastructure', 'field applications', 'survey tooling']
+CERTS = ['AWS Certified Developer Associate', 'Azure Solutions Architect Expert', 'PMP',
+         'Google Cloud Professional Cloud Architect', 'Certified Kubernetes Administrator']
+LANGUAGES = ['English', 'Arabic', 'Spanish', 'French', 'German', 'Turkish']
+LEVELS = ['Native', 'Fluent', 'Conversational', 'Basic']
+
+def generate_cv(seed: int, jobs: int = 4) -> str:
+    """Return one markdown CV; the same seed always gives the same document."""
+    rng = random.Random(seed)
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    lines = [f"# {name}", "", f"**{rng.choice(ROLES)}**  ", f"candidate{seed}@example.com", ""]
+
+    lines += ["## Summary", "",
+              f"{rng.choice(ROLES)} with {rng.randint(2, 20)} years of experience in "
+              f"{', '.join(rng.sample(SKILLS, 3))}. {rng.choice(VERBS)} {rng.choice(OBJECTS)} "
+              f"for {rng.choice(ORGS)} and {rng.choice(ORGS)}.", ""]
+
+    lines += ["## Experience", ""]
+    year = 2024
+    for _ in range(jobs):
+        start = year - rng.randint(1, 4)
+        lines.append(f"- **{rng.choice(ROLES)}** at **{rng.choice(ORGS)}** — {start}-{year}")
+        for _ in range(rng.randint(2, 4)):
+            lines.append(f"  {rng.choice(VERBS)} {rng.choice(OBJECTS)} using {rng.choice(SKILLS)}.")
+        lines.append("")
+        year = start
+
+    lines += ["## Skills", "", ', '.join(rng.sample(SKILLS, 8)), ""]
+    lines += ["## Certificates", ""] + [f"- {cert}" for cert in rng.sample(CERTS, 2)] + [""]
+    lines += ["## Languages", ""] + [
+        f"- **{language}** — {rng.choice(LEVELS)}" for language in rng.sample(LANGUAGES, 3)
+    ] + [""]
+    return '\n'.join(lines)
+
+def write_corpus(directory: str, count: int, seed: int = 0) -> List[str]:
+    """Write `count` CVs into directory (sharded into subfolders of 1000) and return their paths."""
+    paths = []
+    for idx in range(count):
+        shard = os.path.join(directory, f"shard{idx // 1000:04d}")
+        os.makedirs(shard, exist_ok=True)
+        path = os.path.join(shard, f"cv{idx:07d}.md")
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(generate_cv(seed + idx))
+        paths.append(path)
+    return paths
@@ -0,0 +1,214 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+def normalize_text(text: str) -> str:
+    """Case- and whitespace-insensitive form of a query, for use as a cache key."""
+    return ' '.join(text.lower().split())
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with optional time-to-live and hit/miss counters.
+
+    Args:
+        maxsize: Maximum number of entries kept before the least recently used is evicted
+        ttl: Seconds an entry stays valid, or None to keep entries until evicted
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        if self.maxsize <= 0:
+            return
+
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Whether a live entry exists, without touching recency or hit/miss counters."""
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and (entry[1] is None or entry[1] > time.monotonic())
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+class AnswerCache:
+    """
+    Cache of /api/ask responses keyed on question, section and indexed content version.
+
+    The version is the retriever's content hash, so editing the CV changes every
+    key and stale answers are never served. Answers from a cheaper pipeline
+    (e.g. /api/ask/batch) are stored under their own `pipeline` name, so
+    /api/ask never serves them. Lookups hit an in-memory LRU first
+    and then, if db_path is set, a SQLite table that survives restarts; rows
+    written for an older version are pruned when a new version is first stored.
+
+    Args:
+        maxsize: Entries kept in the memory tier
+        db_path: SQLite file for the disk tier, or None for memory only
+    """
+
+    def __init__(self, maxsize: int = 512, db_path: Optional[str] = None):
+        self.memory = LRUCache(maxsize=maxsize)
+        self.db_path = db_path
+        self._db = None
+        self._db_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stored_version = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if db_path:
+            self._open_db(db_path)
+
+    def _open_db(self, db_path: str):
+        try:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                "key TEXT PRIMARY KEY, version TEXT NOT NULL, response TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"Answer cache disk tier disabled ({db_path}): {e}")
+            self._db = None
+
+    @staticmethod
+    def key(question: str, section: Optional[str], version: str, pipeline: Optional[str] = None) -> str:
+        parts = [normalize_text(question), (section or '').lower(), version or '']
+        raw = '\x00'.join(parts + [pipeline] if pipeline else parts)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, question: str, section: Optional[str], version: str, pipeline: Optional[str] = None) -> Optional[Dict]:
+        key = self.key(question, section, version, pipeline)
+        response = self.memory.get(key)
+        if response is None:
+            response = self._disk_get(key)
+            if response is not None:
+                self.memory.set(key, response)
+                self._count('disk_hits')
+
+        self._count('hits' if response is not None else 'misses')
+        return response
+
+    def contains(self, question: str, section: Optional[str], version: str) -> bool:
+        """Whether an answer is cached in either tier, without counting a lookup."""
+        key = self.key(question, section, version)
+        return key in self.memory or self._disk_get(key) is not None
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def set(self, question: str, section: Optional[str], version: str, response: Dict, pipeline: Optional[str] = None):
+        key = self.key(question, section, version, pipeline)
+        self.memory.set(key, response)
+        if self._db is None:
+            return
+
+        try:
+            with self._db_lock:
+                if version != self._stored_version:
+                    # First write for this CV version: answers for older versions can never match again
+                    self._db.execute("DELETE FROM answers WHERE version != ?", (version,))
+                    self._stored_version = version
+                self._db.execute(
+                    "INSERT OR REPLACE INTO answers (key, version, response, created) VALUES (?, ?, ?, ?)",
+                    (key, version, json.dumps(response), time.time())
+                )
+                self._db.commit()
+        except sqlite3.Error as e:
+            print(f"Error writing answer cache: {e}")
+
+    def _disk_get(self, key: str) -> Optional[Dict]:
+        if self._db is None:
+            return None
+        try:
+            with self._db_lock:
+                row = self._db.execute("SELECT response FROM answers WHERE key = ?", (key,)).fetchone()
+            return json.loads(row[0]) if row else None
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Error reading answer cache: {e}")
+            return None
+
+    def clear(self):
+        self.memory.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM answers")
+                self._db.commit()
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            stats = {
+                'hits': self.hits,
+                'memory_hits': self.hits - self.disk_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'memory': self.memory.stats(),
+                'disk': self._db is not None
+            }
+        if self._db is not None:
+            with self._db_lock:
+                stats['disk_entries'] = self._db.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        return stats
@@ -0,0 +1,127 @@
+import glob
+import os
+import time
+from multiprocessing import Pool
+from typing import Dict, Iterator, List, Optional, Tuple
+from loader import CVLoader
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+def _parse_document(job: Tuple[str, str, int, int]) -> Tuple[str, List[Dict]]:
+    """Parse and chunk one CV file. Runs in a worker process."""
+    path, doc_id, chunk_size, overlap = job
+    loader = CVLoader(path, doc_id=doc_id)
+    loader.load_content()
+    return doc_id, loader.get_chunks_for_embedding(chunk_size, overlap)
+
+def _parse_safely(job: Tuple[str, str, int, int]) -> Tuple[str, Optional[List[Dict]]]:
+    try:
+        return _parse_document(job)
+    except Exception as e:
+        print(f"Failed to parse CV {job[0]}: {e}")
+        return job[1], None
+
+def peak_memory_mb() -> Tuple[Optional[float], Optional[float]]:
+    """
+    Peak resident memory in MB of this process, and of its largest finished child.
+
+    The kernel keeps only the maximum over waited-for children, not a sum, so the
+    second figure is one parser worker's peak rather than the pool's total.
+    """
+    if resource is None:
+        return None, None
+    # ru_maxrss is reported in kilobytes on Linux
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    child = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return own / 1024.0, child / 1024.0
+
+class CorpusLoader:
+    """
+    Load a directory or glob of markdown CVs, parsing files in parallel.
+
+    Args:
+        source: Directory (searched recursively for *.md) or glob pattern
+        max_workers: Worker processes; defaults to the number of CPUs
+        chunk_size: Passed to CVLoader.get_chunks_for_embedding
+        overlap: Passed to CVLoader.get_chunks_for_embedding
+    """
+
+    def __init__(self, source: str, max_workers: Optional[int] = None, chunk_size: int = 128, overlap: int = 16):
+        self.source = source
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.stats = {}
+
+    def discover(self) -> List[str]:
+        """List the CV files covered by the source, in a stable order."""
+        if os.path.isdir(self.source):
+            pattern = os.path.join(self.source, '**', '*.md')
+        else:
+            pattern = self.source
+        return sorted(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+
+    def _root(self) -> str:
+        """Directory that document ids are made relative to."""
+        if os.path.isdir(self.source):
+            return self.source
+        parts = []
+        for part in self.source.split(os.sep):
+            if any(char in part for char in '*?['):
+                break
+            parts.append(part)
+        return os.sep.join(parts) or '.'
+
+    def _doc_id(self, path: str, root: str) -> str:
+        relative = os.path.relpath(path, root)
+        return os.path.splitext(relative)[0].replace(os.sep, '/')
+
+    def documents(self) -> Dict[str, str]:
+        """Map each document id to its file path."""
+        root = self._root()
+        return {self._doc_id(path, root): path for path in self.discover()}
+
+    def iter_chunks(self) -> Iterator[Dict]:
+        """
+        Yield chunks document by document as workers finish parsing.
+
+        Chunk ids are renumbered to be unique across the corpus and every chunk
+        carries the 'doc_id' of its source file. Files that fail to parse are
+        skipped and counted in stats['failed'].
+        """
+        jobs = [(path, doc_id, self.chunk_size, self.overlap) for doc_id, path in self.documents().items()]
+        self.stats = {'files': 0, 'failed': 0, 'chunks': 0, 'workers': self.max_workers}
+
+        start = time.perf_counter()
+        chunk_id = 0
+        for doc_id, chunks in self._parse_all(jobs):
+            if chunks is None:
+                self.stats['failed'] += 1
+                continue
+
+            self.stats['files'] += 1
+            for chunk in chunks:
+                chunk['id'] = chunk_id
+                chunk_id += 1
+                yield chunk
+            self.stats['chunks'] = chunk_id
+
+        elapsed = time.perf_counter() - start
+        self.stats['seconds'] = elapsed
+        self.stats['files_per_second'] = self.stats['files'] / elapsed if elapsed else 0.0
+        self.stats['peak_memory_mb'], self.stats['peak_worker_memory_mb'] = peak_memory_mb()
+
+    def _parse_all(self, jobs: List[Tuple[str, str, int, int]]) -> Iterator[Tuple[str, Optional[List[Dict]]]]:
+        if self.max_workers <= 1 or len(jobs) <= 1:
+            for job in jobs:
+                yield _parse_safely(job)
+            return
+
+        # imap keeps document order deterministic while streaming results back
+        chunksize = max(1, min(64, len(jobs) // (self.max_workers * 4)))
+        with Pool(processes=self.max_workers) as pool:
+            for result in pool.imap(_parse_safely, jobs, chunksize=chunksize):
+                yield result
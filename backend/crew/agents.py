@@ -1,32 +1,69 @@
-
 try:
     from crewai import Agent
-    # Try to import LLM - handle different CrewAI versions
-    try:
-        from crewai.llm import LLM
-        CREWAI_LLM_AVAILABLE = True
-    except ImportError:
-        try:
-            from crewai import LLM
-            CREWAI_LLM_AVAILABLE = True
-        except ImportError:
-            try:
-                from crewai.utilities.token_counter_callback import LLM
-                CREWAI_LLM_AVAILABLE = True
-            except ImportError:
-                CREWAI_LLM_AVAILABLE = False
+    from crewai.llms.providers.openai.completion import OpenAICompletion
     CREWAI_AVAILABLE = True
 except ImportError:
     CREWAI_AVAILABLE = False
-    CREWAI_LLM_AVAILABLE = False
 
 from crew.tools import cv_search, cv_sections, cv_content, set_retriever
+from openai_clients import azure_clients
 from retriever import CVRetriever
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+if CREWAI_AVAILABLE:
+    class PooledAzureLLM(OpenAICompletion):
+        """
+        CrewAI's native OpenAI chat provider on the shared Azure OpenAI clients.
+
+        CrewAI's Azure provider sends requests through azure-core's own transport,
+        which cannot use the shared httpx pool; the OpenAI provider builds its
+        clients in these two methods, so the crew reuses the pooled connections
+        (with LLM_TIMEOUT) and its calls appear in the pool stats.
+        """
+
+        def _build_sync_client(self):
+            return azure_clients('chat')[0]
+
+        def _build_async_client(self):
+            return azure_clients('chat')[1]
+
+# CrewAI prints every agent step synchronously; keep it off the request path unless debugging
+CREW_VERBOSE = os.getenv('CREW_VERBOSE', 'false').lower() in ('1', 'true', 'yes')
+
+class SimpleAgent:
+    """Agent without crewai or an LLM: answers with the retrieved CV context."""
+
+    def __init__(self, role, goal, backstory, retriever):
+        self.role = role
+        self.goal = goal
+        self.backstory = backstory
+        self.retriever = retriever
+    
+    def process_query(self, question, section=None):
+        """Process a query using the retriever."""
+        try:
+            context = self.retriever.get_context_for_query(question, section)
+            if not context or context.strip() == "No relevant information found in the CV.":
+                return f"I couldn't find specific information about '{question}' in the CV."
+            return context
+        except Exception as e:
+            return f"Error processing query: {str(e)}"
+
+def create_simple_agent(retriever: CVRetriever) -> SimpleAgent:
+    """The researcher as a SimpleAgent, used alone or as the crew's fallback."""
+    return SimpleAgent(
+        role='CV Research Specialist',
+        goal='Find and extract relevant information from Mohammed Alakhras\'s CV to answer user questions accurately',
+        backstory='''You are an expert at analyzing CVs and finding relevant information. 
+        You have access to Mohammed Alakhras's complete CV and can search through all sections including 
+        Experience, Skills, Certifications, Education, and more. Your job is to find the most relevant 
+        information to answer user questions.''',
+        retriever=retriever
+    )
+
 def create_agents(retriever: CVRetriever):
     """Create CrewAI agents for CV question answering."""
     
@@ -38,30 +75,26 @@ def create_agents(retriever: CVRetriever):
         return create_simple_agents(retriever)
     
     try:
-        # Try to use Azure OpenAI if available and LLM class is available
+        # Try to use Azure OpenAI if available
         llm = None
         api_key = os.getenv('AZURE_OPENAI_API_KEY')
         azure_endpoint = os.getenv('AZURE_OPENAI_ENDPOINT')
-        api_version = os.getenv('AZURE_OPENAI_API_VERSION', '2024-08-01-preview')
         deployment_name = os.getenv('AZURE_OPENAI_DEPLOYMENT', 'gpt-35-turbo')
         
-        # LLM settings
+        # LLM settings (the timeout comes from the shared client: LLM_TIMEOUT)
         llm_settings = {
             "temperature": 0,
-            "max_tokens": 4000,
-            "timeout_seconds": 120
+            "max_tokens": 4000
         }
         
-        if CREWAI_LLM_AVAILABLE and api_key and azure_endpoint:
+        if api_key and azure_endpoint:
             try:
-                llm = LLM(
-                    model=f"azure/{deployment_name}",
+                # The deployment name is the model; the Azure client routes it to /openai/deployments/<name>
+                llm = PooledAzureLLM(
+                    model=deployment_name,
                     api_key=api_key,
-                    base_url=azure_endpoint,
-                    api_version=api_version,
                     temperature=llm_settings.get("temperature", 0),
-                    max_tokens=llm_settings.get("max_tokens", 4000),
-                    timeout=llm_settings.get("timeout_seconds", 120)
+                    max_tokens=llm_settings.get("max_tokens", 4000)
                 )
                 print(f"Azure LLM initialized successfully with deployment: {deployment_name}")
             except Exception as e:
@@ -90,7 +123,7 @@ def create_agents(retriever: CVRetriever):
                 information to answer user questions using the available CV search tools.''',
                 tools=[cv_search, cv_sections, cv_content],
                 llm=llm,
-                verbose=True,
+                verbose=CREW_VERBOSE,
                 allow_delegation=False
             )
             
@@ -103,7 +136,7 @@ def create_agents(retriever: CVRetriever):
                 accurate responses that highlight relevant qualifications, experience, and skills from Mohammed Alakhras's CV.''',
                 tools=[cv_search, cv_content],
                 llm=llm,
-                verbose=True,
+                verbose=CREW_VERBOSE,
                 allow_delegation=False
             )
         else:
@@ -116,7 +149,7 @@ def create_agents(retriever: CVRetriever):
                 Experience, Skills, Certifications, Education, and more. Your job is to find the most relevant 
                 information to answer user questions using the available CV search tools.''',
                 tools=[cv_search, cv_sections, cv_content],
-                verbose=True,
+                verbose=CREW_VERBOSE,
                 allow_delegation=False
             )
             
@@ -128,7 +161,7 @@ def create_agents(retriever: CVRetriever):
                 in a clear, comprehensive manner. You take the research findings and create well-structured, 
                 accurate responses that highlight relevant qualifications, experience, and skills from Mohammed Alakhras's CV.''',
                 tools=[cv_search, cv_content],
-                verbose=True,
+                verbose=CREW_VERBOSE,
                 allow_delegation=False
             )
         
@@ -136,7 +169,9 @@ def create_agents(retriever: CVRetriever):
         
         return {
             'researcher': cv_researcher,
-            'analyst': cv_analyst
+            'analyst': cv_analyst,
+            # Answers when the crew fails or no crew is free in time
+            'simple': create_simple_agent(retriever)
         }
         
     except Exception as e:
@@ -146,32 +181,7 @@ def create_agents(retriever: CVRetriever):
 def create_simple_agents(retriever: CVRetriever):
     """Fallback simple agent system for CV question answering without crewai dependency."""
     
-    class SimpleAgent:
-        def __init__(self, role, goal, backstory, retriever):
-            self.role = role
-            self.goal = goal
-            self.backstory = backstory
-            self.retriever = retriever
-        
-        def process_query(self, question, section=None):
-            """Process a query using the retriever."""
-            try:
-                context = self.retriever.get_context_for_query(question, section)
-                if not context or context.strip() == "No relevant information found in the CV.":
-                    return f"I couldn't find specific information about '{question}' in the CV."
-                return context
-            except Exception as e:
-                return f"Error processing query: {str(e)}"
-    
-    cv_researcher = SimpleAgent(
-        role='CV Research Specialist',
-        goal='Find and extract relevant information from Mohammed Alakhras\'s CV to answer user questions accurately',
-        backstory='''You are an expert at analyzing CVs and finding relevant information. 
-        You have access to Mohammed Alakhras's complete CV and can search through all sections including 
-        Experience, Skills, Certifications, Education, and more. Your job is to find the most relevant 
-        information to answer user questions.''',
-        retriever=retriever
-    )
+    cv_researcher = create_simple_agent(retriever)
     
     cv_analyst = SimpleAgent(
         role='CV Content Analyst',
@@ -186,5 +196,6 @@ def create_simple_agents(retriever: CVRetriever):
     
     return {
         'researcher': cv_researcher,
-        'analyst': cv_analyst
+        'analyst': cv_analyst,
+        'simple': cv_researcher
     }
@@ -0,0 +1,77 @@
+import queue
+import threading
+import time
+from typing import Dict, Optional
+
+from crew.agents import CREW_VERBOSE
+from crew.tasks import create_task_templates, task_inputs
+
+class CrewPool:
+    """
+    Pre-built CrewAI crews reused across questions.
+
+    Each crew is built once with its own copies of the agents and task
+    templates whose {question} and {section} placeholders are filled in by
+    crew.kickoff(inputs=...), so answering a question no longer builds tasks
+    or a Crew. Kickoff interpolates a crew's tasks and agents in place, so a
+    crew runs one question at a time; when all are busy callers wait up to
+    `timeout` seconds and then get queue.Empty.
+
+    Args:
+        agents: CrewAI agents from create_agents
+        size: Number of crews, i.e. how many questions the crew path runs at once
+        timeout: Seconds to wait for a free crew (None waits indefinitely)
+    """
+
+    def __init__(self, agents: Dict, size: int = 4, timeout: Optional[float] = None):
+        # Imported here so loading the web app does not pay for CrewAI
+        from crewai import Crew
+
+        self.size = max(1, size)
+        self.timeout = timeout
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self.kickoffs = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+
+        start = time.perf_counter()
+        for _ in range(self.size):
+            crew_agents = {name: agents[name].copy() for name in ('researcher', 'analyst')}
+            tasks = create_task_templates(crew_agents)
+            self._idle.put(Crew(
+                agents=[crew_agents['researcher'], crew_agents['analyst']],
+                tasks=[tasks['research'], tasks['analysis']],
+                verbose=CREW_VERBOSE
+            ))
+        self.build_seconds = time.perf_counter() - start
+        print(f"Built {self.size} reusable crews in {self.build_seconds:.2f}s")
+
+    def kickoff(self, question: str, section: Optional[str] = None) -> str:
+        """Answer one question on the next free crew."""
+        try:
+            crew = self._idle.get_nowait()
+        except queue.Empty:
+            start = time.perf_counter()
+            crew = self._idle.get(timeout=self.timeout)
+            with self._lock:
+                self.waits += 1
+                self.wait_seconds += time.perf_counter() - start
+
+        try:
+            with self._lock:
+                self.kickoffs += 1
+            return str(crew.kickoff(inputs=task_inputs(question, section)))
+        finally:
+            self._idle.put(crew)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'size': self.size,
+                'idle': self._idle.qsize(),
+                'kickoffs': self.kickoffs,
+                'waits': self.waits,
+                'wait_seconds': round(self.wait_seconds, 3),
+                'build_seconds': round(self.build_seconds, 3)
+            }
@@ -1,25 +1,17 @@
 try:
     from crewai import Task
-    CREWAI_AVAILABLELE = True
+    CREWAI_AVAILABLE = True
 except ImportError:
     CREWAI_AVAILABLE = False
 import os
 
-def create_tasks(agents, question, section=None):
-    """Create CrewAI tasks for CV question answering."""
-
-    if not CREWAI_AVAILABLE:
-        # Return simple task objects for fallback mode
-        return create_simple_tasks(agents, question, section)
-
-    try:
-        # Research task
-        research_task = Task(
-            description=f"""
+# {question} and {section} are filled in per question, either directly (create_tasks)
+# or by crew.kickoff(inputs=...) on pooled crews (create_task_templates)
+RESEARCH_DESCRIPTION = """
             Research and find relevant information from Mohammed Alakhras's CV to answer the following question:
 
             Question: {question}
-            Section focus: {section if section else 'All sections'}
+            Section focus: {section}
 
             Your goal is to:
             1. Use the CV search tools to find relevant information
@@ -28,14 +20,9 @@ def create_tasks(agents, question, section=None):
             4. Gather comprehensive information to provide a complete answer
 
             Focus on finding factual information from the CV content.
-            """,
-            agent=agents['researcher'],
-            expected_output="Relevant information and context from the CV that answers the question"
-        )
-
-        # Analysis task
-        analysis_task = Task(
-            description=f"""
+            """
+
+ANALYSIS_DESCRIPTION = """
             Based on the research findings, provide a comprehensive and well-structured answer to:
 
             Question: {question}
@@ -48,21 +35,52 @@ def create_tasks(agents, question, section=None):
             5. Present the information in a conversational, informative tone
 
             Make sure to cite specific sections or experiences from the CV when relevant.
-            """,
-            agent=agents['analyst'],
-            expected_output="A comprehensive, well-structured answer based on CV information",
-            context=[research_task]
-        )
+            """
+
+def task_inputs(question, section=None):
+    """Values for the {question} and {section} placeholders."""
+    return {'question': question, 'section': section if section else 'All sections'}
+
+def _build_tasks(agents, research_description, analysis_description):
+    # Research task
+    research_task = Task(
+        description=research_description,
+        agent=agents['researcher'],
+        expected_output="Relevant information and context from the CV that answers the question"
+    )
+
+    # Analysis task
+    analysis_task = Task(
+        description=analysis_description,
+        agent=agents['analyst'],
+        expected_output="A comprehensive, well-structured answer based on CV information",
+        context=[research_task]
+    )
+
+    return {
+        'research': research_task,
+        'analysis': analysis_task
+    }
+
+def create_tasks(agents, question, section=None):
+    """Create CrewAI tasks for CV question answering."""
 
-        return {
-            'research': research_task,
-            'analysis': analysis_task
-        }
+    if not CREWAI_AVAILABLE:
+        # Return simple task objects for fallback mode
+        return create_simple_tasks(agents, question, section)
+
+    try:
+        inputs = task_inputs(question, section)
+        return _build_tasks(agents, RESEARCH_DESCRIPTION.format(**inputs), ANALYSIS_DESCRIPTION.format(**inputs))
 
     except Exception as e:
         print(f"CrewAI task creation failed: {e}")
         return create_simple_tasks(agents, question, section)
 
+def create_task_templates(agents):
+    """Create CrewAI tasks with {question} and {section} left for crew.kickoff(inputs=task_inputs(...))."""
+    return _build_tasks(agents, RESEARCH_DESCRIPTION, ANALYSIS_DESCRIPTION)
+
 def create_simple_tasks(agents, question, section=None):
     """Create simple task objects for fallback mode."""
 
@@ -84,11 +102,11 @@ def create_simple_tasks(agents, question, section=None):
 
     analysis_task = SimpleTask(
         description=f"Analyze and format answer for: {question}",
-        agent=agents['analyst'], 
+        agent=agents['analyst'],
         expected_output="Formatted professional answer"
     )
 
     return {
         'research': research_task,
         'analysis': analysis_task
-    }
\ No newline at end of file
+    }
@@ -22,6 +22,14 @@ class SimpleTool:
     def __call__(self, *args, **kwargs):
         return self.func(*args, **kwargs)
 
+def make_tool(name: str, description: str, func):
+    """A CrewAI Tool when CrewAI is installed (its agents only accept BaseTool instances), else a SimpleTool."""
+    try:
+        from crewai.tools.base_tool import Tool
+    except ImportError:
+        return SimpleTool(name=name, description=description, func=func)
+    return Tool(name=name, description=description, func=func)
+
 def cv_search_tool(query: str, section: Optional[str] = None) -> str:
     """
     Search through Mohammed Alakhras's CV to find relevant information.
@@ -104,19 +112,19 @@ def cv_content_tool(section: str) -> str:
         return f"Error retrieving section content: {str(e)}"
 
 # Create tool objects for CrewAI
-cv_search = SimpleTool(
+cv_search = make_tool(
     name="CV Search Tool",
     description="Search through Mohammed Alakhras's CV to find relevant information. This tool can search across all sections or focus on a specific section like Experience, Skills, etc. Use this tool to retrieve factual information from the CV to answer user questions.",
     func=cv_search_tool
 )
 
-cv_sections = SimpleTool(
+cv_sections = make_tool(
     name="CV Section List Tool", 
     description="Get a list of all available sections in Mohammed Alakhras's CV. Use this tool to understand what sections are available for more targeted searches.",
     func=cv_sections_tool
 )
 
-cv_content = SimpleTool(
+cv_content = make_tool(
     name="CV Section Content Tool",
     description="Get the complete content of a specific section from Mohammed Alakhras's CV. Use this when you need comprehensive information from a particular section.",
     func=cv_content_tool
@@ -0,0 +1,148 @@
+import random
+import threading
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from tokens import count_tokens
+
+class RateLimitExhausted(Exception):
+    """Raised when a batch is still rate limited after all retries."""
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Read the server's suggested wait from a rate limit error, if present."""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000.0
+        if headers.get('retry-after'):
+            return float(headers['retry-after'])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+def _is_retryable(error: Exception) -> bool:
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    if status is not None:
+        return status == 429 or status >= 500
+    return type(error).__name__ in ('APIConnectionError', 'APITimeoutError', 'RateLimitError')
+
+class BatchEmbedder:
+    """
+    Embed many texts through token-bounded batches sent from a bounded thread pool.
+
+    Batches that hit 429 (or a transient server error) are retried with exponential
+    backoff, honouring Retry-After (capped at max_delay) when the endpoint sends
+    it. Results are written back in input order regardless of which batch
+    finishes first.
+    """
+
+    def __init__(self, client, model: str, max_batch_tokens: int = 8000, max_batch_size: int = 128,
+                 max_workers: int = 4, max_retries: int = 6, base_delay: float = 0.5, max_delay: float = 30.0):
+        # The SDK's own retry loop would hide 429s from our backoff accounting
+        self.client = client.with_options(max_retries=0) if hasattr(client, 'with_options') else client
+        self.model = model
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self.stats = {'texts': 0, 'batches': 0, 'requests': 0, 'retries': 0, 'rate_limited': 0, 'seconds': 0.0}
+
+    def make_batches(self, texts: List[str]) -> List[List[int]]:
+        """Group text indices into batches bounded by model tokens and item count."""
+        batches = []
+        current = []
+        current_tokens = 0
+
+        for idx, text in enumerate(texts):
+            tokens = count_tokens(text)
+            if current and (current_tokens + tokens > self.max_batch_tokens or len(current) >= self.max_batch_size):
+                batches.append(current)
+                current = []
+                current_tokens = 0
+            current.append(idx)
+            current_tokens += tokens
+
+        if current:
+            batches.append(current)
+        return batches
+
+    def _count(self, name: str, amount=1):
+        with self._lock:
+            self.stats[name] += amount
+
+    def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        attempt = 0
+        while True:
+            self._count('requests')
+            try:
+                response = self.client.embeddings.create(model=self.model, input=batch)
+                # The API may return items out of order; 'index' is authoritative
+                data = sorted(response.data, key=lambda item: item.index)
+                return [item.embedding for item in data]
+            except Exception as e:
+                if not _is_retryable(e) or attempt >= self.max_retries:
+                    if getattr(e, 'status_code', None) == 429:
+                        raise RateLimitExhausted(f"Embedding batch still rate limited after {attempt} retries") from e
+                    raise
+
+                if getattr(e, 'status_code', None) == 429:
+                    self._count('rate_limited')
+                self._count('retries')
+
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+                    delay *= random.uniform(0.5, 1.0)
+                else:
+                    # A bad header must not stall an embedding worker indefinitely
+                    delay = min(max(delay, 0.0), self.max_delay)
+                time.sleep(delay)
+                attempt += 1
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed all texts.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            float32 matrix with one row per input text, in input order
+        """
+        start = time.perf_counter()
+        batches = self.make_batches(texts)
+        results: List[Optional[List[float]]] = [None] * len(texts)
+
+        def run(indices: List[int]):
+            vectors = self._embed_batch([texts[idx] for idx in indices])
+            if len(vectors) != len(indices):
+                raise ValueError(f"Expected {len(indices)} embeddings, got {len(vectors)}")
+            for idx, vector in zip(indices, vectors):
+                results[idx] = vector
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='embed') as pool:
+            # list() re-raises the first batch failure
+            list(pool.map(run, batches))
+
+        elapsed = time.perf_counter() - start
+        self._count('texts', len(texts))
+        self._count('batches', len(batches))
+        self._count('seconds', elapsed)
+
+        if not results:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.asarray(results, dtype=np.float32)
+
+    def throughput(self) -> Dict:
+        """Summary of work done so far, including texts per second."""
+        with self._lock:
+            stats = dict(self.stats)
+        stats['texts_per_second'] = stats['texts'] / stats['seconds'] if stats['seconds'] else 0.0
+        return stats
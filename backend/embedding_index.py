@@ -0,0 +1,89 @@
+import json
+import os
+import numpy as np
+from typing import Callable, Dict, List, Optional
+
+class EmbeddingIndex:
+    """Dense chunk embeddings stored as a row-normalized float32 matrix on disk."""
+
+    def __init__(self, matrix: np.ndarray, meta: Dict):
+        self.matrix = matrix
+        self.meta = meta
+
+    @staticmethod
+    def _paths(index_dir: str, key: str):
+        base = os.path.join(index_dir, key)
+        return base + '.npy', base + '.json'
+
+    @classmethod
+    def load(cls, index_dir: str, key: str, expected: Optional[Dict] = None) -> Optional['EmbeddingIndex']:
+        """
+        Memory-map a previously saved index.
+
+        Args:
+            index_dir: Directory holding the index files
+            key: Index key (normally the CV content hash)
+            expected: Metadata values that must match for the index to be reused
+
+        Returns:
+            The index, or None if it is missing or stale
+        """
+        matrix_path, meta_path = cls._paths(index_dir, key)
+        if not (os.path.exists(matrix_path) and os.path.exists(meta_path)):
+            return None
+
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as file:
+                meta = json.load(file)
+            for name, value in (expected or {}).items():
+                if meta.get(name) != value:
+                    return None
+
+            matrix = np.load(matrix_path, mmap_mode='r')
+            if matrix.dtype != np.float32 or matrix.shape[0] != meta.get('rows'):
+                return None
+            return cls(matrix, meta)
+        except Exception as e:
+            print(f"Ignoring unreadable embedding index {matrix_path}: {e}")
+            return None
+
+    @classmethod
+    def build(cls, texts: List[str], embed: Callable[[List[str]], Optional[np.ndarray]], meta: Optional[Dict] = None) -> Optional['EmbeddingIndex']:
+        """Embed all texts in one call and store the normalized vectors as one matrix."""
+        if not texts:
+            return None
+
+        vectors = embed(texts)
+        if vectors is None or len(vectors) != len(texts):
+            return None
+
+        matrix = normalize_rows(vectors)
+        meta = dict(meta or {})
+        meta.update({'rows': int(matrix.shape[0]), 'dim': int(matrix.shape[1])})
+        return cls(matrix, meta)
+
+    def save(self, index_dir: str, key: str):
+        """Write the matrix and its metadata atomically next to each other."""
+        os.makedirs(index_dir, exist_ok=True)
+        matrix_path, meta_path = self._paths(index_dir, key)
+
+        tmp_matrix = matrix_path + '.tmp'
+        with open(tmp_matrix, 'wb') as file:
+            np.save(file, np.ascontiguousarray(self.matrix, dtype=np.float32))
+        os.replace(tmp_matrix, matrix_path)
+
+        tmp_meta = meta_path + '.tmp'
+        with open(tmp_meta, 'w', encoding='utf-8') as file:
+            json.dump(self.meta, file)
+        os.replace(tmp_meta, meta_path)
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """Cosine similarity of a query vector against every row in one matmul."""
+        return self.matrix @ normalize_rows(query)
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize a vector or each row of a matrix as float32."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
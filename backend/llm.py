@@ -0,0 +1,88 @@
+import os
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+from dotenv import load_dotenv
+from metrics import stage_timer
+
+load_dotenv()
+
+SYSTEM_PROMPT = """You are a professional CV analyst answering questions about Mohammed Alakhras's CV.
+Answer only from the CV excerpts provided. Be clear, specific and conversational, and mention
+the CV sections your answer draws on. If the excerpts do not contain the answer, say so."""
+
+def build_messages(question: str, context: str, section: Optional[str] = None) -> List[Dict]:
+    """Chat messages asking the model to answer a question from retrieved CV context."""
+    focus = f"Section focus: {section}\n\n" if section else ""
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"{focus}CV excerpts:\n{context}\n\nQuestion: {question}"}
+    ]
+
+def _delta(chunk) -> Optional[str]:
+    # Azure sends a leading chunk with no choices (content filter results)
+    if not chunk.choices:
+        return None
+    return chunk.choices[0].delta.content
+
+class ChatClient:
+    """
+    Direct Azure OpenAI chat completions, used where the CrewAI pipeline cannot
+    stream or would hold a thread for the whole answer (the async serving path).
+    """
+
+    def __init__(self, client, deployment: str, temperature: float = 0, max_tokens: int = 4000, async_client=None):
+        self.client = client
+        self.async_client = async_client
+        self.deployment = deployment
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+
+    @classmethod
+    def from_env(cls) -> Optional['ChatClient']:
+        """Build a client on the shared connection pools from the AZURE_OPENAI_* variables, or None if they are not set."""
+        try:
+            from openai_clients import azure_clients
+            clients = azure_clients('chat')
+        except Exception as e:
+            print(f"Failed to initialize Azure OpenAI chat client: {e}")
+            return None
+        if clients is None:
+            return None
+
+        client, async_client = clients
+        return cls(client, os.getenv('AZURE_OPENAI_DEPLOYMENT', 'gpt-35-turbo'), async_client=async_client)
+
+    def _request(self, messages: List[Dict], stream: bool = False) -> Dict:
+        return {
+            "model": self.deployment,
+            "messages": messages,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "stream": stream
+        }
+
+    def complete(self, messages: List[Dict]) -> str:
+        with stage_timer('llm'):
+            response = self.client.chat.completions.create(**self._request(messages))
+        return response.choices[0].message.content or ""
+
+    async def acomplete(self, messages: List[Dict]) -> str:
+        with stage_timer('llm'):
+            response = await self.async_client.chat.completions.create(**self._request(messages))
+        return response.choices[0].message.content or ""
+
+    def stream(self, messages: List[Dict]) -> Iterator[str]:
+        """Yield answer text deltas as the model produces them (timed until the stream ends)."""
+        with stage_timer('llm'):
+            response = self.client.chat.completions.create(**self._request(messages, stream=True))
+            for chunk in response:
+                delta = _delta(chunk)
+                if delta:
+                    yield delta
+
+    async def astream(self, messages: List[Dict]) -> AsyncIterator[str]:
+        with stage_timer('llm'):
+            response = await self.async_client.chat.completions.create(**self._request(messages, stream=True))
+            async for chunk in response:
+                delta = _delta(chunk)
+                if delta:
+                    yield delta
@@ -1,14 +1,179 @@
+import hashlib
+import html
+import os
 import re
-import markdown
-from bs4 import BeautifulSoup
-from typing import List, Dict, Tuple
+from typing import Iterator, List, Dict, Optional, Tuple
+from metrics import timed
+from tokens import count_tokens, tail_tokens
+
+_ATX_HEADING = re.compile(r'^(#{1,6})(.*?)#*$')
+_SETEXT_UNDERLINE = re.compile(r'^ {0,3}(=+|-+)[ \t]*$')
+_RULE = re.compile(r'^ {0,3}([-*_])(?:[ \t]*\1){2,}[ \t]*$')
+_LIST_ITEM = re.compile(r'^( *)(?:[*+-]|\d+\.)[ \t]+(.*)$')
+_BLOCKQUOTE = re.compile(r'^ {0,3}> ?(.*)$')
+
+_ESCAPED = re.compile(r'\\([\\`*_{}\[\]()>#+\-.!])')
+_CODE_SPAN = re.compile(r'(`+)(.+?)\1', re.DOTALL)
+_IMAGE = re.compile(r'!\[[^\]]*\]\([^)]*\)')
+_LINK = re.compile(r'\[([^\]]*)\]\([^)]*\)')
+_AUTOLINK = re.compile(r'<((?:https?|ftp)://[^>\s]+|(?:mailto:)?[^>\s@]+@[^>\s]+)>')
+_HTML_TAG = re.compile(r'</?[A-Za-z][^>]*>')
+_STRONG = re.compile(r'(\*\*|__)(?=\S)(.+?)(?<=\S)\1', re.DOTALL)
+_EMPHASIS = re.compile(r'\*(?=\S)(.+?)(?<=\S)\*|(?<!\w)_(?=\S)(.+?)(?<=\S)_(?!\w)', re.DOTALL)
+_STASHED = re.compile('\ue000(\\d+)\ue001')
+
+def _plain_text(text: str) -> str:
+    """Strip inline markdown (emphasis, code, links, raw HTML, escapes) down to its visible text."""
+    stash = []
+
+    def keep(value: str) -> str:
+        stash.append(value)
+        return f'\ue000{len(stash) - 1}\ue001'
+
+    text = _ESCAPED.sub(lambda m: keep(m.group(1)), text)
+    text = _CODE_SPAN.sub(lambda m: keep(m.group(2).strip()), text)
+    text = _IMAGE.sub('', text)
+    text = _LINK.sub(r'\1', text)
+    text = _AUTOLINK.sub(lambda m: keep(m.group(1)), text)
+    text = _HTML_TAG.sub('', text)
+    text = _STRONG.sub(r'\2', text)
+    text = _EMPHASIS.sub(lambda m: m.group(1) or m.group(2), text)
+    text = html.unescape(text)
+    return _STASHED.sub(lambda m: stash[int(m.group(1))], text)
+
+def _join_lines(lines: List[str]) -> str:
+    """Join block lines, dropping hard-break trailing spaces, and return its plain text."""
+    text = '\n'.join(line.rstrip() if line.endswith('  ') else line for line in lines)
+    return _plain_text(text).strip()
+
+def iter_markdown_blocks(content: str) -> Iterator[Tuple[int, str]]:
+    """
+    Single pass over markdown lines, yielding (heading_level, text) for headings
+    and (0, text) for every paragraph and top-level list item, in document order.
+
+    Indented code blocks and horizontal rules produce nothing. Nested list items
+    are folded into their parent item so each piece of text is emitted once.
+    """
+    paragraph = []
+    item = None
+    blank_in_list = False
+    in_code = False
+    in_quote = False
+
+    def flush_paragraph():
+        if paragraph:
+            text = _join_lines(paragraph)
+            paragraph.clear()
+            if text:
+                return text
+        return None
+
+    for raw in content.splitlines():
+        line = raw.expandtabs(4)
+        stripped = line.strip()
+
+        if not stripped:
+            text = flush_paragraph()
+            if text:
+                yield 0, text
+            if item is not None:
+                blank_in_list = True
+            continue
+
+        indent = len(line) - len(line.lstrip(' '))
+
+        if in_code:
+            if indent >= 4:
+                continue
+            in_code = False
+
+        if item is not None:
+            marker = _LIST_ITEM.match(line)
+            heading = _ATX_HEADING.match(line)
+            if marker and indent < 4:
+                text = _join_lines(item)
+                if text:
+                    yield 0, text
+                item = [marker.group(2)]
+                blank_in_list = False
+                continue
+            if indent >= 4:
+                # Nested item or indented continuation of the current item
+                nested = _LIST_ITEM.match(line[4:])
+                item.append(nested.group(2) if nested else line[4:] if blank_in_list else line)
+                continue
+            if not blank_in_list and not heading and not _RULE.match(line):
+                quote = _BLOCKQUOTE.match(line)
+                item.append(quote.group(1) if quote else line)
+                continue
+
+            text = _join_lines(item)
+            if text:
+                yield 0, text
+            item = None
+            blank_in_list = False
+
+        heading = _ATX_HEADING.match(line)
+        if heading:
+            text = flush_paragraph()
+            if text:
+                yield 0, text
+            yield len(heading.group(1)), _plain_text(heading.group(2)).strip()
+            continue
+
+        setext = _SETEXT_UNDERLINE.match(line)
+        if setext and len(paragraph) == 1:
+            title = _join_lines(paragraph)
+            paragraph.clear()
+            yield (1 if setext.group(1).startswith('=') else 2), title
+            continue
+
+        if _RULE.match(line):
+            text = flush_paragraph()
+            if text:
+                yield 0, text
+            continue
+
+        if not paragraph:
+            marker = _LIST_ITEM.match(line)
+            if marker and indent < 4:
+                item = [marker.group(2)]
+                blank_in_list = False
+                continue
+            if indent >= 4:
+                in_code = True
+                continue
+
+        quote = _BLOCKQUOTE.match(line)
+        if quote and paragraph and not in_quote:
+            # A blockquote interrupts a plain paragraph
+            text = flush_paragraph()
+            if text:
+                yield 0, text
+        if not paragraph:
+            in_quote = bool(quote)
+        paragraph.append(quote.group(1) if quote else line)
+
+    text = flush_paragraph()
+    if text:
+        yield 0, text
+    if item is not None:
+        text = _join_lines(item)
+        if text:
+            yield 0, text
+
+def section_hash(content: str) -> str:
+    """Fingerprint of a section's content, stored on its chunks so a reindex can skip unchanged sections."""
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
 
 class CVLoader:
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, doc_id: Optional[str] = None):
         self.file_path = file_path
+        self.doc_id = doc_id or os.path.splitext(os.path.basename(file_path))[0]
         self.content = ""
         self.sections = {}
         
+    @timed('load')
     def load_content(self) -> str:
         """Load the markdown content from file."""
         try:
@@ -20,45 +185,48 @@ class CVLoader:
         except Exception as e:
             raise Exception(f"Error loading CV file: {str(e)}")
     
+    def content_hash(self) -> str:
+        """Return a SHA-256 hex digest of the loaded markdown content."""
+        if not self.content:
+            self.load_content()
+        return hashlib.sha256(self.content.encode('utf-8')).hexdigest()
+    
+    @timed('parse')
     def parse_sections(self) -> Dict[str, Dict]:
         """Parse the markdown content into structured sections."""
         if not self.content:
             self.load_content()
         
-        # Convert markdown to HTML for easier parsing
-        html = markdown.markdown(self.content)
-        soup = BeautifulSoup(html, 'html.parser')
-        
         sections = {}
         current_section = None
+        current_level = 2
         current_content = []
         
-        for element in soup.find_all(['h1', 'h2', 'h3', 'p', 'ul', 'li']):
-            if element.name in ['h1', 'h2']:
+        for level, text in iter_markdown_blocks(self.content):
+            if level in (1, 2):
                 # Save previous section if exists
                 if current_section and current_content:
                     sections[current_section] = {
                         'title': current_section,
                         'content': '\n'.join(current_content),
-                        'level': 1 if element.name == 'h1' else 2
+                        'level': current_level
                     }
                 
                 # Start new section
-                current_section = element.get_text().strip()
+                current_section = text
+                current_level = level
                 current_content = []
                 
-            elif current_section:
-                # Add content to current section
-                text = element.get_text().strip()
-                if text:
-                    current_content.append(text)
+            elif current_section and level in (0, 3) and text:
+                # Add paragraphs, list items and sub-headings to the current section
+                current_content.append(text)
         
         # Add the last section
         if current_section and current_content:
             sections[current_section] = {
                 'title': current_section,
                 'content': '\n'.join(current_content),
-                'level': 2
+                'level': current_level
             }
         
         self.sections = sections
@@ -81,60 +249,68 @@ class CVLoader:
         else:
             return excerpt + "..."
     
-    def get_chunks_for_embedding(self, chunk_size: int = 500, overlap: int = 50) -> List[Dict]:
-        """Break content into chunks suitable for embedding."""
+    @timed('chunk')
+    def get_chunks_for_embedding(self, chunk_size: int = 128, overlap: int = 16) -> List[Dict]:
+        """Break content into chunks of about chunk_size model tokens, overlapping by overlap tokens."""
         if not self.sections:
             self.parse_sections()
         
         chunks = []
-        chunk_id = 0
-        
         for section_name, section_data in self.sections.items():
-            content = section_data['content']
+            chunks.extend(self.chunk_section(section_name, section_data, chunk_size, overlap))
+        
+        for chunk_id, chunk in enumerate(chunks):
+            chunk['id'] = chunk_id
+        
+        return chunks
+    
+    def chunk_section(self, section_name: str, section_data: Dict, chunk_size: int = 128, overlap: int = 16) -> List[Dict]:
+        """Break one section into chunks; ids are assigned by the caller."""
+        content = section_data['content']
+        chunks = []
+        
+        def make_chunk(text: str) -> Dict:
+            return {
+                'id': None,
+                'doc_id': self.doc_id,
+                'content': text,
+                'section': section_name,
+                'metadata': {
+                    'section_title': section_name,
+                    'level': section_data['level'],
+                    'section_hash': section_hash(content)
+                }
+            }
+        
+        # Split content into sentences
+        sentences = re.split(r'[.!?]+', content)
+        
+        current_chunk = ""
+        current_tokens = 0
+        for sentence in sentences:
+            sentence = sentence.strip()
+            if not sentence:
+                continue
             
-            # Split content into sentences
-            sentences = re.split(r'[.!?]+', content)
+            # Check if adding this sentence would exceed chunk size (sentences are counted
+            # once; a joining space rarely changes the total)
+            sentence_tokens = count_tokens(sentence)
             
-            current_chunk = ""
-            for sentence in sentences:
-                sentence = sentence.strip()
-                if not sentence:
-                    continue
-                
-                # Check if adding this sentence would exceed chunk size
-                test_chunk = current_chunk + " " + sentence if current_chunk else sentence
+            if current_tokens + sentence_tokens > chunk_size and current_chunk:
+                # Save current chunk
+                chunks.append(make_chunk(current_chunk.strip()))
                 
-                if len(test_chunk) > chunk_size and current_chunk:
-                    # Save current chunk
-                    chunks.append({
-                        'id': chunk_id,
-                        'content': current_chunk.strip(),
-                        'section': section_name,
-                        'metadata': {
-                            'section_title': section_name,
-                            'level': section_data['level']
-                        }
-                    })
-                    chunk_id += 1
-                    
-                    # Start new chunk with overlap
-                    overlap_text = current_chunk[-overlap:] if len(current_chunk) > overlap else current_chunk
-                    current_chunk = overlap_text + " " + sentence
-                else:
-                    current_chunk = test_chunk
-            
-            # Add the last chunk for this section
-            if current_chunk.strip():
-                chunks.append({
-                    'id': chunk_id,
-                    'content': current_chunk.strip(),
-                    'section': section_name,
-                    'metadata': {
-                        'section_title': section_name,
-                        'level': section_data['level']
-                    }
-                })
-                chunk_id += 1
+                # Start new chunk with overlap
+                overlap_text = tail_tokens(current_chunk, overlap)
+                current_chunk = overlap_text + " " + sentence
+                current_tokens = count_tokens(overlap_text) + sentence_tokens
+            else:
+                current_chunk = current_chunk + " " + sentence if current_chunk else sentence
+                current_tokens += sentence_tokens
+        
+        # Add the last chunk for this section
+        if current_chunk.strip():
+            chunks.append(make_chunk(current_chunk.strip()))
         
         return chunks
     
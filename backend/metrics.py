@@ -0,0 +1,171 @@
+"""
+In-process latency histograms and counters, rendered in the Prometheus text format.
+
+Recording is a perf_counter() pair plus a locked bucket increment, so metrics
+cost a few microseconds per stage whether or not anything scrapes
+/api/metrics; rendering happens only on a scrape.
+"""
+import bisect
+import functools
+import threading
+import time
+from typing import Dict, List, Sequence, Tuple
+
+# Seconds; spans cache hits (sub-millisecond) to full crew runs (minutes)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Tuple, extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}')
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last is +Inf), sum, count]
+        self._series: Dict[Tuple, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, *labels):
+        slot = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][slot] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    def time(self, *labels) -> '_Timer':
+        """Context manager observing the duration of its block."""
+        return _Timer(self, labels)
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = sorted((labels, ([*series[0]], series[1], series[2])) for labels, series in self._series.items())
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = f'le="{_number(bound)}"'
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {count}')
+        return lines
+
+class _Timer:
+    # A plain class rather than @contextmanager: entering and exiting a generator costs several times more
+    __slots__ = ('histogram', 'labels', 'start')
+
+    def __init__(self, histogram: Histogram, labels: Tuple):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+        return False
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = Registry()
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'cv_stage_seconds', 'Time spent in each stage of loading, indexing and answering', ['stage']))
+FALLBACKS = REGISTRY.register(Counter(
+    'cv_fallbacks_total', 'Times a degraded path was taken, by kind', ['kind']))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'cv_http_request_seconds', 'HTTP request latency (time to first byte for streams)', ['endpoint', 'method', 'status']))
+SEMANTIC_CACHE = REGISTRY.register(Counter(
+    'cv_semantic_cache_total', 'Semantic answer cache lookups by result (hit, miss, false_hit)', ['result']))
+UPSTREAM_HTTP = REGISTRY.register(Counter(
+    'cv_upstream_http_total', 'Azure OpenAI HTTP requests, new connections and TLS handshakes per shared pool',
+    ['pool', 'event']))
+COALESCED = REGISTRY.register(Counter(
+    'cv_coalesced_requests_total', 'Questions answered by waiting on an identical in-flight question'))
+PROMPT_TOKENS = REGISTRY.register(Histogram(
+    'cv_prompt_tokens', 'Model tokens per grounded chat prompt (system prompt, packed CV context and question)',
+    buckets=(128, 256, 512, 1024, 1536, 2048, 3072, 4096, 8192, 16384)))
+ROUTE_SECONDS = REGISTRY.register(Histogram(
+    'cv_route_seconds', 'Answer latency by router decision (not_found, extract, direct, crew)', ['route']))
+
+def stage_timer(stage: str):
+    """Context manager timing a block into cv_stage_seconds{stage=...}."""
+    return STAGE_SECONDS.time(stage)
+
+def timed(stage: str):
+    """Decorator timing every call of a function into cv_stage_seconds{stage=...}."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                STAGE_SECONDS.observe(time.perf_counter() - start, stage)
+        return wrapper
+    return decorate
+
+def count_fallback(kind: str):
+    FALLBACKS.inc(kind)
+
+def render() -> str:
+    return REGISTRY.render()
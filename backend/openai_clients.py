@@ -0,0 +1,127 @@
+"""
+Process-wide Azure OpenAI clients over one shared, pooled HTTP transport.
+
+Embeddings and chat completions (the direct chat client and the crew's LLM)
+share a sync and an async connection pool, so a request reuses a kept-alive
+(TLS) connection instead of opening its own.
+Each operation gets its own timeouts: EMBED_TIMEOUT for embeddings,
+LLM_TIMEOUT for chat, both with HTTP_CONNECT_TIMEOUT to connect. HTTP/2 is
+used when the h2 package is installed (HTTP2=auto). Trace callbacks count
+requests, new connections and TLS handshakes per pool for /api/health and
+/api/metrics.
+"""
+import importlib.util
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from metrics import UPSTREAM_HTTP
+
+# Trace events (httpcore names) counted per pool
+_TRACED_EVENTS = {
+    'connection.connect_tcp.complete': 'connection',
+    'connection.start_tls.complete': 'tls_handshake',
+    'http11.send_request_headers.started': 'request',
+    'http2.send_request_headers.started': 'request'
+}
+
+_lock = threading.Lock()
+_pools = None
+
+def _http2_enabled() -> bool:
+    setting = os.getenv('HTTP2', 'auto').lower()
+    if setting == 'auto':
+        return importlib.util.find_spec('h2') is not None
+    return setting in ('1', 'true', 'yes')
+
+def _record(pool: str, event: str):
+    name = _TRACED_EVENTS.get(event)
+    if name:
+        UPSTREAM_HTTP.inc(pool, name)
+
+def _make_pools() -> Dict:
+    import openai
+
+    # openai's own HTTP library (httpx, or httpx2 in newer SDKs) provides the Limits type
+    limits = type(openai.DEFAULT_CONNECTION_LIMITS)(
+        max_connections=int(os.getenv('HTTP_MAX_CONNECTIONS', '100')),
+        max_keepalive_connections=int(os.getenv('HTTP_MAX_KEEPALIVE', '20')),
+        keepalive_expiry=float(os.getenv('HTTP_KEEPALIVE_EXPIRY', '30'))
+    )
+    http2 = _http2_enabled()
+
+    def sync_trace(event: str, info: Dict):
+        _record('sync', event)
+
+    async def async_trace(event: str, info: Dict):
+        _record('async', event)
+
+    def add_sync_trace(request):
+        request.extensions['trace'] = sync_trace
+
+    async def add_async_trace(request):
+        request.extensions['trace'] = async_trace
+
+    return {
+        'http2': http2,
+        'limits': limits,
+        'sync': openai.DefaultHttpxClient(limits=limits, http2=http2, event_hooks={'request': [add_sync_trace]}),
+        'async': openai.DefaultAsyncHttpxClient(limits=limits, http2=http2, event_hooks={'request': [add_async_trace]})
+    }
+
+def _shared_pools() -> Dict:
+    global _pools
+    with _lock:
+        if _pools is None:
+            _pools = _make_pools()
+        return _pools
+
+def timeout_for(operation: str):
+    """openai.Timeout for 'embedding' or 'chat' requests."""
+    import openai
+    seconds = float(os.getenv('EMBED_TIMEOUT', '30')) if operation == 'embedding' else float(os.getenv('LLM_TIMEOUT', '120'))
+    return openai.Timeout(seconds, connect=float(os.getenv('HTTP_CONNECT_TIMEOUT', '5')))
+
+def azure_clients(operation: str) -> Optional[Tuple]:
+    """
+    Sync and async Azure OpenAI clients on the shared pools, with the operation's timeouts.
+
+    Args:
+        operation: 'embedding' or 'chat'
+
+    Returns:
+        (AzureOpenAI, AsyncAzureOpenAI), or None without AZURE_OPENAI_API_KEY and AZURE_OPENAI_ENDPOINT
+    """
+    api_key = os.getenv('AZURE_OPENAI_API_KEY')
+    endpoint = os.getenv('AZURE_OPENAI_ENDPOINT')
+    if not (api_key and endpoint):
+        return None
+
+    import openai
+    pools = _shared_pools()
+    settings = {
+        "api_key": api_key,
+        "azure_endpoint": endpoint,
+        "api_version": os.getenv('AZURE_OPENAI_API_VERSION', '2024-08-01-preview'),
+        "timeout": timeout_for(operation)
+    }
+    return (openai.AzureOpenAI(http_client=pools['sync'], **settings),
+            openai.AsyncAzureOpenAI(http_client=pools['async'], **settings))
+
+def pool_stats() -> Optional[Dict]:
+    """Requests, new connections, TLS handshakes and the reuse ratio per pool (None before first use)."""
+    if _pools is None:
+        return None
+
+    stats = {'http2': _pools['http2'], 'max_connections': _pools['limits'].max_connections,
+             'max_keepalive_connections': _pools['limits'].max_keepalive_connections}
+    for pool in ('sync', 'async'):
+        requests = int(UPSTREAM_HTTP.value(pool, 'request'))
+        connections = int(UPSTREAM_HTTP.value(pool, 'connection'))
+        stats[pool] = {
+            'requests': requests,
+            'connections': connections,
+            'tls_handshakes': int(UPSTREAM_HTTP.value(pool, 'tls_handshake')),
+            'reuse_ratio': round(1 - connections / requests, 3) if requests else 0.0
+        }
+    return stats
@@ -0,0 +1,71 @@
+import gzip
+import hashlib
+import json
+from typing import Any, Dict, Optional, Tuple
+
+def _accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Whether an Accept-Encoding header allows gzip (q=0 refuses it)."""
+    weights = {}
+    for part in (accept_encoding or '').split(','):
+        coding, *params = [item.strip() for item in part.split(';')]
+        weight = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding.lower()] = weight
+    return weights.get('gzip', weights.get('*', 0.0)) > 0
+
+class PrecomputedResponse:
+    """
+    A JSON payload serialized, gzip-compressed and hashed once, then served as bytes.
+
+    The ETag is a strong validator over the JSON body (the gzip representation
+    gets its own tag), so a client revalidating with If-None-Match costs one
+    header comparison and a 304. Build a new instance whenever the data changes.
+
+    Args:
+        payload: JSON-serializable response data
+    """
+
+    def __init__(self, payload: Any):
+        self.body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        digest = hashlib.sha256(self.body).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+        # mtime=0 keeps the compressed bytes identical across rebuilds of the same payload
+        gzipped = gzip.compress(self.body, compresslevel=9, mtime=0)
+        self.gzipped = gzipped if len(gzipped) < len(self.body) else None
+        self.gzip_etag = f'"{digest}-gzip"'
+        self._validators = {self.etag, self.gzip_etag}
+
+    def not_modified(self, if_none_match: Optional[str]) -> bool:
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == '*':
+            return True
+        # If-None-Match uses weak comparison, so W/ prefixes added by proxies still match
+        return any(tag.strip().removeprefix('W/') in self._validators for tag in if_none_match.split(','))
+
+    def select(self, if_none_match: Optional[str] = None, accept_encoding: Optional[str] = None) -> Tuple[int, bytes, Dict[str, str]]:
+        """
+        Pick the response for a request's validator and encoding headers.
+
+        Returns:
+            (status, body, headers); status is 304 with an empty body when the client's copy is current
+        """
+        use_gzip = self.gzipped is not None and _accepts_gzip(accept_encoding)
+        headers = {
+            'ETag': self.gzip_etag if use_gzip else self.etag,
+            'Cache-Control': 'no-cache',
+            'Vary': 'Accept-Encoding'
+        }
+        if self.not_modified(if_none_match):
+            return 304, b'', headers
+
+        if use_gzip:
+            headers['Content-Encoding'] = 'gzip'
+            return 200, self.gzipped, headers
+        return 200, self.body, headers
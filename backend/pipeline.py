@@ -0,0 +1,425 @@
+import asyncio
+import json
+import logging
+import queue
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from llm import ChatClient, build_messages
+from metrics import PROMPT_TOKENS, count_fallback, stage_timer, timed
+from tokens import count_message_tokens
+
+logger = logging.getLogger(__name__)
+
+NOT_FOUND_MARKER = "couldn't find specific information"
+ANSWER_PREFIX = "Based on the CV information:\n\n"
+
+def format_answer(question: str, answer: Optional[str]) -> str:
+    """Wrap a raw agent answer in the user-facing response text."""
+    if not answer or NOT_FOUND_MARKER in answer:
+        return f"I couldn't find specific information about '{question}' in the CV. Please try a different question or check the available sections."
+    return f"{ANSWER_PREFIX}{answer}"
+
+def grounded_prompt(retriever, question: str, chunks: List[Dict], section: Optional[str] = None) -> Tuple[List[Dict], Dict]:
+    """
+    Chat messages answering a question from retrieved chunks packed into the context token budget.
+
+    Returns:
+        (messages, usage) where usage has 'prompt_tokens' and the packing's
+        'context_tokens', 'chunks' and 'dropped'
+    """
+    context, packing = retriever.pack_context(chunks)
+    messages = build_messages(question, context, section)
+    usage = {'prompt_tokens': count_message_tokens(messages), **packing}
+    PROMPT_TOKENS.observe(usage['prompt_tokens'])
+    logger.info(f"Prompt of {usage['prompt_tokens']} tokens ({usage['context_tokens']} context tokens "
+                f"from {usage['chunks']} chunks, {usage['dropped']} dropped)")
+    return messages, usage
+
+@timed('citations')
+def build_citations(chunks: List[Dict]) -> List[Dict]:
+    """One citation per distinct section, in ranking order."""
+    citations = []
+    seen_sections = set()
+    for chunk in chunks:
+        if chunk['section'] not in seen_sections:
+            citations.append({"section": chunk['section']})
+            seen_sections.add(chunk['section'])
+    return citations
+
+def run_agents(agents: Dict, question: str, section: Optional[str] = None, crew_pool=None) -> str:
+    """
+    Answer with the CrewAI researcher/analyst crew, falling back to the simple agent.
+
+    With a crew_pool the question runs on a pre-built crew; otherwise tasks
+    and a Crew are built for this question.
+    """
+    # Only CrewAI agents have tools; simple agents answer directly
+    if hasattr(agents['researcher'], 'tools'):
+        try:
+            if crew_pool is not None:
+                with stage_timer('crew'):
+                    return crew_pool.kickoff(question, section)
+
+            # Imported here so loading the web app does not pay for CrewAI
+            from crewai import Crew
+            from crew.agents import CREW_VERBOSE
+            from crew.tasks import create_tasks
+
+            # Create tasks
+            tasks = create_tasks(agents, question, section)
+
+            # Create crew
+            crew = Crew(
+                agents=[agents['researcher'], agents['analyst']],
+                tasks=[tasks['research'], tasks['analysis']],
+                verbose=CREW_VERBOSE
+            )
+
+            # Execute crew
+            with stage_timer('crew'):
+                result = crew.kickoff()
+            return str(result)
+
+        except queue.Empty:
+            logger.warning(f"No free crew within {crew_pool.timeout}s, answering with the simple agent")
+            count_fallback('crew_pool_timeout_to_simple_agent')
+        except Exception as e:
+            logger.error(f"CrewAI execution failed: {e}")
+            count_fallback('crewai_to_simple_agent')
+
+    # Use simple agent processing
+    return simple_answer(agents, question, section)
+
+@timed('simple_agent')
+def simple_answer(agents: Dict, question: str, section: Optional[str] = None) -> str:
+    """Answer with the simple agent's process_query (no crew), also present alongside CrewAI agents."""
+    return agents['simple'].process_query(question, section)
+
+def answer_question(retriever, agents: Dict, question: str, section: Optional[str] = None, crew_pool=None,
+                    router=None, chat: Optional[ChatClient] = None) -> Dict:
+    """
+    Run the full answer pipeline and return the /api/ask response body.
+
+    With a router, retrieval runs once and its scores pick the answer path:
+    no LLM for confidently matched short sections the question names, one
+    grounded chat completion for confident single-section matches, and the
+    crew for the rest, including questions nothing was retrieved for.
+    Without one every question goes to the crew.
+
+    Args:
+        retriever: The CV retriever
+        agents: Agents from create_agents
+        question: The user's question
+        section: Optional section to focus on
+        crew_pool: Optional CrewPool for the crew path
+        router: Optional AnswerRouter
+        chat: Chat client for the direct path (the simple agent answers without one)
+    """
+    usage = None
+    if router is None:
+        answer = format_answer(question, run_agents(agents, question, section, crew_pool))
+        citations = build_citations(retriever.search(question, section, top_k=3))
+    else:
+        start = time.perf_counter()
+        chunks = retriever.search(question, section, top_k=10)
+        decision = router.route(retriever, question, section, chunks)
+        answer, usage = _routed_answer(retriever, agents, question, section, chunks, decision, chat, crew_pool)
+        citations = build_citations(decision.get('section_chunks') or chunks[:3])
+        router.record(question, decision, time.perf_counter() - start)
+    return {
+        "answer": answer,
+        "citations": citations,
+        "sources": [cite["section"] for cite in citations],
+        "usage": usage
+    }
+
+def _record_not_found(decision: Dict, answer: Optional[str]):
+    """Re-label a crew decision as not_found when the crew came back empty."""
+    if decision['route'] == 'crew' and (not answer or NOT_FOUND_MARKER in answer):
+        decision.update(route='not_found', reason=f"crew found nothing ({decision['reason']})")
+
+def _routed_answer(retriever, agents: Dict, question: str, section: Optional[str], chunks: List[Dict],
+                   decision: Dict, chat: Optional[ChatClient], crew_pool) -> Tuple[str, Optional[Dict]]:
+    route = decision['route']
+    if route == 'extract':
+        return format_answer(question, retriever.format_context(decision['section_chunks'])), None
+    if route == 'direct':
+        if chat is not None:
+            messages, usage = grounded_prompt(retriever, question, chunks, section)
+            return format_answer(question, chat.complete(messages)), usage
+        return format_answer(question, simple_answer(agents, question, section)), None
+    answer = run_agents(agents, question, section, crew_pool)
+    _record_not_found(decision, answer)
+    return format_answer(question, answer), None
+
+async def answer_question_async(retriever, agents: Dict, question: str, section: Optional[str] = None,
+                                chat: Optional[ChatClient] = None,
+                                llm_slots: Optional[asyncio.Semaphore] = None, router=None, crew_pool=None) -> Dict:
+    """
+    Async counterpart of answer_question for the ASGI app, with the same answer paths.
+
+    Retrieval awaits the query embedding and the router's direct path awaits
+    one grounded chat completion on the event loop. The crew (every question
+    without a router) runs on a worker thread, since crew.kickoff() is
+    synchronous; like the Flask app it is bounded by the crew pool. LLM
+    work of either kind holds one of llm_slots.
+
+    Args:
+        retriever: The CV retriever
+        agents: Agents from create_agents
+        question: The user's question
+        section: Optional section to focus on
+        chat: Chat client for the direct path (the simple agent answers without one)
+        llm_slots: Semaphore bounding concurrent LLM work
+        router: Optional AnswerRouter
+        crew_pool: Optional CrewPool for the crew path
+    """
+    start = time.perf_counter()
+    chunks = await retriever.search_async(question, section, top_k=10)
+    decision = router.route(retriever, question, section, chunks) if router is not None else {'route': 'crew'}
+
+    usage = None
+    if decision['route'] == 'extract':
+        answer = retriever.format_context(decision['section_chunks'])
+    else:
+        async with llm_slots or nullcontext():
+            if decision['route'] == 'direct' and chat is not None:
+                messages, usage = grounded_prompt(retriever, question, chunks, section)
+                answer = await chat.acomplete(messages)
+            elif decision['route'] == 'direct':
+                answer = await asyncio.to_thread(simple_answer, agents, question, section)
+            else:
+                answer = await asyncio.to_thread(run_agents, agents, question, section, crew_pool)
+
+    citations = build_citations(decision.get('section_chunks') or chunks[:3])
+    if router is not None:
+        _record_not_found(decision, answer)
+        router.record(question, decision, time.perf_counter() - start)
+    return {
+        "answer": format_answer(question, answer),
+        "citations": citations,
+        "sources": [cite["section"] for cite in citations],
+        "usage": usage
+    }
+
+def batch_items(questions: List, default_section: Optional[str] = None) -> List[Dict]:
+    """Normalize a batch request's questions (strings or {question, section} objects) to dicts."""
+    items = []
+    for item in questions:
+        if isinstance(item, str):
+            items.append({"question": item, "section": default_section})
+        elif isinstance(item, dict):
+            items.append({"section": default_section, **item})
+        else:
+            items.append({})
+    return items
+
+def answer_batch(retriever, agents: Dict, items: List[Dict], chat: Optional[ChatClient] = None,
+                 max_workers: int = 8, answer_cache=None) -> List[Dict]:
+    """
+    Answer many questions with shared retrieval and a bounded LLM worker pool.
+
+    Every question is embedded in one call and retrieved per section with
+    retriever.search_many; the per-question LLM steps then run on at most
+    max_workers threads. A failing item gets an error entry instead of failing
+    the batch.
+
+    Args:
+        retriever: The CV retriever
+        agents: Agents from create_agents (used when no chat client is available)
+        items: Dicts with 'question' and optional 'section'
+        chat: Chat client for grounded answers
+        max_workers: Concurrent LLM calls
+        answer_cache: Optional AnswerCache consulted and filled per item, under the
+            'batch' pipeline so /api/ask never serves these cheaper answers
+
+    Returns:
+        One result per item, in order: the /api/ask response plus 'question'
+        and 'section', or 'error' and 'message'
+    """
+    version = retriever.content_hash
+    results: List[Optional[Dict]] = [None] * len(items)
+    pending = []
+    for idx, item in enumerate(items):
+        question = item.get('question') if isinstance(item, dict) else None
+        section = (item.get('section') or None) if isinstance(item, dict) else None
+        if not isinstance(question, str) or not question.strip():
+            results[idx] = {"question": question, "section": section, "error": "Question is required"}
+            continue
+
+        question = question.strip()
+        cached = answer_cache.get(question, section, version, pipeline='batch') if answer_cache else None
+        if cached is not None:
+            results[idx] = {"question": question, "section": section, **cached}
+        else:
+            pending.append((idx, question, section))
+
+    if not pending:
+        return results
+
+    # Shared retrieval: one embedding call, then one scoring pass per distinct section
+    embeddings = retriever.get_query_embeddings([question for _, question, _ in pending])
+    if embeddings is None and retriever.chunk_embeddings is not None:
+        # The endpoint just failed for these questions; rank every group by BM25 instead of retrying per section
+        count_fallback('embedding_to_bm25')
+    retrieved = {}
+    by_section = {}
+    for position, (idx, question, section) in enumerate(pending):
+        by_section.setdefault(section, []).append(position)
+    for section, positions in by_section.items():
+        group = retriever.search_many(
+            [pending[position][1] for position in positions], section, top_k=10,
+            embeddings=embeddings[positions] if embeddings is not None else None,
+            dense=embeddings is not None
+        )
+        retrieved.update(zip(positions, group))
+
+    def answer(position: int) -> Dict:
+        idx, question, section = pending[position]
+        chunks = retrieved[position]
+        usage = None
+        if chat is not None and chunks:
+            messages, usage = grounded_prompt(retriever, question, chunks, section)
+            raw = chat.complete(messages)
+        else:
+            raw = simple_answer(agents, question, section)
+        citations = build_citations(chunks[:3])
+        return {
+            "answer": format_answer(question, raw),
+            "citations": citations,
+            "sources": [cite["section"] for cite in citations],
+            "usage": usage
+        }
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='ask-batch') as pool:
+        futures = [pool.submit(answer, position) for position in range(len(pending))]
+        for (idx, question, section), future in zip(pending, futures):
+            try:
+                response = future.result()
+            except Exception as e:
+                logger.error(f"Batch question failed ({question}): {e}")
+                results[idx] = {"question": question, "section": section,
+                                "error": "Failed to process question", "message": str(e)}
+                continue
+            if answer_cache:
+                answer_cache.set(question, section, version, response, pipeline='batch')
+            results[idx] = {"question": question, "section": section, **response}
+
+    return results
+
+def _word_deltas(text: str) -> Iterator[str]:
+    """Split text into word-sized pieces (keeping whitespace) to stream a non-LLM answer."""
+    for match in re.finditer(r'\S+\s*|\s+', text):
+        yield match.group(0)
+
+def format_sse(event: str, data: Dict) -> str:
+    """Encode one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _citations_event(citations: List[Dict], start: float) -> Tuple[str, Dict]:
+    return "citations", {
+        "citations": citations,
+        "sources": [cite["section"] for cite in citations],
+        "retrieval_ms": (time.perf_counter() - start) * 1000
+    }
+
+def _done_event(parts: List[str], citations: List[Dict], first_token_ms: Optional[float], start: float,
+                usage: Optional[Dict] = None) -> Tuple[str, Dict]:
+    return "done", {
+        "answer": "".join(parts),
+        "citations": citations,
+        "sources": [cite["section"] for cite in citations],
+        "usage": usage,
+        "first_token_ms": first_token_ms,
+        "total_ms": (time.perf_counter() - start) * 1000
+    }
+
+def _error_event(e: Exception) -> Tuple[str, Dict]:
+    logger.error(f"Streaming answer failed: {e}")
+    return "error", {"error": "Failed to process question", "message": str(e)}
+
+def stream_answer(retriever, agents: Dict, question: str, section: Optional[str] = None,
+                  chat: Optional[ChatClient] = None) -> Iterator[Tuple[str, Dict]]:
+    """
+    Answer a question as a sequence of (event, data) pairs for server-sent events.
+
+    Emits 'citations' as soon as retrieval finishes, then 'token' deltas while the
+    LLM writes a single grounded completion over the retrieved context, then
+    'done' with the full answer. Without an LLM the simple agent's answer is
+    streamed instead. Errors after the first event are reported as an 'error' event.
+
+    Args:
+        retriever: The CV retriever
+        agents: Agents from create_agents (used when no chat client is available)
+        question: The user's question
+        section: Optional section to focus on
+        chat: Chat client to stream from; None streams the simple agent answer
+    """
+    start = time.perf_counter()
+    chunks = retriever.search(question, section, top_k=10)
+    citations = build_citations(chunks[:3])
+    yield _citations_event(citations, start)
+
+    parts = []
+    first_token_ms = None
+    usage = None
+    try:
+        if chat is not None and chunks:
+            messages, usage = grounded_prompt(retriever, question, chunks, section)
+            deltas = chat.stream(messages)
+            parts.append(ANSWER_PREFIX)
+            yield "token", {"text": ANSWER_PREFIX}
+        else:
+            deltas = _word_deltas(format_answer(question, simple_answer(agents, question, section)))
+
+        for delta in deltas:
+            if first_token_ms is None:
+                first_token_ms = (time.perf_counter() - start) * 1000
+            parts.append(delta)
+            yield "token", {"text": delta}
+    except Exception as e:
+        yield _error_event(e)
+        return
+
+    yield _done_event(parts, citations, first_token_ms, start, usage)
+
+async def stream_answer_async(retriever, agents: Dict, question: str, section: Optional[str] = None,
+                              chat: Optional[ChatClient] = None,
+                              llm_slots: Optional[asyncio.Semaphore] = None) -> AsyncIterator[Tuple[str, Dict]]:
+    """Async counterpart of stream_answer; the LLM slot is held while tokens stream."""
+    start = time.perf_counter()
+    chunks = await retriever.search_async(question, section, top_k=10)
+    citations = build_citations(chunks[:3])
+    yield _citations_event(citations, start)
+
+    parts = []
+    first_token_ms = None
+    usage = None
+    try:
+        async with llm_slots or nullcontext():
+            if chat is not None and chunks:
+                messages, usage = grounded_prompt(retriever, question, chunks, section)
+                parts.append(ANSWER_PREFIX)
+                yield "token", {"text": ANSWER_PREFIX}
+                deltas = chat.astream(messages)
+            else:
+                answer = await asyncio.to_thread(simple_answer, agents, question, section)
+                deltas = _async_iter(_word_deltas(format_answer(question, answer)))
+
+            async for delta in deltas:
+                if first_token_ms is None:
+                    first_token_ms = (time.perf_counter() - start) * 1000
+                parts.append(delta)
+                yield "token", {"text": delta}
+    except Exception as e:
+        yield _error_event(e)
+        return
+
+    yield _done_event(parts, citations, first_token_ms, start, usage)
+
+async def _async_iter(items: Iterator[str]) -> AsyncIterator[str]:
+    for item in items:
+        yield item
@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+def _lower_thread_priority(niceness: int):
+    """Raise this thread's nice value so prewarming yields the CPU to request threads (Linux only)."""
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), niceness)
+    except (AttributeError, OSError):
+        pass
+
+class AnswerPrewarmer:
+    """
+    Answer a fixed set of questions in the background to fill the answer cache.
+
+    Runs at most max_workers questions at once on low-priority threads. Each
+    run is tied to the retriever's content hash; refresh() starts over for a
+    new CV version and abandons the remaining questions of the old one.
+
+    Args:
+        retriever: The CV retriever (its content_hash versions the answers)
+        answer_cache: AnswerCache the answers land in (checked to skip warm questions)
+        answer: Callable (question, section) -> /api/ask response; it stores the answer,
+            unless the CV changed while answering
+        questions: (question, section) pairs to warm
+        max_workers: Concurrent answers
+        niceness: Nice increment for the worker threads
+    """
+
+    def __init__(self, retriever, answer_cache, answer: Callable[[str, Optional[str]], Dict],
+                 questions: List[Tuple[str, Optional[str]]], max_workers: int = 2, niceness: int = 10):
+        self.retriever = retriever
+        self.answer_cache = answer_cache
+        self.answer = answer
+        self.questions = list(questions)
+        self.max_workers = max(1, max_workers)
+        self.niceness = niceness
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._thread = None
+        self._progress = {}
+        self._stop = threading.Event()
+
+    def start(self) -> 'AnswerPrewarmer':
+        return self.refresh()
+
+    def refresh(self) -> 'AnswerPrewarmer':
+        """(Re)warm every question for the retriever's current content version."""
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            version = self.retriever.content_hash
+            self._progress = {
+                'state': 'running', 'version': version, 'total': len(self.questions),
+                'answered': 0, 'already_cached': 0, 'failed': 0, 'seconds': None
+            }
+        self._thread = threading.Thread(target=self._run, args=(generation, version), name='prewarm', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _current(self, generation: int) -> bool:
+        return generation == self._generation and not self._stop.is_set()
+
+    def _count(self, generation: int, name: str):
+        with self._lock:
+            if generation == self._generation:
+                self._progress[name] += 1
+
+    def _warm(self, generation: int, version: str, question: str, section: Optional[str]):
+        if not self._current(generation):
+            return
+        if self.answer_cache.contains(question, section, version):
+            self._count(generation, 'already_cached')
+            return
+        try:
+            self.answer(question, section)
+        except Exception as e:
+            print(f"Prewarm failed for '{question}': {e}")
+            self._count(generation, 'failed')
+            return
+        self._count(generation, 'answered')
+
+    def _run(self, generation: int, version: str):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='prewarm',
+                                initializer=_lower_thread_priority, initargs=(self.niceness,)) as pool:
+            for question, section in self.questions:
+                pool.submit(self._warm, generation, version, question, section)
+
+        with self._lock:
+            if generation == self._generation:
+                self._progress['state'] = 'done' if not self._stop.is_set() else 'stopped'
+                self._progress['seconds'] = round(time.perf_counter() - start, 3)
+                print(f"Prewarmed {self._progress['answered']} answers "
+                      f"({self._progress['already_cached']} already cached, {self._progress['failed']} failed) "
+                      f"in {self._progress['seconds']:.1f}s")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            progress = dict(self._progress)
+        if not progress:
+            return {'state': 'idle', 'total': len(self.questions), 'warm': 0, 'warm_ratio': 0.0}
+
+        warm = progress['answered'] + progress['already_cached']
+        progress['warm'] = warm
+        progress['warm_ratio'] = warm / progress['total'] if progress['total'] else 1.0
+        return progress
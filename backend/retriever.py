@@ -1,86 +1,553 @@
+import hashlib
+import re
+import threading
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from typing import List, Dict, Optional, Tuple
-import openai
+from typing import Iterable, List, Dict, Optional, Tuple
 import os
 from dotenv import load_dotenv
+from embedding_index import EmbeddingIndex, normalize_rows
+from embedder import BatchEmbedder
+from cache import LRUCache, normalize_text
+from ann import IVFIndex
+from metrics import count_fallback, stage_timer, timed
+from tokens import PACKING_STRATEGIES, context_block, pack_chunks
 
 load_dotenv()
 
-class CVRetriever:
-    def __init__(self, chunks: List[Dict]):
+# Files EmbeddingIndex and IVFIndex persist per content version (a SHA-256 hex key)
+INDEX_FILE_PATTERN = re.compile(r'^([0-9a-f]{64})\.(?:npy|json|ivf\.npz)$')
+
+class SearchIndex:
+    """
+    Immutable snapshot of everything a search reads: the chunks, their sparse and
+    dense vectors and the section row lookup. CVRetriever swaps whole snapshots,
+    so a search that started on one snapshot never sees a half-updated index.
+    """
+    
+    def __init__(self, chunks: List[Dict], content_hash: Optional[str], vectorizer, chunk_vectors,
+                 section_rows: Dict[str, np.ndarray], doc_rows: Dict[str, np.ndarray], chunks_digest: str,
+                 chunk_embeddings: Optional[EmbeddingIndex] = None, ann: Optional[IVFIndex] = None):
         self.chunks = chunks
-        self.vectorizer = TfidfVectorizer(stop_words='english', max_features=1000)
-        self.chunk_vectors = None
+        self.content_hash = content_hash
+        self.vectorizer = vectorizer
+        self.chunk_vectors = chunk_vectors
+        self.section_rows = section_rows
+        self.doc_rows = doc_rows
+        self.chunks_digest = chunks_digest
+        self.chunk_embeddings = chunk_embeddings
+        self.ann = ann
+
+class CVRetriever:
+    def __init__(self, chunks: Iterable[Dict], content_hash: Optional[str] = None, index_dir: Optional[str] = None):
+        self.index_dir = index_dir
         self.openai_client = None
+        self.async_openai_client = None
+        self.query_embeddings = LRUCache(
+            maxsize=int(os.getenv('EMBED_CACHE_SIZE', '1024')),
+            ttl=float(os.getenv('EMBED_CACHE_TTL', '3600'))
+        )
+        # Approximate dense search: 'auto' enables IVF once the corpus reaches ANN_MIN_CHUNKS
+        self.ann_mode = os.getenv('CV_ANN', 'auto').lower()
+        self.ann_min_chunks = int(os.getenv('ANN_MIN_CHUNKS', '50000'))
+        self.ann_lists = int(os.getenv('ANN_LISTS', '0')) or None
+        self.ann_nprobe = int(os.getenv('ANN_NPROBE', '16'))
+        # On reload the IVF partitions are reused unless more than this fraction of rows is new or edited
+        self.ann_retrain_fraction = float(os.getenv('ANN_RETRAIN_FRACTION', '0.2'))
+        # Hybrid ranking: BM25 parameters, reciprocal rank fusion constant, how deep each
+        # ranking is fused, and the cosine floor below which a dense match is ignored
+        self.bm25_k1 = float(os.getenv('BM25_K1', '1.5'))
+        self.bm25_b = float(os.getenv('BM25_B', '0.75'))
+        self.rrf_k = int(os.getenv('RRF_K', '60'))
+        self.fusion_depth = int(os.getenv('FUSION_DEPTH', '100'))
+        self.min_dense_score = float(os.getenv('HYBRID_MIN_DENSE', '0.3'))
+        # LLM context: model tokens of retrieved chunks per prompt, and how they are chosen
+        self.context_tokens = int(os.getenv('CONTEXT_TOKEN_BUDGET', '1500'))
+        self.context_packing = os.getenv('CONTEXT_PACKING', 'greedy').lower()
+        if self.context_packing not in PACKING_STRATEGIES:
+            raise ValueError(f"CONTEXT_PACKING must be one of {PACKING_STRATEGIES}, got '{self.context_packing}'")
+        self._update_lock = threading.Lock()
         self._setup_openai()
-        self._build_index()
+        # Chunks may be streamed from a CorpusLoader; they are consumed exactly once here
+        self._index = self._build_index(chunks, content_hash)
+    
+    # The current snapshot's fields, for callers that read them directly
+    chunks = property(lambda self: self._index.chunks)
+    content_hash = property(lambda self: self._index.content_hash)
+    vectorizer = property(lambda self: self._index.vectorizer)
+    chunk_vectors = property(lambda self: self._index.chunk_vectors)
+    section_rows = property(lambda self: self._index.section_rows)
+    chunks_digest = property(lambda self: self._index.chunks_digest)
+    chunk_embeddings = property(lambda self: self._index.chunk_embeddings)
+    
+    def snapshot(self) -> SearchIndex:
+        """The index currently used for searches."""
+        return self._index
     
     def _setup_openai(self):
-        """Setup Azure OpenAI client if credentials are available."""
+        """Setup Azure OpenAI clients if credentials are available."""
         try:
-            api_key = os.getenv('AZURE_OPENAI_API_KEY')
-            endpoint = os.getenv('AZURE_OPENAI_ENDPOINT')
-            api_version = os.getenv('AZURE_OPENAI_API_VERSION', '2024-08-01-preview')
+            # Imported on first use: openai (like scikit-learn below) is slow to import
+            from openai_clients import azure_clients
             
-            if api_key and endpoint:
-                self.openai_client = openai.AzureOpenAI(
-                    api_key=api_key,
-                    azure_endpoint=endpoint,
-                    api_version=api_version
-                )
+            # Shared connection pools with embedding timeouts; the async client is used by the
+            # async serving path so query embeddings never block the event loop
+            clients = azure_clients('embedding')
+            if clients:
+                self.openai_client, self.async_openai_client = clients
                 print("Azure OpenAI client initialized successfully")
             else:
-                print("Azure OpenAI credentials not found, using TF-IDF fallback")
+                print("Azure OpenAI credentials not found, using BM25-only retrieval")
         except Exception as e:
             print(f"Failed to initialize Azure OpenAI client: {e}")
-            print("Using TF-IDF fallback for retrieval")
+            print("Using BM25-only retrieval")
+    
+    @timed('index_build')
+    def _build_index(self, chunks: Iterable[Dict], content_hash: Optional[str] = None, previous: Optional[SearchIndex] = None) -> SearchIndex:
+        """
+        Build a search index snapshot from chunks, reusing dense vectors from a previous snapshot.
+        
+        Chunks are read in a single pass, so a streamed corpus is never buffered before
+        indexing; the snapshot keeps the chunk dicts because searches return them.
+        """
+        indexed: List[Dict] = []
+        digest = hashlib.sha256()
+        section_rows = {}
+        doc_rows = {}
+        
+        def texts():
+            # Collect chunks, row maps and the content digest while the vectorizer reads the texts
+            for idx, chunk in enumerate(chunks):
+                if idx:
+                    digest.update(b'\x00')
+                digest.update(chunk['content'].encode('utf-8'))
+                section_rows.setdefault(chunk['section'].lower(), []).append(idx)
+                doc_rows.setdefault(chunk.get('doc_id'), []).append(idx)
+                indexed.append(chunk)
+                yield chunk['content']
+        
+        # Precompute BM25 term weights so scoring a query is one sparse column slice and product
+        from sklearn.feature_extraction.text import CountVectorizer
+        vectorizer = CountVectorizer(stop_words='english')
+        try:
+            counts = vectorizer.fit_transform(texts())
+        except ValueError:
+            if not indexed:
+                raise ValueError("No chunks provided for indexing")
+            raise
+        chunk_vectors = self._bm25_weights(counts)
+        chunks = indexed
+        chunks_digest = digest.hexdigest()
+        
+        # Row indices of each section's and document's chunks, so filtered search is a row slice
+        section_rows = {
+            name: np.array(rows, dtype=np.int64) for name, rows in section_rows.items()
+        }
+        doc_rows = {
+            name: np.array(rows, dtype=np.int64) for name, rows in doc_rows.items()
+        }
+        print(f"Built search index with {len(chunks)} chunks")
+        
+        index = SearchIndex(chunks, content_hash or chunks_digest, vectorizer, chunk_vectors,
+                            section_rows, doc_rows, chunks_digest)
+        index.chunk_embeddings = self._build_embedding_index(index, previous)
+        index.ann = self._build_ann_index(index, previous)
+        return index
     
-    def _build_index(self):
-        """Build the search index from chunks."""
-        if not self.chunks:
-            raise ValueError("No chunks provided for indexing")
+    def _bm25_weights(self, counts):
+        """Turn a chunk x term count matrix into BM25 weights (CSC, for fast column slicing)."""
+        counts = counts.tocsr().astype(np.float32)
+        doc_lengths = np.asarray(counts.sum(axis=1)).ravel()
+        avg_length = doc_lengths.mean() if doc_lengths.mean() > 0 else 1.0
+        
+        doc_freq = np.bincount(counts.indices, minlength=counts.shape[1])
+        idf = np.log1p((counts.shape[0] - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
         
-        # Extract text content from chunks
-        texts = [chunk['content'] for chunk in self.chunks]
+        # Per-row length normalization, expanded to one value per stored entry
+        norm = self.bm25_k1 * (1 - self.bm25_b + self.bm25_b * doc_lengths / avg_length)
+        row_norm = np.repeat(norm, np.diff(counts.indptr)).astype(np.float32)
         
-        # Build TF-IDF vectors
-        self.chunk_vectors = self.vectorizer.fit_transform(texts)
-        print(f"Built search index with {len(texts)} chunks")
+        tf = counts.data
+        counts.data = idf[counts.indices] * tf * (self.bm25_k1 + 1) / (tf + row_norm)
+        return counts.tocsc()
+    
+    def _build_embedding_index(self, index: SearchIndex, previous: Optional[SearchIndex] = None) -> Optional[EmbeddingIndex]:
+        """Load the dense chunk index from disk, embedding the chunks only if it is missing or stale."""
+        if not self.openai_client:
+            return None
+        
+        texts = [chunk['content'] for chunk in index.chunks]
+        expected = {
+            'model': self._embed_deployment(),
+            'rows': len(texts),
+            'chunks_digest': index.chunks_digest
+        }
+        
+        embeddings = None
+        if self.index_dir:
+            embeddings = EmbeddingIndex.load(self.index_dir, index.content_hash, expected)
+            if embeddings is not None:
+                print(f"Loaded embedding index for {len(texts)} chunks from {self.index_dir}")
+        
+        if embeddings is None:
+            embed = lambda batch: self._embed_reusing(batch, previous)
+            embeddings = EmbeddingIndex.build(texts, embed, expected)
+            if embeddings is None:
+                print("Could not embed CV chunks, using BM25-only retrieval")
+                return None
+            if self.index_dir:
+                try:
+                    embeddings.save(self.index_dir, index.content_hash)
+                except OSError as e:
+                    print(f"Failed to persist embedding index: {e}")
+            print(f"Built embedding index with {len(texts)} chunks")
+        
+        return embeddings
+    
+    def _build_ann_index(self, index: SearchIndex, previous: Optional[SearchIndex] = None) -> Optional[IVFIndex]:
+        """
+        Partition the dense matrix for approximate search when the corpus is large enough.
+        
+        A saved index for this content is loaded as is. On a reload the previous
+        snapshot's centroids are reused and only new or edited rows are assigned
+        to them; k-means is re-run when too much changed for them to still fit.
+        """
+        if index.chunk_embeddings is None or self.ann_mode == 'off':
+            return None
+        if self.ann_mode == 'auto' and len(index.chunks) < self.ann_min_chunks:
+            return None
+        
+        path = os.path.join(self.index_dir, f"{index.content_hash}.ivf.npz") if self.index_dir else None
+        ann = IVFIndex.load(path) if path else None
+        if ann is None or ann.stats()['rows'] != len(index.chunks):
+            ann = self._reassign_ann_index(index, previous)
+            if ann is None:
+                ann = IVFIndex.build(index.chunk_embeddings.matrix, n_lists=self.ann_lists)
+            if path:
+                try:
+                    ann.save(path)
+                except OSError as e:
+                    print(f"Failed to persist ANN index: {e}")
+        
+        print(f"Using IVF approximate search with {ann.n_lists} lists, nprobe={self.ann_nprobe}")
+        return ann
+    
+    def _reassign_ann_index(self, index: SearchIndex, previous: Optional[SearchIndex]) -> Optional[IVFIndex]:
+        """The previous IVF index carried over to this snapshot, or None when it must be retrained."""
+        if previous is None or previous.ann is None:
+            return None
+        if self.ann_lists and self.ann_lists != previous.ann.n_lists:
+            return None
+        
+        # Unchanged chunks keep their vectors (see _embed_reusing), so they keep their partitions
+        known = {chunk['content']: idx for idx, chunk in enumerate(previous.chunks)}
+        previous_rows = np.array([known.get(chunk['content'], -1) for chunk in index.chunks], dtype=np.int64)
+        changed = int(np.count_nonzero(previous_rows < 0))
+        if changed > self.ann_retrain_fraction * len(previous_rows):
+            return None
+        
+        print(f"Reused IVF centroids, assigned {changed} new or edited rows")
+        return previous.ann.reassign(index.chunk_embeddings.matrix, previous_rows)
+    
+    def _prune_index_dir(self, index: SearchIndex):
+        """Delete persisted indexes (<key>.npy, .json, .ivf.npz) of every content version but the current one."""
+        if not self.index_dir or index.chunk_embeddings is None:
+            return
+        removed = 0
+        try:
+            names = os.listdir(self.index_dir)
+        except OSError:
+            return
+        for name in names:
+            match = INDEX_FILE_PATTERN.match(name)
+            if match and match.group(1) != index.content_hash:
+                try:
+                    os.remove(os.path.join(self.index_dir, name))
+                    removed += 1
+                except OSError as e:
+                    print(f"Failed to prune {name} from {self.index_dir}: {e}")
+        if removed:
+            print(f"Pruned {removed} index files of older CV versions from {self.index_dir}")
+    
+    def _embed_reusing(self, texts: List[str], previous: Optional[SearchIndex]) -> Optional[np.ndarray]:
+        """Embed texts, copying vectors for any text already embedded in the previous snapshot."""
+        if previous is None or previous.chunk_embeddings is None:
+            return self._embed_chunks(texts)
+        
+        known = {chunk['content']: idx for idx, chunk in enumerate(previous.chunks)}
+        missing = [text for text in dict.fromkeys(texts) if text not in known]
+        fresh = {}
+        if missing:
+            vectors = self._embed_chunks(missing)
+            if vectors is None:
+                return None
+            fresh = dict(zip(missing, vectors))
+        
+        print(f"Reused {len(texts) - len(missing)} chunk embeddings, embedded {len(missing)}")
+        old_matrix = previous.chunk_embeddings.matrix
+        return np.vstack([
+            fresh[text] if text in fresh else old_matrix[known[text]]
+            for text in texts
+        ])
+    
+    def replace_document(self, doc_id: str, chunks: List[Dict], content_hash: Optional[str] = None) -> SearchIndex:
+        """
+        Replace one document's chunks and swap in a rebuilt index.
+        
+        The new snapshot is built off to the side while searches keep using the
+        current one; dense vectors of unchanged chunks are reused, so only new
+        or edited chunks are embedded.
+        
+        Args:
+            doc_id: Document whose chunks are replaced (or added)
+            chunks: The document's new chunks, in order
+            content_hash: Content hash for the new index; defaults to a digest of all chunk texts
+        
+        Returns:
+            The snapshot now used for searches
+        """
+        with self._update_lock:
+            previous = self._index
+            merged = []
+            inserted = False
+            for chunk in previous.chunks:
+                if chunk.get('doc_id') == doc_id:
+                    if not inserted:
+                        merged.extend(chunks)
+                        inserted = True
+                    continue
+                merged.append(chunk)
+            if not inserted:
+                merged.extend(chunks)
+            
+            # Renumber copies so chunks still referenced by the old snapshot are untouched
+            merged = [{**chunk, 'id': idx} for idx, chunk in enumerate(merged)]
+            
+            index = self._build_index(merged, content_hash, previous)
+            self._index = index
+            # Searches still on the previous snapshot keep their memory map after its files are deleted
+            self._prune_index_dir(index)
+            return index
+    
+    def _embed_deployment(self) -> str:
+        return os.getenv('AZURE_OPENAI_EMBED_DEPLOYMENT', 'text-embedding-3-large')
+    
+    @timed('chunk_embedding')
+    def _embed_chunks(self, texts: List[str]) -> Optional[np.ndarray]:
+        """Embed chunk texts in batches; returns None if any batch fails."""
+        embedder = BatchEmbedder(
+            self.openai_client,
+            self._embed_deployment(),
+            max_workers=int(os.getenv('EMBED_MAX_WORKERS', '4'))
+        )
+        try:
+            vectors = embedder.embed(texts)
+        except Exception as e:
+            print(f"Error embedding chunks: {e}")
+            return None
+        
+        stats = embedder.throughput()
+        print(f"Embedded {stats['texts']} chunks in {stats['batches']} batches "
+              f"({stats['texts_per_second']:.1f} chunks/s, {stats['retries']} retries)")
+        return vectors
     
     def _get_embedding(self, text: str) -> Optional[np.ndarray]:
-        """Get embedding from Azure OpenAI."""
+        """Get embedding from Azure OpenAI, reusing cached vectors for repeated queries."""
         if not self.openai_client:
             return None
         
+        key = normalize_text(text)
+        cached = self.query_embeddings.get(key)
+        if cached is not None:
+            return cached
+        
         try:
-            deployment = os.getenv('AZURE_OPENAI_EMBED_DEPLOYMENT', 'text-embedding-3-large')
-            response = self.openai_client.embeddings.create(
-                model=deployment,
-                input=text
-            )
-            return np.array(response.data[0].embedding)
+            with stage_timer('embedding'):
+                response = self.openai_client.embeddings.create(
+                    model=self._embed_deployment(),
+                    input=text
+                )
+            embedding = np.array(response.data[0].embedding, dtype=np.float32)
+            self.query_embeddings.set(key, embedding)
+            return embedding
         except Exception as e:
             print(f"Error getting embedding: {e}")
             return None
     
-    def _tfidf_search(self, query: str, top_k: int = 5) -> List[Tuple[Dict, float]]:
-        """Fallback search using TF-IDF similarity."""
-        query_vector = self.vectorizer.transform([query])
-        similarities = cosine_similarity(query_vector, self.chunk_vectors)[0]
+    def embed_query(self, text: str) -> Optional[np.ndarray]:
+        """A query's embedding from the shared query cache, or None without a dense index."""
+        if self.chunk_embeddings is None:
+            return None
+        return self._get_embedding(text)
+    
+    async def embed_query_async(self, text: str) -> Optional[np.ndarray]:
+        if self.chunk_embeddings is None:
+            return None
+        return await self._get_embedding_async(text)
+    
+    def get_query_embeddings(self, texts: List[str]) -> Optional[np.ndarray]:
+        """
+        Embeddings for several queries, one row each, fetching all cache misses together.
         
-        # Get top k most similar chunks
-        top_indices = np.argsort(similarities)[::-1][:top_k]
+        Returns None when there is no dense index or embedding fails, in which
+        case callers fall back to BM25-only ranking.
+        """
+        if not self.openai_client or self.chunk_embeddings is None:
+            return None
         
-        results = []
-        for idx in top_indices:
-            if similarities[idx] > 0.1:  # Minimum similarity threshold
-                results.append((self.chunks[idx], float(similarities[idx])))
+        keys = [normalize_text(text) for text in texts]
+        found = {}
+        for key in keys:
+            if key not in found:
+                vector = self.query_embeddings.get(key)
+                if vector is not None:
+                    found[key] = vector
+        
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+        if missing:
+            embedder = BatchEmbedder(self.openai_client, self._embed_deployment(), max_workers=1)
+            try:
+                with stage_timer('embedding'):
+                    fetched = embedder.embed(list(missing.values()))
+            except Exception as e:
+                print(f"Error getting embeddings: {e}")
+                return None
+            for key, vector in zip(missing, fetched):
+                self.query_embeddings.set(key, vector)
+                found[key] = vector
+        
+        return np.vstack([found[key] for key in keys]).astype(np.float32)
+    
+    async def _get_embedding_async(self, text: str) -> Optional[np.ndarray]:
+        """Async counterpart of _get_embedding, sharing the same query cache."""
+        if not self.async_openai_client:
+            return None
+        
+        key = normalize_text(text)
+        cached = self.query_embeddings.get(key)
+        if cached is not None:
+            return cached
+        
+        try:
+            with stage_timer('embedding'):
+                response = await self.async_openai_client.embeddings.create(
+                    model=self._embed_deployment(),
+                    input=text
+                )
+            embedding = np.array(response.data[0].embedding, dtype=np.float32)
+            self.query_embeddings.set(key, embedding)
+            return embedding
+        except Exception as e:
+            print(f"Error getting embedding: {e}")
+            return None
+    
+    def _top_k(self, similarities: np.ndarray, top_k: int) -> np.ndarray:
+        """Indices of the top_k largest similarities, best first."""
+        if top_k < len(similarities):
+            candidates = np.argpartition(similarities, -top_k)[-top_k:]
+            return candidates[np.argsort(similarities[candidates])[::-1]]
+        return np.argsort(similarities)[::-1]
+    
+    def _ranked(self, scores: np.ndarray, min_score: float) -> np.ndarray:
+        """Positions of the best-scoring entries above min_score, best first, up to fusion_depth."""
+        best = self._top_k(scores, self.fusion_depth)
+        return best[scores[best] > min_score]
+    
+    def _bm25_scores(self, index: SearchIndex, query: str, rows: Optional[np.ndarray]) -> np.ndarray:
+        """BM25 score of every chunk (or every row in rows) for the query."""
+        query_counts = index.vectorizer.transform([query])
+        if not query_counts.nnz:
+            return np.zeros(len(index.chunks) if rows is None else len(rows), dtype=np.float32)
+        
+        scores = index.chunk_vectors[:, query_counts.indices] @ query_counts.data.astype(np.float32)
+        return scores if rows is None else scores[rows]
+    
+    def _use_ann(self, index: SearchIndex, rows: Optional[np.ndarray]) -> bool:
+        # Small filtered subsets are cheaper to scan exactly than to probe
+        return index.ann is not None and (rows is None or len(rows) > 4 * self.fusion_depth)
+    
+    def _dense_ranking(self, index: SearchIndex, embedding: np.ndarray, rows: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """Dense ranking as (positions, scores), positions relative to rows when given."""
+        depth = self.fusion_depth
+        if self._use_ann(index, rows):
+            allowed = None
+            if rows is not None:
+                allowed = np.zeros(len(index.chunks), dtype=bool)
+                allowed[rows] = True
+            ann_rows, scores = index.ann.search(index.chunk_embeddings.matrix, embedding, depth,
+                                                self.ann_nprobe, allowed)
+            if len(ann_rows) >= min(depth, len(index.chunks) if rows is None else len(rows)):
+                positions = ann_rows if rows is None else np.searchsorted(rows, ann_rows)
+                keep = scores > self.min_dense_score
+                return positions[keep], scores[keep]
+        
+        if rows is None:
+            scores = index.chunk_embeddings.scores(embedding)
+        else:
+            scores = np.asarray(index.chunk_embeddings.matrix[rows]) @ normalize_rows(embedding)
+        positions = self._ranked(scores, self.min_dense_score)
+        return positions, scores[positions]
+    
+    @timed('search')
+    def _hybrid_search(self, index: SearchIndex, query: str, embedding: Optional[np.ndarray],
+                       rows: Optional[np.ndarray], top_k: int) -> List[Dict]:
+        """Rank chunks for one query by fusing its BM25 and dense rankings."""
+        bm25 = self._bm25_scores(index, query, rows)
+        dense_ranking = self._dense_ranking(index, embedding, rows) if embedding is not None else None
+        return self._fuse(index, bm25, dense_ranking, rows, top_k)
+    
+    def _fuse(self, index: SearchIndex, bm25: np.ndarray, dense_ranking: Optional[Tuple[np.ndarray, np.ndarray]],
+              rows: Optional[np.ndarray], top_k: int) -> List[Dict]:
+        """
+        Fuse the BM25 and dense rankings with reciprocal rank fusion.
+        
+        Each ranking contributes 1 / (rrf_k + rank) for its top fusion_depth
+        entries; without a dense ranking the BM25 ranking is used alone.
+        """
+        size = len(bm25)
+        fused = np.zeros(size, dtype=np.float64)
+        
+        bm25_positions = self._ranked(bm25, 0.0)
+        fused[bm25_positions] += 1.0 / (self.rrf_k + np.arange(1, len(bm25_positions) + 1))
+        
+        dense = np.full(size, np.nan, dtype=np.float32)
+        if dense_ranking is not None:
+            dense_positions, dense_scores = dense_ranking
+            dense[dense_positions] = dense_scores
+            fused[dense_positions] += 1.0 / (self.rrf_k + np.arange(1, len(dense_positions) + 1))
         
+        candidates = np.flatnonzero(fused)
+        best = candidates[self._top_k(fused[candidates], top_k)]
+        
+        results = []
+        for position in best:
+            chunk_idx = int(rows[position]) if rows is not None else int(position)
+            results.append({
+                **index.chunks[chunk_idx],
+                'similarity': float(fused[position]),
+                'scores': {
+                    'bm25': float(bm25[position]),
+                    'dense': None if np.isnan(dense[position]) else float(dense[position])
+                }
+            })
         return results
     
-    def search(self, query: str, section: Optional[str] = None, top_k: int = 5) -> List[Dict]:
+    def _filter_rows(self, index: SearchIndex, section: Optional[str], doc_id: Optional[str] = None) -> Optional[np.ndarray]:
+        """Precomputed chunk rows matching the filters, or None to search everything."""
+        rows = None
+        if section:
+            rows = index.section_rows.get(section.lower())
+            if rows is None:
+                print(f"No chunks found for section: {section}")
+        
+        if doc_id:
+            doc_rows = index.doc_rows.get(doc_id, np.zeros(0, dtype=np.int64))
+            rows = doc_rows if rows is None else np.intersect1d(rows, doc_rows, assume_unique=True)
+        return rows
+    
+    def search(self, query: str, section: Optional[str] = None, top_k: int = 5, doc_id: Optional[str] = None) -> List[Dict]:
         """
         Search for relevant chunks based on query and optional section filter.
         
@@ -88,66 +555,126 @@ class CVRetriever:
             query: The search query
             section: Optional section to filter by
             top_k: Number of top results to return
+            doc_id: Optional document (CV) to restrict results to
         
         Returns:
             List of relevant chunks with metadata
         """
+        # Read one snapshot so a concurrent reindex cannot mix old and new rows
+        index = self._index
+        try:
+            rows = self._filter_rows(index, section, doc_id)
+            
+            # The dense ranking joins the fusion only when a dense index exists
+            embedding = self._get_embedding(query) if index.chunk_embeddings is not None else None
+            if embedding is None and index.chunk_embeddings is not None:
+                count_fallback('embedding_to_bm25')
+            return self._hybrid_search(index, query, embedding, rows, top_k)
+        
+        except Exception as e:
+            print(f"Error in search: {e}")
+            count_fallback('search_error_to_leading_chunks')
+            # Return a fallback result
+            return index.chunks[:top_k] if index.chunks else []
+    
+    def search_many(self, queries: List[str], section: Optional[str] = None, top_k: int = 5,
+                    doc_id: Optional[str] = None, embeddings: Optional[np.ndarray] = None,
+                    dense: bool = True) -> List[List[Dict]]:
+        """
+        Search for several queries at once, returning one result list per query.
+        
+        All queries are embedded together and, for exact dense search, scored
+        against the chunk matrix in a single matrix-matrix product; BM25 is one
+        sparse product for the whole batch.
+        
+        Args:
+            queries: The search queries
+            section: Optional section to filter by
+            top_k: Number of top results per query
+            doc_id: Optional document (CV) to restrict results to
+            embeddings: Precomputed query embeddings (one row per query)
+            dense: False ranks by BM25 only without embedding the queries, e.g. when
+                the caller's own embedding call for them already failed
+        
+        Returns:
+            A list of result lists, in query order
+        """
+        if not queries:
+            return []
+        
+        index = self._index
         try:
-            # Filter chunks by section if specified
-            search_chunks = self.chunks
-            if section:
-                search_chunks = [
-                    chunk for chunk in self.chunks 
-                    if chunk['section'].lower() == section.lower()
-                ]
-                if not search_chunks:
-                    print(f"No chunks found for section: {section}")
-                    search_chunks = self.chunks
+            rows = self._filter_rows(index, section, doc_id)
+            if rows is not None and not len(rows):
+                return [[] for _ in queries]
             
-            # Try Azure OpenAI embedding search first
-            embedding = self._get_embedding(query)
+            if index.chunk_embeddings is None or not dense:
+                embeddings = None
+            elif embeddings is None:
+                embeddings = self.get_query_embeddings(queries)
+                if embeddings is None:
+                    count_fallback('embedding_to_bm25')
             
-            if embedding is not None and hasattr(self, 'chunk_embeddings'):
-                # Use embedding-based search (if we had pre-computed embeddings)
-                return self._embedding_search(query, embedding, search_chunks, top_k)
-            else:
-                # Fall back to TF-IDF search
-                if section:
-                    # Rebuild vectorizer for filtered chunks
-                    texts = [chunk['content'] for chunk in search_chunks]
-                    if texts:
-                        temp_vectorizer = TfidfVectorizer(stop_words='english', max_features=1000)
-                        temp_vectors = temp_vectorizer.fit_transform(texts)
-                        query_vector = temp_vectorizer.transform([query])
-                        similarities = cosine_similarity(query_vector, temp_vectors)[0]
-                        
-                        top_indices = np.argsort(similarities)[::-1][:top_k]
-                        results = []
-                        for idx in top_indices:
-                            if similarities[idx] > 0.1:
-                                chunk = search_chunks[idx].copy()
-                                chunk['similarity'] = float(similarities[idx])
-                                results.append(chunk)
-                        return results
+            with stage_timer('search'):
+                # (chunks x queries) BM25 scores in one sparse product
+                query_counts = index.vectorizer.transform(queries).astype(np.float32)
+                bm25 = (index.chunk_vectors @ query_counts.T).toarray()
+                if rows is not None:
+                    bm25 = bm25[rows]
                 
-                # Use global TF-IDF search
-                results = self._tfidf_search(query, top_k)
-                return [
-                    {**chunk, 'similarity': score} 
-                    for chunk, score in results
-                ]
+                dense = None
+                if embeddings is not None and not self._use_ann(index, rows):
+                    matrix = index.chunk_embeddings.matrix if rows is None else index.chunk_embeddings.matrix[rows]
+                    dense = np.asarray(matrix) @ normalize_rows(embeddings).T
+                
+                results = []
+                for col, query in enumerate(queries):
+                    dense_ranking = None
+                    if dense is not None:
+                        positions = self._ranked(dense[:, col], self.min_dense_score)
+                        dense_ranking = (positions, dense[positions, col])
+                    elif embeddings is not None:
+                        dense_ranking = self._dense_ranking(index, embeddings[col], rows)
+                    results.append(self._fuse(index, np.ascontiguousarray(bm25[:, col]), dense_ranking, rows, top_k))
+                return results
+        
+        except Exception as e:
+            print(f"Error in batch search: {e}")
+            count_fallback('search_error_to_leading_chunks')
+            return [index.chunks[:top_k] if index.chunks else [] for _ in queries]
+    
+    async def search_async(self, query: str, section: Optional[str] = None, top_k: int = 5, doc_id: Optional[str] = None) -> List[Dict]:
+        """
+        Same as search, but awaits the query embedding instead of blocking on it.
+        
+        Scoring itself is in-memory and takes milliseconds, so it runs inline.
+        """
+        index = self._index
+        try:
+            rows = self._filter_rows(index, section, doc_id)
+            embedding = await self._get_embedding_async(query) if index.chunk_embeddings is not None else None
+            if embedding is None and index.chunk_embeddings is not None:
+                count_fallback('embedding_to_bm25')
+            return self._hybrid_search(index, query, embedding, rows, top_k)
         
         except Exception as e:
             print(f"Error in search: {e}")
-            # Return a fallback result
-            return self.chunks[:top_k] if self.chunks else []
+            count_fallback('search_error_to_leading_chunks')
+            return index.chunks[:top_k] if index.chunks else []
+    
+    def term_coverage(self, query: str, text: str) -> float:
+        """Fraction of the query's indexed terms (stop words removed) that also occur in text."""
+        analyze = self._index.vectorizer.build_analyzer()
+        terms = set(analyze(query))
+        if not terms:
+            return 0.0
+        return len(terms & set(analyze(text))) / len(terms)
     
     def get_section_content(self, section: str) -> str:
         """Get all content for a specific section."""
-        section_chunks = [
-            chunk for chunk in self.chunks 
-            if chunk['section'].lower() == section.lower()
-        ]
+        index = self._index
+        rows = index.section_rows.get(section.lower(), [])
+        section_chunks = [index.chunks[idx] for idx in rows]
         
         if not section_chunks:
             return ""
@@ -163,41 +690,48 @@ class CVRetriever:
             sections.add(chunk['section'])
         return sorted(list(sections))
     
-    def get_context_for_query(self, query: str, section: Optional[str] = None, max_context_length: int = 2000) -> str:
+    def get_context_for_query(self, query: str, section: Optional[str] = None, max_tokens: Optional[int] = None) -> str:
         """
         Get relevant context for a query, formatted for LLM consumption.
         
         Args:
             query: The user's question
             section: Optional section to focus on
-            max_context_length: Maximum length of context to return
+            max_tokens: Context token budget (CONTEXT_TOKEN_BUDGET by default)
         
         Returns:
             Formatted context string
         """
-        relevant_chunks = self.search(query, section, top_k=10)
-        
-        if not relevant_chunks:
-            return "No relevant information found in the CV."
+        return self.format_context(self.search(query, section, top_k=10), max_tokens)
+    
+    def format_context(self, relevant_chunks: List[Dict], max_tokens: Optional[int] = None) -> str:
+        """Format already-retrieved chunks as LLM context within a token budget (see pack_context)."""
+        return self.pack_context(relevant_chunks, max_tokens)[0]
+    
+    def pack_context(self, relevant_chunks: List[Dict], max_tokens: Optional[int] = None,
+                     strategy: Optional[str] = None) -> Tuple[str, Dict]:
+        """
+        Pack already-retrieved chunks into LLM context of at most max_tokens model tokens.
         
-        context_parts = []
-        current_length = 0
+        Args:
+            relevant_chunks: Chunks from search, best first
+            max_tokens: Context token budget (CONTEXT_TOKEN_BUDGET by default)
+            strategy: 'greedy' or 'knapsack' (CONTEXT_PACKING by default)
         
-        for chunk in relevant_chunks:
-            section_header = f"\n## {chunk['section']}\n"
-            chunk_text = chunk['content']
-            
-            # Check if adding this chunk would exceed max length
-            addition_length = len(section_header) + len(chunk_text)
-            if current_length + addition_length > max_context_length and context_parts:
-                break
-            
-            context_parts.append(section_header + chunk_text)
-            current_length += addition_length
+        Returns:
+            (context string, {'context_tokens', 'chunks', 'dropped'})
+        """
+        if not relevant_chunks:
+            return "No relevant information found in the CV.", {'context_tokens': 0, 'chunks': 0, 'dropped': 0}
         
-        context = "".join(context_parts)
+        chosen, costs = pack_chunks(relevant_chunks, max_tokens or self.context_tokens, strategy or self.context_packing)
+        if not chosen:
+            # Never send an empty context when the best chunk alone is over budget
+            chosen = [0]
         
-        if current_length >= max_context_length:
+        context = "".join(context_block(relevant_chunks[idx]) for idx in chosen)
+        dropped = len(relevant_chunks) - len(chosen)
+        if dropped:
             context += "\n\n[Note: Additional relevant information may be available in the CV]"
         
-        return context
+        return context, {'context_tokens': sum(costs[idx] for idx in chosen), 'chunks': len(chosen), 'dropped': dropped}
@@ -0,0 +1,124 @@
+import logging
+import re
+import threading
+from typing import Dict, List, Optional
+
+from metrics import ROUTE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+ROUTE_NOT_FOUND = 'not_found'
+ROUTE_EXTRACT = 'extract'
+ROUTE_DIRECT = 'direct'
+ROUTE_CREW = 'crew'
+ROUTES = (ROUTE_EXTRACT, ROUTE_NOT_FOUND, ROUTE_DIRECT, ROUTE_CREW)
+
+def _words(text: str) -> List[str]:
+    # Singular forms, so "languages" matches a "Language" heading and vice versa
+    return [word[:-1] if len(word) > 3 and word.endswith('s') else word for word in re.findall(r'[a-z0-9]+', text.lower())]
+
+class AnswerRouter:
+    """
+    Pick the cheapest answer path a question's retrieval results support.
+
+    Routes:
+        extract: the retrieval is confident (as for direct) and the question
+            text names a short section (e.g. "What languages do you speak?")
+            that is also the top chunk's; answer with that section's text, no LLM call
+        direct: the top chunk covers most of the question's terms (and is a
+            close dense match when embeddings exist) and the top results come
+            from one section; one grounded chat completion
+        crew: anything else, including empty retrievals, goes to the
+            researcher/analyst crew, whose tools can still read whole sections
+        not_found: recorded by the pipeline when the crew comes back empty;
+            route() never picks it
+
+    Args:
+        min_coverage: Fraction of the question's terms the top chunk (with its section title) must contain
+        min_dense: Cosine similarity the top chunk must reach when it has a dense score
+        min_section_share: Fraction of the top results that must come from one section
+        extract_max_chars: Longest section answered verbatim
+        top_n: Number of top results the section share is measured over
+    """
+
+    def __init__(self, min_coverage: float = 0.5, min_dense: float = 0.45, min_section_share: float = 0.6,
+                 extract_max_chars: int = 800, top_n: int = 5):
+        self.min_coverage = min_coverage
+        self.min_dense = min_dense
+        self.min_section_share = min_section_share
+        self.extract_max_chars = extract_max_chars
+        self.top_n = top_n
+        self._lock = threading.Lock()
+        self._counts = {route: 0 for route in ROUTES}
+        self._seconds = {route: 0.0 for route in ROUTES}
+
+    def _named_section(self, retriever, question: str) -> Optional[str]:
+        """The section whose title words all appear in the question text."""
+        words = set(_words(question))
+        for name in retriever.snapshot().section_rows:
+            title = _words(name)
+            if title and all(word in words for word in title):
+                return name
+        return None
+
+    def route(self, retriever, question: str, section: Optional[str], chunks: List[Dict]) -> Dict:
+        """
+        Decide how to answer a question from its search results.
+
+        A section filter only narrows the search: the extract route needs the
+        question itself to name the section, so "What is your level in
+        Spanish?" asked within Languages still gets an LLM answer.
+
+        Returns:
+            Dict with 'route', 'reason' and, once chunks were retrieved, the
+            signals behind the choice ('coverage', 'dense', 'section_share',
+            'section'); extract decisions also carry 'section_chunks'
+        """
+        if not chunks:
+            return {'route': ROUTE_CREW, 'reason': 'no chunks retrieved', 'section': section}
+
+        top = chunks[0]
+        top_sections = [chunk['section'] for chunk in chunks[:self.top_n]]
+        share = top_sections.count(top['section']) / len(top_sections)
+        coverage = retriever.term_coverage(question, f"{top['section']} {top['content']}")
+        dense = (top.get('scores') or {}).get('dense')
+        decision = {'coverage': round(coverage, 3), 'dense': None if dense is None else round(dense, 3),
+                    'section_share': round(share, 3), 'section': top['section']}
+
+        if coverage < self.min_coverage:
+            return {**decision, 'route': ROUTE_CREW, 'reason': 'low term coverage'}
+        if dense is not None and dense < self.min_dense:
+            return {**decision, 'route': ROUTE_CREW, 'reason': 'low dense similarity'}
+
+        named = self._named_section(retriever, question)
+        if named is not None and named == top['section'].lower():
+            index = retriever.snapshot()
+            section_chunks = [index.chunks[row] for row in index.section_rows.get(named, [])]
+            if 0 < sum(len(chunk['content']) for chunk in section_chunks) <= self.extract_max_chars:
+                return {**decision, 'route': ROUTE_EXTRACT, 'reason': 'question names a short section',
+                        'section_chunks': section_chunks}
+
+        if share < self.min_section_share and named is None:
+            return {**decision, 'route': ROUTE_CREW, 'reason': 'results span several sections'}
+        return {**decision, 'route': ROUTE_DIRECT, 'reason': 'confident single-section match'}
+
+    def record(self, question: str, decision: Dict, seconds: float):
+        """Log a routed answer and add its latency to the per-route totals."""
+        route = decision['route']
+        ROUTE_SECONDS.observe(seconds, route)
+        with self._lock:
+            self._counts[route] += 1
+            self._seconds[route] += seconds
+        logger.info(
+            f"Route {route} ({decision['reason']}) in {seconds * 1000:.0f} ms for '{question}': "
+            f"coverage={decision.get('coverage')} dense={decision.get('dense')} "
+            f"section_share={decision.get('section_share')} section={decision.get('section')}"
+        )
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                route: {'count': self._counts[route],
+                        'mean_ms': round(self._seconds[route] * 1000 / self._counts[route], 1) if self._counts[route] else None}
+                for route in ROUTES
+            }
@@ -0,0 +1,176 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from metrics import SEMANTIC_CACHE
+
+class SemanticAnswerCache:
+    """
+    Reuse answers for rephrased questions ("list your certs" for "What certifications do you have?").
+
+    Question embeddings live in a fixed-size in-memory matrix searched by cosine
+    similarity. A cached answer is reused when its question is at least
+    `threshold` similar, has the same section and was answered for the same CV
+    version. With `guard` on, the new question's best retrieved chunk must also
+    be among the chunks the cached question retrieved; a near-duplicate that
+    fails this check is a false hit and is answered normally. The least
+    recently used entry is evicted when the cache is full, and storing an answer
+    for a new CV version drops every older one.
+
+    Args:
+        retriever: The CV retriever, used for query embeddings and the guard's search
+        maxsize: Entries kept
+        threshold: Minimum cosine similarity between questions
+        guard: Check retrieval consistency before reusing an answer
+        guard_depth: Chunks remembered per cached question for the guard
+    """
+
+    def __init__(self, retriever, maxsize: int = 256, threshold: float = 0.92, guard: bool = True, guard_depth: int = 3):
+        self.retriever = retriever
+        self.maxsize = max(1, maxsize)
+        self.threshold = threshold
+        self.guard = guard
+        self.guard_depth = guard_depth
+        self._lock = threading.Lock()
+        self._vectors = None
+        # Per slot: last-use tick (0 = empty), section code and (question, response, chunk ids)
+        self._used = np.zeros(self.maxsize, dtype=np.int64)
+        self._sections = np.full(self.maxsize, -1, dtype=np.int64)
+        self._entries: List[Optional[Tuple[str, Dict, set]]] = [None] * self.maxsize
+        self._section_codes: Dict[str, int] = {}
+        self._version = None
+        self._tick = 0
+        self.hits = 0
+        self.misses = 0
+        self.false_hits = 0
+        self.evictions = 0
+
+    def _section_code(self, section: Optional[str]) -> int:
+        return self._section_codes.setdefault((section or '').lower(), len(self._section_codes))
+
+    def _candidate(self, section: Optional[str], version: str, embedding: np.ndarray) -> Optional[Tuple[int, float, Tuple]]:
+        """The most similar cached question above the threshold, as (slot, similarity, entry)."""
+        with self._lock:
+            if self._vectors is None or version != self._version:
+                return None
+            similarities = self._vectors @ (embedding / (np.linalg.norm(embedding) or 1.0))
+            similarities[(self._used == 0) | (self._sections != self._section_code(section))] = -1.0
+            slot = int(np.argmax(similarities))
+            if similarities[slot] < self.threshold:
+                return None
+            return slot, float(similarities[slot]), self._entries[slot]
+
+    def _accept(self, question: str, version: str, candidate: Optional[Tuple[int, float, Tuple]],
+                chunks: Optional[List[Dict]]) -> Optional[Dict]:
+        if candidate is None:
+            self._count('misses', 'miss')
+            return None
+
+        slot, similarity, entry = candidate
+        with self._lock:
+            # The guard search ran unlocked: the slot may since hold another question (or a newer CV version)
+            current = self._entries[slot] is entry and self._version == version
+            consistent = current and (not self.guard or not chunks or chunks[0]['id'] in entry[2])
+            if consistent:
+                self._tick += 1
+                self._used[slot] = self._tick
+
+        if not current:
+            self._count('misses', 'miss')
+            return None
+        cached_question, response, _ = entry
+        if not consistent:
+            print(f"Semantic cache rejected '{cached_question}' for '{question}' "
+                  f"(similarity {similarity:.3f}, different top chunk)")
+            self._count('false_hits', 'false_hit')
+            return None
+
+        print(f"Semantic cache hit: '{question}' reuses '{cached_question}' (similarity {similarity:.3f})")
+        self._count('hits', 'hit')
+        return response
+
+    def _count(self, name: str, result: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+        SEMANTIC_CACHE.inc(result)
+
+    def get(self, question: str, section: Optional[str], version: str) -> Optional[Dict]:
+        """A cached answer to a near-duplicate question, or None (also when embeddings are unavailable)."""
+        embedding = self.retriever.embed_query(question)
+        if embedding is None:
+            return None
+        candidate = self._candidate(section, version, embedding)
+        chunks = self.retriever.search(question, section, top_k=1) if candidate and self.guard else None
+        return self._accept(question, version, candidate, chunks)
+
+    async def aget(self, question: str, section: Optional[str], version: str) -> Optional[Dict]:
+        """Async counterpart of get for the ASGI app."""
+        embedding = await self.retriever.embed_query_async(question)
+        if embedding is None:
+            return None
+        candidate = self._candidate(section, version, embedding)
+        chunks = await self.retriever.search_async(question, section, top_k=1) if candidate and self.guard else None
+        return self._accept(question, version, candidate, chunks)
+
+    def set(self, question: str, section: Optional[str], version: str, response: Dict):
+        embedding = self.retriever.embed_query(question)
+        if embedding is not None:
+            chunks = self.retriever.search(question, section, top_k=self.guard_depth) if self.guard else []
+            self._store(question, section, version, response, embedding, chunks)
+
+    async def aset(self, question: str, section: Optional[str], version: str, response: Dict):
+        embedding = await self.retriever.embed_query_async(question)
+        if embedding is not None:
+            chunks = await self.retriever.search_async(question, section, top_k=self.guard_depth) if self.guard else []
+            self._store(question, section, version, response, embedding, chunks)
+
+    def _store(self, question: str, section: Optional[str], version: str, response: Dict,
+               embedding: np.ndarray, chunks: List[Dict]):
+        with self._lock:
+            if version != self._version:
+                # Answers for an older CV version can never be served again
+                self._clear()
+                self._version = version
+            if self._vectors is None or self._vectors.shape[1] != len(embedding):
+                self._vectors = np.zeros((self.maxsize, len(embedding)), dtype=np.float32)
+
+            vector = embedding / (np.linalg.norm(embedding) or 1.0)
+            same = np.flatnonzero((self._used > 0) & (self._sections == self._section_code(section))
+                                  & (self._vectors @ vector >= 0.9999))
+            if len(same):
+                # The same question answered again replaces its entry
+                slot = int(same[0])
+            else:
+                # Empty slots have tick 0, so they are filled before anything is evicted
+                slot = int(np.argmin(self._used))
+                if self._used[slot]:
+                    self.evictions += 1
+            self._tick += 1
+            self._used[slot] = self._tick
+            self._vectors[slot] = vector
+            self._sections[slot] = self._section_code(section)
+            self._entries[slot] = (question, response, {chunk['id'] for chunk in chunks})
+
+    def _clear(self):
+        self._used[:] = 0
+        self._entries = [None] * self.maxsize
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.false_hits
+            return {
+                'size': int(np.count_nonzero(self._used)),
+                'maxsize': self.maxsize,
+                'threshold': self.threshold,
+                'guard': self.guard,
+                'hits': self.hits,
+                'misses': self.misses,
+                'false_hits': self.false_hits,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions
+            }
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+
+from metrics import COALESCED
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key into one computation.
+
+    The first caller for a key runs func; callers arriving while it runs wait
+    for that run and get its result, or its exception re-raised. Nothing is
+    kept once the run finishes, so a failure is retried by the next caller. A
+    waiter gives up after `timeout` seconds with TimeoutError while the run
+    carries on for the others.
+
+    Args:
+        timeout: Seconds a coalesced caller waits (None waits indefinitely)
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        # Threads wait on threads and coroutines on tasks, so each kind has its own in-flight map
+        self._calls: Dict[Hashable, Dict] = {}
+        self._tasks: Dict[Hashable, Dict] = {}
+        self.runs = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self.failures = 0
+
+    def _join(self, calls: Dict, key: Hashable, new_call: Callable[[], Dict]):
+        """The in-flight call for key and whether this caller leads it."""
+        with self._lock:
+            call = calls.get(key)
+            if call is None:
+                call = calls[key] = new_call()
+                self.runs += 1
+                return call, True
+            self.coalesced += 1
+        COALESCED.inc()
+        return call, False
+
+    def _finish(self, calls: Dict, key: Hashable, call: Dict, error: Optional[BaseException]):
+        with self._lock:
+            if calls.get(key) is call:
+                del calls[key]
+            if error is not None:
+                self.failures += 1
+
+    def _timed_out(self, key: Hashable) -> TimeoutError:
+        with self._lock:
+            self.timeouts += 1
+        return TimeoutError(f"Timed out after {self.timeout}s waiting for an identical in-flight request")
+
+    def do(self, key: Hashable, func: Callable[[], object]):
+        call, leader = self._join(self._calls, key, lambda: {'done': threading.Event(), 'result': None, 'error': None})
+        if leader:
+            try:
+                call['result'] = func()
+            except BaseException as e:
+                call['error'] = e
+                raise
+            finally:
+                self._finish(self._calls, key, call, call['error'])
+                call['done'].set()
+            return call['result']
+
+        if not call['done'].wait(self.timeout):
+            raise self._timed_out(key)
+        if call['error'] is not None:
+            raise call['error']
+        return call['result']
+
+    async def ado(self, key: Hashable, func: Callable[[], Awaitable]):
+        """
+        Async counterpart of do for the ASGI app.
+
+        The computation runs as its own task, so a leader whose request is
+        cancelled (e.g. the client disconnected) does not cancel it for the
+        waiters. Every caller, leader included, waits at most `timeout` seconds.
+        """
+        def start() -> Dict:
+            call = {'task': asyncio.ensure_future(func())}
+            call['task'].add_done_callback(lambda done: self._finish(
+                self._tasks, key, call, None if done.cancelled() else done.exception()))
+            return call
+
+        call, _ = self._join(self._tasks, key, start)
+        try:
+            return await asyncio.wait_for(asyncio.shield(call['task']), self.timeout)
+        except asyncio.TimeoutError:
+            raise self._timed_out(key) from None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'in_flight': len(self._calls) + len(self._tasks),
+                'runs': self.runs,
+                'coalesced': self.coalesced,
+                'timeouts': self.timeouts,
+                'failures': self.failures
+            }
@@ -0,0 +1,83 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+class StartupProfile:
+    """
+    Wall-clock timings of startup steps and the readiness of each backend component.
+
+    Steps are timed with step(); components move from 'loading' to 'ready',
+    'disabled' or 'failed' with mark(). Both are safe to read from request
+    threads while a background thread is still initializing.
+
+    Args:
+        started_at: perf_counter() value startup is measured from (defaults to now)
+    """
+
+    def __init__(self, started_at: Optional[float] = None):
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.finished_at = None
+        self.steps: List[Dict] = []
+        self.components: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def _now_ms(self) -> float:
+        return (time.perf_counter() - self.started_at) * 1000
+
+    def record(self, name: str, seconds: float, ok: bool = True):
+        with self._lock:
+            self.steps.append({'step': name, 'ms': round(seconds * 1000, 1), 'ok': ok,
+                               'finished_at_ms': round(self._now_ms(), 1)})
+
+    @contextmanager
+    def step(self, name: str):
+        """Time a block as a named startup step (recorded even if it raises)."""
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.record(name, time.perf_counter() - start, ok)
+
+    def expect(self, *components: str):
+        """Register components that are about to load."""
+        with self._lock:
+            for name in components:
+                self.components.setdefault(name, {'state': 'loading'})
+
+    def mark(self, component: str, state: str, error: Optional[str] = None):
+        with self._lock:
+            entry = {'state': state, 'at_ms': round(self._now_ms(), 1)}
+            if error:
+                entry['error'] = error
+            self.components[component] = entry
+
+    def is_ready(self, component: str) -> bool:
+        return self.components.get(component, {}).get('state') == 'ready'
+
+    @property
+    def failed(self) -> bool:
+        return any(entry['state'] == 'failed' for entry in list(self.components.values()))
+
+    def finish(self):
+        self.finished_at = time.perf_counter()
+
+    def report(self) -> Dict:
+        with self._lock:
+            return {
+                'complete': self.finished_at is not None,
+                'total_ms': round(((self.finished_at or time.perf_counter()) - self.started_at) * 1000, 1),
+                'components': {name: dict(entry) for name, entry in self.components.items()},
+                'steps': [dict(step) for step in self.steps]
+            }
+
+    def format_report(self) -> str:
+        """Human-readable table of steps, slowest first."""
+        report = self.report()
+        lines = [f"Startup took {report['total_ms']:.0f} ms"]
+        for step in sorted(report['steps'], key=lambda step: -step['ms']):
+            status = '' if step['ok'] else '  (failed)'
+            lines.append(f"  {step['ms']:>9.1f} ms  {step['step']}{status}")
+        return '\n'.join(lines)
@@ -0,0 +1,104 @@
+"""
+Model token counting and token-budgeted context packing.
+
+Counts use tiktoken with TOKEN_ENCODING (cl100k_base, used by gpt-35-turbo,
+gpt-4 and the ada/text-embedding-3 models). The encoder is loaded once per
+process; when tiktoken or its encoding file is unavailable (no network on the
+first load, for example) counts fall back to about four characters per token.
+"""
+import functools
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+CHARS_PER_TOKEN = 4
+PACKING_STRATEGIES = ('greedy', 'knapsack')
+# Knapsack packing is exact over this many top-ranked chunks
+KNAPSACK_CANDIDATES = 24
+
+_lock = threading.Lock()
+
+@functools.lru_cache(maxsize=None)
+def get_encoder(name: Optional[str] = None):
+    """The tiktoken encoding, or None when it cannot be loaded (counts are then estimated)."""
+    name = name or os.getenv('TOKEN_ENCODING', 'cl100k_base')
+    with _lock:
+        try:
+            import tiktoken
+            return tiktoken.get_encoding(name)
+        except Exception as e:
+            print(f"tiktoken encoding '{name}' unavailable, estimating tokens from characters: {e}")
+            return None
+
+def tokenizer_name() -> str:
+    encoder = get_encoder()
+    return encoder.name if encoder is not None else 'estimate'
+
+def count_tokens(text: str) -> int:
+    """Number of model tokens in text."""
+    encoder = get_encoder()
+    if encoder is None:
+        return max(1, len(text) // CHARS_PER_TOKEN) if text else 0
+    return len(encoder.encode(text, disallowed_special=()))
+
+def tail_tokens(text: str, count: int) -> str:
+    """The last `count` tokens of text."""
+    if count <= 0:
+        return ""
+    encoder = get_encoder()
+    if encoder is None:
+        return text[-count * CHARS_PER_TOKEN:]
+    tokens = encoder.encode(text, disallowed_special=())
+    return text if len(tokens) <= count else encoder.decode(tokens[-count:])
+
+def count_message_tokens(messages: List[Dict]) -> int:
+    """Prompt tokens of a chat request, including the per-message framing the chat format adds."""
+    # Every message is wrapped in <|start|>{role}\n ... <|end|>\n, and the reply is primed with 3 tokens
+    return sum(4 + count_tokens(message['content']) for message in messages) + 3
+
+def context_block(chunk: Dict) -> str:
+    """A chunk as it appears in LLM context."""
+    return f"\n## {chunk['section']}\n{chunk['content']}"
+
+def _chunk_value(chunk: Dict, rank: int) -> float:
+    # Search results carry their fused score; other chunks (e.g. a whole section) rank by position
+    return chunk.get('similarity') or 1.0 / (rank + 1)
+
+def _pack_knapsack(costs: List[int], values: List[float], budget: int) -> List[int]:
+    # Sparse 0/1 knapsack: tokens used -> (value, chosen indices)
+    best = {0: (0.0, ())}
+    for idx, (cost, value) in enumerate(zip(costs, values)):
+        for used, (total, chosen) in list(best.items()):
+            filled = used + cost
+            if filled <= budget and (filled not in best or best[filled][0] < total + value):
+                best[filled] = (total + value, chosen + (idx,))
+    return list(max(best.values(), key=lambda state: state[0])[1])
+
+def pack_chunks(chunks: List[Dict], budget: int, strategy: str = 'greedy') -> Tuple[List[int], List[int]]:
+    """
+    Choose which ranked chunks fit a token budget.
+
+    greedy takes chunks in ranking order, skipping any that no longer fit;
+    knapsack maximises the summed retrieval score of the chunks that fit.
+
+    Args:
+        chunks: Chunks from search, best first
+        budget: Context tokens available
+        strategy: 'greedy' or 'knapsack'
+
+    Returns:
+        (indices of the chosen chunks in ranking order, token cost of every chunk)
+    """
+    costs = [count_tokens(context_block(chunk)) for chunk in chunks]
+    if strategy == 'knapsack':
+        candidates = min(len(chunks), KNAPSACK_CANDIDATES)
+        values = [_chunk_value(chunk, rank) for rank, chunk in enumerate(chunks[:candidates])]
+        return sorted(_pack_knapsack(costs[:candidates], values, budget)), costs
+
+    chosen = []
+    used = 0
+    for idx, cost in enumerate(costs):
+        if used + cost <= budget:
+            chosen.append(idx)
+            used += cost
+    return chosen, costs
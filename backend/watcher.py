@@ -0,0 +1,153 @@
+import hashlib
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from loader import CVLoader, section_hash
+from retriever import CVRetriever
+from metrics import stage_timer
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class CVWatcher:
+    """
+    Poll CV files and re-index only what changed.
+
+    A file is re-read only when its mtime or size moves, and re-indexed only when
+    its content hash differs. Within a changed document, sections whose content
+    hash is unchanged keep their existing chunks (and therefore their embeddings);
+    the retriever then swaps in the rebuilt index atomically.
+
+    Args:
+        retriever: Retriever whose index is updated
+        sources: Returns the watched files as {doc_id: path}
+        interval: Seconds between polls
+        single_document: Key the index by the file's content hash (single-CV mode)
+        on_reload: Called as on_reload(doc_id, loader) after a document is re-indexed
+    """
+
+    def __init__(self, retriever: CVRetriever, sources: Callable[[], Dict[str, str]], interval: float = 2.0,
+                 chunk_size: int = 128, overlap: int = 16, single_document: bool = False,
+                 on_reload: Optional[Callable[[str, Optional[CVLoader]], None]] = None):
+        self.retriever = retriever
+        self.sources = sources
+        self.interval = interval
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.single_document = single_document
+        self.on_reload = on_reload
+        self.reloads = 0
+        self.last_reload = None
+        self._files = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> 'CVWatcher':
+        """Record the current state of every file, then poll in a daemon thread."""
+        self.poll(baseline=True)
+        self._thread = threading.Thread(target=self._run, name='cv-watcher', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"CV watcher poll failed: {e}")
+
+    def poll(self, baseline: bool = False) -> List[str]:
+        """
+        Check every watched file once and re-index the ones that changed.
+
+        Args:
+            baseline: Only record file state; do not re-index
+
+        Returns:
+            Doc ids that were re-indexed or removed
+        """
+        changed = []
+        current = self.sources()
+
+        for doc_id, path in current.items():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+
+            previous = self._files.get(doc_id)
+            if previous and previous[:2] == (stat.st_mtime_ns, stat.st_size):
+                continue
+
+            digest = file_digest(path)
+            self._files[doc_id] = (stat.st_mtime_ns, stat.st_size, digest)
+            if baseline or (previous and previous[2] == digest):
+                continue
+
+            self.reindex(doc_id, path, digest)
+            changed.append(doc_id)
+
+        for doc_id in [doc_id for doc_id in self._files if doc_id not in current]:
+            del self._files[doc_id]
+            if not baseline:
+                self._replace(doc_id, [], None, None, time.perf_counter(), 0, 0)
+                changed.append(doc_id)
+
+        return changed
+
+    def reindex(self, doc_id: str, path: str, digest: Optional[str] = None):
+        """Re-parse one document and re-chunk only its changed sections."""
+        start = time.perf_counter()
+        loader = CVLoader(path, doc_id=doc_id)
+        loader.load_content()
+        sections = loader.parse_sections()
+
+        previous = {}
+        for chunk in self.retriever.snapshot().chunks:
+            if chunk.get('doc_id') == doc_id:
+                previous.setdefault(chunk['section'], []).append(chunk)
+
+        chunks = []
+        changed_sections = 0
+        with stage_timer('chunk'):
+            for section_name, section_data in sections.items():
+                old_chunks = previous.get(section_name)
+                if old_chunks and old_chunks[0]['metadata'].get('section_hash') == section_hash(section_data['content']):
+                    chunks.extend(old_chunks)
+                else:
+                    chunks.extend(loader.chunk_section(section_name, section_data, self.chunk_size, self.overlap))
+                    changed_sections += 1
+
+        content_hash = loader.content_hash() if self.single_document else None
+        self._replace(doc_id, chunks, content_hash, loader, start, changed_sections, len(sections))
+
+    def _replace(self, doc_id: str, chunks: List[Dict], content_hash: Optional[str], loader: Optional[CVLoader],
+                 start: float, changed_sections: int, total_sections: int):
+        self.retriever.replace_document(doc_id, chunks, content_hash)
+        self.reloads += 1
+        self.last_reload = {
+            'doc_id': doc_id,
+            'seconds': time.perf_counter() - start,
+            'sections_changed': changed_sections,
+            'sections_total': total_sections,
+            'chunks': len(chunks),
+            'finished_at': time.time()
+        }
+        print(f"Re-indexed {doc_id}: {changed_sections}/{total_sections} sections changed "
+              f"in {self.last_reload['seconds'] * 1000:.1f} ms")
+        if self.on_reload:
+            self.on_reload(doc_id, loader)
+
+    def stats(self) -> Dict:
+        return {'files': len(self._files), 'reloads': self.reloads, 'last_reload': self.last_reload}
@@ -1,10 +1,15 @@
 import type { Express } from "express";
-import { createServer, type Server } from "http";
+import { createServer, request as httpRequest, type Server } from "http";
 import { spawn } from "child_process";
 import path from "path";
 
 let flaskProcess: any = null;
 
+// Conditional and content-negotiation headers the backend answers from
+const FORWARDED_REQUEST_HEADERS = ['if-none-match', 'accept-encoding'];
+// Backend response headers the browser needs to revalidate and decode the relayed body
+const RELAYED_RESPONSE_HEADERS = ['content-type', 'content-length', 'content-encoding', 'etag', 'cache-control', 'vary'];
+
 export async function registerRoutes(app: Express): Promise<Server> {
   // Start Flask backend
   const startFlaskBackend = () => {
@@ -39,33 +44,71 @@ export async function registerRoutes(app: Express): Promise<Server> {
     startFlaskBackend();
   }
 
-  // Proxy API requests to Flask backend
+  // Proxy API requests to Flask backend. The body is piped through unchanged so the
+  // backend's ETags, 304s and precomputed gzip reach the browser.
   app.use('/api/*', (req, res) => {
-    const apiUrl = `http://localhost:8000${req.originalUrl}`;
-    
-    // Prepare headers
     const headers: Record<string, string> = {};
+    for (const name of FORWARDED_REQUEST_HEADERS) {
+      const value = req.headers[name];
+      if (typeof value === 'string') {
+        headers[name] = value;
+      }
+    }
     
-    // Only set Content-Type for requests with body
+    // Only send a body (and Content-Type) for requests that have one
+    let body: string | undefined;
     if (req.method !== 'GET' && req.method !== 'HEAD') {
+      body = JSON.stringify(req.body);
       headers['Content-Type'] = 'application/json';
+      headers['Content-Length'] = String(Buffer.byteLength(body));
     }
     
     // Forward the request to Flask
-    fetch(apiUrl, {
-      method: req.method,
-      headers: headers,
-      body: req.method !== 'GET' && req.method !== 'HEAD' ? JSON.stringify(req.body) : undefined,
-    })
-    .then(response => response.json())
-    .then(data => res.json(data))
-    .catch(error => {
+    const upstream = httpRequest(`http://localhost:8000${req.originalUrl}`, { method: req.method, headers }, response => {
+      const status = response.statusCode || 502;
+      for (const name of RELAYED_RESPONSE_HEADERS) {
+        const value = response.headers[name];
+        if (value !== undefined) {
+          res.setHeader(name, value);
+        }
+      }
+      
+      if (status === 304) {
+        response.resume();
+        res.status(304).end();
+        return;
+      }
+      
+      res.status(status);
+      // Relay server-sent events chunk by chunk instead of buffering the whole body
+      if (response.headers['content-type']?.startsWith('text/event-stream')) {
+        res.setHeader('Cache-Control', 'no-cache');
+        res.setHeader('X-Accel-Buffering', 'no');
+        res.flushHeaders();
+      }
+      response.pipe(res);
+    });
+    
+    // Stop the upstream request if the browser goes away mid-answer
+    res.on('close', () => {
+      if (!res.writableFinished) {
+        upstream.destroy();
+      }
+    });
+    
+    upstream.on('error', error => {
       console.error('Flask API Error:', error);
+      if (res.headersSent) {
+        res.end();
+        return;
+      }
       res.status(500).json({ 
         error: 'Backend service unavailable',
         message: 'The Flask backend is not responding. Please ensure it is running on port 8000.'
       });
     });
+    
+    upstream.end(body);
   });
 
   const httpServer = createServer(app);